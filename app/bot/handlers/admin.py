@@ -1,6 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.db.queries import set_ad_text
+from app.db.async_queries import set_ad_text
+from app.db.queries import get_search_cache_stats
 from app.utils.logger import setup_logger
 from app.utils.permissions import is_admin
 
@@ -25,10 +26,33 @@ async def set_ad_command(
         return
 
     ad_text = " ".join(context.args)
-    set_ad_text(ad_text)
+    await set_ad_text(ad_text)
 
     await message.reply_text("✅ Ad text updated")
 
     logger.info(
         f"📢 Ad updated by admin {user.id}"
     )
+
+
+async def search_stats_command(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+):
+    message = update.effective_message
+
+    if not await is_admin(update, context):
+        await message.reply_text("❌ Admin only command")
+        return
+
+    stats = get_search_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / lookups * 100 if lookups else 0.0
+
+    await message.reply_text(
+        "📊 Search cache\n"
+        f"Entries: {stats['size']}/{stats['max_entries']} (TTL {stats['ttl_seconds']}s)\n"
+        f"Hits: {stats['hits']} | Misses: {stats['misses']} ({hit_rate:.1f}% hit rate)\n"
+        f"Evictions: {stats['evictions']} | Expired: {stats['expirations']}\n"
+        f"Invalidations: {stats['invalidations']}"
+    )
@@ -2,9 +2,10 @@ import re
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from app.db.queries import insert_movie
+from app.db.async_queries import insert_movie
 from app.utils.config import DB_CHANNEL_ID
 from app.utils.logger import setup_logger
+from app.utils.release_parser import parse_release_name
 
 logger = setup_logger()
 
@@ -51,10 +52,13 @@ async def channel_post_handler(
         "file_size": file.file_size,
         "caption": caption,
         "mime_type": file.mime_type,
+        # Documents have no duration
+        "duration": getattr(file, "duration", None),
         "normalized_text": normalize_text(searchable),
+        **parse_release_name(file.file_name),
     }
 
-    inserted = insert_movie(metadata)
+    inserted = await insert_movie(metadata)
 
     if inserted:
         logger.info(f"🆕 Auto-indexed: {file.file_name}")
@@ -2,12 +2,14 @@ import base64
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ChatType
-from app.db.queries import get_ad_text
+from app.db.async_queries import get_ad_text
 
 from app.utils.auto_delete import schedule_auto_delete
-from app.db.queries import search_movies, count_movies
+from app.utils.search_sessions import search_sessions
+from app.db.async_queries import search_movies_page
 from app.bot.handlers.search import (
     build_pagination_keyboard,
+    format_total,
     RESULTS_PER_PAGE,
 )
 from app.utils.logger import setup_logger
@@ -30,7 +32,7 @@ async def pagination_callback(
     bot_username = bot.username
 
     try:
-        action, search_query, page_str = query.data.split("|")
+        action, session_id, page_str = query.data.split("|")
         page = int(page_str)
     except ValueError:
         logger.warning("⚠️ Invalid pagination callback data")
@@ -46,14 +48,28 @@ async def pagination_callback(
         )
         return
 
-    total = count_movies(search_query)
+    session = search_sessions.get(session_id)
+    if session is None:
+        await query.edit_message_text(
+            "⌛ These results have expired. Please search again.",
+        )
+        return
+
+    search_query = session["query"]
     offset = page * RESULTS_PER_PAGE
+    results = session["ranked"][offset:offset + RESULTS_PER_PAGE]
+
+    # Past the end of the ranked list: fetch deeper once and keep it
+    if len(results) < RESULTS_PER_PAGE and len(session["ranked"]) < session["total"]:
+        search = await search_movies_page(
+            query=search_query,
+            limit=RESULTS_PER_PAGE,
+            offset=offset,
+        )
+        search_sessions.update(session_id, search)
+        results = search["results"]
 
-    results = search_movies(
-        query=search_query,
-        limit=RESULTS_PER_PAGE,
-        offset=offset,
-    )
+    total = session["total"]
 
     if not results:
         await query.edit_message_text(
@@ -80,7 +96,7 @@ async def pagination_callback(
 
     # Append pagination row if needed
     pagination_kb = build_pagination_keyboard(
-        query=search_query,
+        session_id=session_id,
         page=page,
         total=total,
         page_size=RESULTS_PER_PAGE,
@@ -92,11 +108,11 @@ async def pagination_callback(
 
     text = (
         f"🎬 <b>Results for:</b> <i>{search_query}</i>\n\n"
-        f"📊 Showing {len(results)} of {total}"
+        f"📊 Showing {len(results)} of {format_total(session)}"
     )
 
     text += f"\n\n{AUTO_DELETE_NOTICE}"
-    ad_text = get_ad_text()
+    ad_text = await get_ad_text()
     if ad_text:
         text += f"\n\n{ad_text}"
 
@@ -108,7 +124,7 @@ async def pagination_callback(
         reply_markup=keyboard,
     )
 
-    schedule_auto_delete(
+    await schedule_auto_delete(
         context=context,
         chat_id=sent.chat_id,
         bot_message_id=sent.message_id,
@@ -3,10 +3,12 @@ from urllib.parse import quote_plus
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from app.db.queries import search_movies, count_movies
+from app.db.async_queries import search_movies_page
+from app.db.queries import suggest_queries
 from app.utils.logger import setup_logger
 from app.utils.auto_delete import schedule_auto_delete
-from app.db.queries import get_ad_text
+from app.utils.search_sessions import search_sessions
+from app.db.async_queries import get_ad_text
 from app.utils.permissions import is_admin
 
 from app.utils.formatters import format_size
@@ -16,11 +18,16 @@ from telegram.constants import ChatType
 logger = setup_logger()
 
 RESULTS_PER_PAGE = 5
+CALLBACK_DATA_LIMIT = 64  # bytes, enforced by Telegram
 AUTO_DELETE_NOTICE = "⚠️ <i>Search results will be deleted in 2 minutes.</i>"
 
 
+def format_total(search: dict) -> str:
+    return f"{search['total']}+" if search["capped"] else str(search["total"])
+
+
 def build_pagination_keyboard(
-    query: str,
+    session_id: str,
     page: int,
     total: int,
     page_size: int,
@@ -31,7 +38,7 @@ def build_pagination_keyboard(
         buttons.append(
             InlineKeyboardButton(
                 "⬅ Prev",
-                callback_data=f"search|{query}|{page - 1}",
+                callback_data=f"search|{session_id}|{page - 1}",
             )
         )
 
@@ -39,7 +46,7 @@ def build_pagination_keyboard(
         buttons.append(
             InlineKeyboardButton(
                 "Next ➡",
-                callback_data=f"search|{query}|{page + 1}",
+                callback_data=f"search|{session_id}|{page + 1}",
             )
         )
 
@@ -54,13 +61,6 @@ async def search_command(
 ):
     message = update.effective_message
     user = update.effective_user
-    
-    # Get bot username for deep linking
-    bot = await context.bot.get_me()
-    bot_username = bot.username
-
-    page = 0
-
 
     if not context.args:
         await message.reply_text(
@@ -83,16 +83,89 @@ async def search_command(
 
     query = " ".join(context.args).strip()
 
-    total = count_movies(query)
+    await _run_search(
+        context,
+        user,
+        chat_id=message.chat_id,
+        query=query,
+        reply_to=message.message_id,
+        user_message_id=message.message_id,
+    )
+
+
+async def _run_search(
+    context: ContextTypes.DEFAULT_TYPE,
+    user,
+    chat_id: int,
+    query: str,
+    reply_to: int | None,
+    user_message_id: int | None,
+):
+    """
+    Run a search and post the results (or help) in chat_id as a reply to
+    reply_to. user_message_id is the user's query message, deleted along
+    with the reply.
+    """
+    # Get bot username for deep linking
+    bot = await context.bot.get_me()
+    bot_username = bot.username
+
+    page = 0
+
+    async def reply(text, **kwargs):
+        return await context.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            reply_to_message_id=reply_to,
+            allow_sending_without_reply=True,
+            **kwargs,
+        )
+
+    search = await search_movies_page(
+        query=query,
+        limit=RESULTS_PER_PAGE,
+        offset=0,
+    )
+    total = search["total"]
     if total == 0:
         encoded_query = quote_plus(query)
         google_url = f"https://www.google.com/search?q={encoded_query}"
         
+        suggestions = [
+            suggestion
+            for suggestion in suggest_queries(query)
+            if len(f"spell|{user_message_id or ''}|{suggestion}".encode()) <= CALLBACK_DATA_LIMIT
+        ]
+
+        if suggestions:
+            # One-tap corrected searches instead of the long help text
+            keyboard = InlineKeyboardMarkup(
+                [
+                    [InlineKeyboardButton(f"🔍 {suggestion}", callback_data=f"spell|{user_message_id or ''}|{suggestion}")]
+                    for suggestion in suggestions
+                ]
+                + [[InlineKeyboardButton("Check on Google 🔎", url=google_url)]]
+            )
+
+            sent_msg = await reply(
+                f"Hey {user.first_name} 👋 Nothing found for “{query}”.\n\n"
+                "🤔 Did you mean:",
+                reply_markup=keyboard,
+            )
+
+            await schedule_auto_delete(
+                context=context,
+                chat_id=sent_msg.chat_id,
+                bot_message_id=sent_msg.message_id,
+                user_message_id=user_message_id,
+            )
+            return
+
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton("Check on Google 🔎", url=google_url)]
         ])
 
-        sent_msg = await message.reply_text(
+        sent_msg = await reply(
             f"Hey {user.first_name} 👋 Please don’t send messages like this.\n"
             "Search using ONLY the movie or series name.\n"
             "You may add the year or language if needed.\n"
@@ -116,19 +189,15 @@ async def search_command(
             reply_markup=keyboard,
         )
         
-        schedule_auto_delete(
+        await schedule_auto_delete(
             context=context,
             chat_id=sent_msg.chat_id,
             bot_message_id=sent_msg.message_id,
-            user_message_id=message.message_id,
+            user_message_id=user_message_id,
         )
         return
 
-    results = search_movies(
-        query=query,
-        limit=RESULTS_PER_PAGE,
-        offset=0,
-    )
+    results = search["results"]
 
     # Build inline buttons — one per result
     file_buttons = []
@@ -145,14 +214,14 @@ async def search_command(
             )
         ])
 
-    # Append pagination row if needed
-    pagination_kb = build_pagination_keyboard(
-        query=query,
-        page=page,
-        total=total,
-        page_size=RESULTS_PER_PAGE,
-    )
-    if pagination_kb:
+    # Append pagination row if needed; pages are served from the session
+    if total > RESULTS_PER_PAGE:
+        pagination_kb = build_pagination_keyboard(
+            session_id=search_sessions.create(query, search),
+            page=page,
+            total=total,
+            page_size=RESULTS_PER_PAGE,
+        )
         file_buttons.extend(pagination_kb.inline_keyboard)
 
     keyboard = InlineKeyboardMarkup(file_buttons)
@@ -160,7 +229,7 @@ async def search_command(
     reply_text = (
         f"👋 Hi @{user.username or user.first_name},\n\n"
         f"🎬 <b>Results for:</b> <i>{query}</i>\n\n"
-        f"📊 Showing {len(results)} of {total}"
+        f"📊 Showing {len(results)} of {format_total(search)}"
     )
 
     logger.info(
@@ -168,22 +237,22 @@ async def search_command(
         f"({len(results)}/{total})"
     )
     reply_text += f"\n\n{AUTO_DELETE_NOTICE}"
-    ad_text = get_ad_text()
+    ad_text = await get_ad_text()
     if ad_text:
         reply_text += f"\n\n{ad_text}"
 
-    sent = await message.reply_text(
+    sent = await reply(
         reply_text,
         parse_mode="HTML",
         disable_web_page_preview=True,
         reply_markup=keyboard,
     )
 
-    schedule_auto_delete(
+    await schedule_auto_delete(
         context=context,
         chat_id=sent.chat_id,
         bot_message_id=sent.message_id,
-        user_message_id=message.message_id,
+        user_message_id=user_message_id,
     )
 
 
@@ -208,3 +277,33 @@ async def plain_text_search(
     context.args = text.split()
     await search_command(update, context)
 
+
+async def suggestion_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+):
+    query = update.callback_query
+    await query.answer()
+
+    # spell|<user's query message id>|<suggestion>
+    try:
+        action, user_message_id, suggestion = query.data.split("|", 2)
+        user_message_id = int(user_message_id) if user_message_id else None
+    except ValueError:
+        logger.warning("⚠️ Invalid suggestion callback data")
+        return
+
+    if action != "spell" or not suggestion:
+        return
+
+    logger.info(f"🔤 Suggestion picked by {update.effective_user.id}: '{suggestion}'")
+
+    # Answer the user's original query, not the bot's suggestion message
+    await _run_search(
+        context,
+        update.effective_user,
+        chat_id=query.message.chat_id,
+        query=suggestion,
+        reply_to=user_message_id,
+        user_message_id=user_message_id,
+    )
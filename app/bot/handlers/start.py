@@ -4,7 +4,7 @@ from telegram.ext import ContextTypes
 from telegram.error import TelegramError
 from app.utils.config import DB_CHANNEL_ID, COLLECTION_CHANNEL_ID
 from app.utils.logger import setup_logger
-from app.db.queries import get_ad_text, is_file_forwarded, mark_file_as_forwarded
+from app.db.async_queries import get_ad_text, is_file_forwarded, mark_file_as_forwarded
 
 logger = setup_logger()
 
@@ -58,7 +58,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # In multi-channel mode, target_channel_id usually differs from DB_CHANNEL_ID
             # This is expected behavior, so we proceed to copy from target_channel_id.
 
-            ad_text = get_ad_text()
+            ad_text = await get_ad_text()
             caption = f"Here is your file, requested by {user.mention_html()}"
             if ad_text:
                 caption += f"\n\n{ad_text}"
@@ -108,7 +108,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if COLLECTION_CHANNEL_ID:
             try:
                 # Check if already forwarded to avoid spam/duplicates
-                if not is_file_forwarded(target_channel_id, target_message_id):
+                if not await is_file_forwarded(target_channel_id, target_message_id):
                     logger.info(f"Forwarding new file to Collection Channel ({COLLECTION_CHANNEL_ID})...")
                     
                     sent_msg = await context.bot.copy_message(
@@ -119,7 +119,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         parse_mode="HTML"
                     )
                     
-                    mark_file_as_forwarded(
+                    await mark_file_as_forwarded(
                         channel_id=target_channel_id, 
                         message_id=target_message_id, 
                         dest_message_id=sent_msg.message_id
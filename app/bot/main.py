@@ -1,4 +1,5 @@
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CommandHandler,
     CallbackQueryHandler,
@@ -7,31 +8,77 @@ from telegram.ext import (
     ContextTypes
 )
 
-from app.utils.config import BOT_TOKEN, DB_CHANNEL_ID
+from app.utils.config import (
+    BOT_TOKEN,
+    DB_CHANNEL_ID,
+    IN_MEMORY_SEARCH,
+    SEARCH_INDEX_SYNC_SECONDS,
+    SPELLCHECK_MAX_DISTANCE,
+)
 from app.utils.logger import setup_logger
 from app.db.models import ensure_indexes
-from app.bot.handlers.search import search_command, plain_text_search
+from app.db.queries import load_search_index, load_spelling_index
+from app.db.async_queries import sync_memory_indexes
+from app.bot.handlers.search import search_command, plain_text_search, suggestion_callback
 from app.bot.handlers.start import start_command
-from app.bot.handlers.admin import set_ad_command
+from app.bot.handlers.admin import set_ad_command, search_stats_command
 from app.bot.handlers.errors import error_handler
 from app.bot.handlers.pagination import pagination_callback
 from app.bot.handlers.channel_watcher import channel_post_handler
-from app.utils.auto_delete import process_deletions_job
+from app.utils.auto_delete import deletion_scheduler, reclaim_deletions_job, RECLAIM_INTERVAL
+from app.utils.leader import LeaderElection
 
 
 logger = setup_logger()
 
+# Jobs that must run once across all bot replicas are gated on this
+leader = LeaderElection("bot")
+
+
+async def sync_memory_indexes_job(context: ContextTypes.DEFAULT_TYPE):
+    """Background job to pull movies indexed by other processes into memory."""
+    try:
+        applied = await sync_memory_indexes()
+        if applied:
+            logger.info(f"🧠 In-memory indexes synced ({applied} movies)")
+    except Exception as e:
+        logger.error(f"Error in sync_memory_indexes_job: {e}")
+
+
+async def start_background_tasks(application: Application):
+    # Replays the deletions journal, so it must run inside the bot's event loop
+    await deletion_scheduler.start(application.bot)
+
+
+async def stop_background_tasks(application: Application):
+    await deletion_scheduler.stop()
+    # Hand leadership over now instead of after the lease runs out
+    await leader.release()
+
 
 def run_bot():
     logger.info("Starting Telegram Movie Bot...")
 
     ensure_indexes()
 
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
+    if IN_MEMORY_SEARCH:
+        load_search_index()
+
+    if SPELLCHECK_MAX_DISTANCE > 0:
+        load_spelling_index()
+
+    application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .post_init(start_background_tasks)
+        .post_shutdown(stop_background_tasks)
+        .build()
+    )
 
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("search", search_command))
     application.add_handler(CommandHandler("set_ad", set_ad_command))
+    application.add_handler(CommandHandler("search_stats", search_stats_command))
 
     application.add_handler(
         MessageHandler(
@@ -43,6 +90,9 @@ def run_bot():
     application.add_handler(
         CallbackQueryHandler(pagination_callback, pattern=r"^search\|")
     )
+    application.add_handler(
+        CallbackQueryHandler(suggestion_callback, pattern=r"^spell\|")
+    )
     application.add_handler(
         CommandHandler("set_ad", set_ad_command)
     )
@@ -51,8 +101,26 @@ def run_bot():
     application.add_error_handler(error_handler)
     application.add_handler(CallbackQueryHandler(pagination_callback))
 
-    # Start persistent auto-delete poller
-    application.job_queue.run_repeating(process_deletions_job, interval=15, first=5)
+    # Background jobs: leader-only jobs run on one replica of the fleet,
+    # the others on every replica
+    leader.register(application.job_queue)
+
+    leader.schedule(
+        application.job_queue,
+        reclaim_deletions_job,
+        interval=RECLAIM_INTERVAL,
+        first=RECLAIM_INTERVAL,
+        leader_only=True,
+    )
+
+    if IN_MEMORY_SEARCH or SPELLCHECK_MAX_DISTANCE > 0:
+        # Each replica keeps its own in-memory indexes
+        leader.schedule(
+            application.job_queue,
+            sync_memory_indexes_job,
+            interval=SEARCH_INDEX_SYNC_SECONDS,
+            first=SEARCH_INDEX_SYNC_SECONDS,
+        )
 
     logger.info("Bot started successfully. Waiting for updates...")
     application.run_polling()
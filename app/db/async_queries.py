@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from app.db import queries
+from app.utils.config import DB_EXECUTOR_WORKERS
+
+# pymongo is synchronous; handlers run these on a bounded thread pool so
+# the event loop never waits on MongoDB I/O. Each wrapper keeps the
+# signature of the function of the same name in app.db.queries.
+
+_executor = ThreadPoolExecutor(
+    max_workers=DB_EXECUTOR_WORKERS,
+    thread_name_prefix="mongo",
+)
+
+
+async def run_db(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def _in_executor(name: str):
+    @wraps(getattr(queries, name))
+    async def wrapper(*args, **kwargs):
+        # Resolved per call so the wrapped function can be swapped out
+        return await run_db(getattr(queries, name), *args, **kwargs)
+
+    return wrapper
+
+
+search_movies_page = _in_executor("search_movies_page")
+search_movies = _in_executor("search_movies")
+count_movies = _in_executor("count_movies")
+insert_movie = _in_executor("insert_movie")
+
+get_ad_text = _in_executor("get_ad_text")
+set_ad_text = _in_executor("set_ad_text")
+
+is_file_forwarded = _in_executor("is_file_forwarded")
+mark_file_as_forwarded = _in_executor("mark_file_as_forwarded")
+
+sync_memory_indexes = _in_executor("sync_memory_indexes")
+
+schedule_db_deletion = _in_executor("schedule_db_deletion")
+get_deletion_tasks = _in_executor("get_deletion_tasks")
+claim_deletion_tasks = _in_executor("claim_deletion_tasks")
+reclaim_deletion_tasks = _in_executor("reclaim_deletion_tasks")
+remove_deletion_tasks = _in_executor("remove_deletion_tasks")
+
+acquire_leadership = _in_executor("acquire_leadership")
+release_leadership = _in_executor("release_leadership")
@@ -7,6 +7,34 @@ logger = setup_logger()
 MOVIES_COLLECTION = "movies"
 CONFIG_COLLECTION = "config"
 DELETIONS_COLLECTION = "deletions"
+TOMBSTONES_COLLECTION = "movie_tombstones"
+
+# Tombstones only need to outlive the bot's memory sync interval
+TOMBSTONE_TTL_SECONDS = 7 * 24 * 3600
+
+# Deletion tasks are removed as they run; the TTL only clears tasks left
+# behind (e.g. a bot that stopped for good), this long after their delete_at
+DELETION_TASK_TTL_SECONDS = 24 * 3600
+
+
+def _remove_duplicate_deletions(deletions):
+    """Keep the latest task per (chat_id, bot_message_id) so the unique index can build."""
+    duplicates = deletions.aggregate([
+        {"$sort": {"delete_at": -1}},
+        {"$group": {
+            "_id": {"chat_id": "$chat_id", "bot_message_id": "$bot_message_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+
+    removed = 0
+    for group in duplicates:
+        removed += deletions.delete_many({"_id": {"$in": group["ids"][1:]}}).deleted_count
+
+    if removed:
+        logger.info(f"🧹 Removed {removed} duplicate deletion tasks")
 
 
 def ensure_indexes():
@@ -14,21 +42,109 @@ def ensure_indexes():
 
     movies = db[MOVIES_COLLECTION]
     deletions = db[DELETIONS_COLLECTION]
+    tombstones = db[TOMBSTONES_COLLECTION]
+
+    ensure_movie_indexes(movies)
+
+    tombstones.create_index(
+        [("deleted_at", ASCENDING)],
+        name="ttl_deleted_at",
+        expireAfterSeconds=TOMBSTONE_TTL_SECONDS
+    )
+
+    # One task per result message; rescheduling moves its delete_at
+    _remove_duplicate_deletions(deletions)
+    deletions.create_index(
+        [("chat_id", ASCENDING), ("bot_message_id", ASCENDING)],
+        unique=True,
+        name="unique_chat_message"
+    )
 
+    # Replay order, and a safety net for orphaned tasks
+    if "idx_delete_at" in deletions.index_information():
+        # Same key without the TTL; the two cannot coexist
+        deletions.drop_index("idx_delete_at")
+    deletions.create_index(
+        [("delete_at", ASCENDING)],
+        name="ttl_delete_at",
+        expireAfterSeconds=DELETION_TASK_TTL_SECONDS
+    )
+
+    logger.info("📚 MongoDB indexes ensured")
+
+
+def ensure_movie_indexes(movies):
+    """Indexes of a movies collection (also used for the benchmark's scratch copy)."""
     movies.create_index(
         [("file_unique_id", ASCENDING), ("channel_id", ASCENDING)],
         unique=True,
         name="unique_file_channel"
     )
 
+    # Lookups by message (deep links, live edits and deletions, the
+    # forwarder's retries). file_size comes last: the forwarder filters on
+    # it with a range, which is checked on the index keys without loading
+    # the skipped documents.
+    movies.create_index(
+        [("channel_id", ASCENDING), ("message_id", ASCENDING), ("file_size", ASCENDING)],
+        name="channel_message_size"
+    )
+    if "channel_message" in movies.index_information():
+        # Superseded by channel_message_size (same prefix)
+        movies.drop_index("channel_message")
+
+    # The forwarder's pending walk, in indexing order
+    movies.create_index(
+        [("channel_id", ASCENDING), ("_id", ASCENDING), ("file_size", ASCENDING)],
+        name="channel_indexed_size"
+    )
+
     movies.create_index(
         [("normalized_text", ASCENDING)],
         name="search_text"
     )
 
-    deletions.create_index(
-        [("delete_at", ASCENDING)],
-        name="idx_delete_at"
+    # Precomputed search keys (see queries.build_search_fields)
+    movies.create_index(
+        [("search_tokens", ASCENDING)],
+        name="search_tokens"
     )
 
-    logger.info("📚 MongoDB indexes ensured")
+    # Release fields parsed at ingest time (app.utils.release_parser),
+    # filtered with equality when a query names a year, episode, etc.
+    movies.create_index(
+        [("year", ASCENDING)],
+        name="release_year"
+    )
+
+    movies.create_index(
+        [("season", ASCENDING), ("episode", ASCENDING)],
+        name="release_episode"
+    )
+
+    movies.create_index(
+        [("resolution", ASCENDING)],
+        name="release_resolution"
+    )
+
+    movies.create_index(
+        [("codec", ASCENDING)],
+        name="release_codec"
+    )
+
+    movies.create_index(
+        [("languages", ASCENDING)],
+        name="release_languages"
+    )
+
+    # Lets the bot's in-memory search index pick up movies inserted elsewhere
+    movies.create_index(
+        [("created_at", ASCENDING)],
+        name="idx_created_at"
+    )
+
+    # ... and movies edited or deleted by the live watcher
+    movies.create_index(
+        [("updated_at", ASCENDING)],
+        name="idx_updated_at"
+    )
@@ -1,12 +1,33 @@
-from datetime import datetime
-from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from app.db.connection import get_db
-from app.db.models import MOVIES_COLLECTION, CONFIG_COLLECTION, DELETIONS_COLLECTION
+from app.db.models import (
+    MOVIES_COLLECTION,
+    CONFIG_COLLECTION,
+    DELETIONS_COLLECTION,
+    TOMBSTONES_COLLECTION,
+)
+from app.db.search_cache import SearchCache
+from app.db.spelling import SpellingIndex, get_spelling_index, set_spelling_index
+from app.indexer.dedupe import cluster_id
+from app.db.search_index import (
+    SearchIndex,
+    INDEX_FIELDS,
+    get_search_index,
+    set_search_index,
+    tokenize,
+)
+from app.utils.config import (
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL_SECONDS,
+    SPELLCHECK_MAX_DISTANCE,
+)
 from app.utils.logger import setup_logger
+from app.utils.release_parser import RELEASE_FIELDS, parse_query_qualifiers
 
 import re
-from pymongo import ASCENDING
+from pymongo import ASCENDING, ReturnDocument
 
 logger = setup_logger()
 
@@ -15,6 +36,8 @@ logger = setup_logger()
 
 FORWARDED_COLLECTION = "forwarded_files"
 
+DUPLICATE_KEY_ERROR = 11000
+
 def get_movie_metadata(channel_id: int, message_id: int) -> dict | None:
     db = get_db()
     return db[MOVIES_COLLECTION].find_one(
@@ -45,118 +68,310 @@ def normalize_query(text: str) -> str:
     return text.strip()
 
 
-def search_movies(
-    query: str,
-    limit: int,
-    offset: int,
-):
-    db = get_db()
-    normalized_query = normalize_query(query)
-    
-    # Escape for regex safely
+def build_search_fields(normalized_text: str) -> dict:
+    """
+    Precomputed keys stored on each movie so the exact, prefix and
+    word-boundary tiers are field lookups instead of per-document regex work.
+    """
+    tokens = tokenize(normalized_text)
+    first_token = tokens[0] if tokens and normalized_text.startswith(tokens[0]) else ""
+
+    return {
+        "search_tokens": list(dict.fromkeys(tokens)),
+        "first_token": first_token,
+        "text_len": len(normalized_text),
+    }
+
+
+def _query_terms(normalized_query: str) -> list[str] | None:
+    """Query tokens if the query is plain words, otherwise None (regex-only)."""
+    terms = tokenize(normalized_query)
+    if not terms or " ".join(terms) != normalized_query:
+        return None
+    return terms
+
+
+def _score_stage(normalized_query: str) -> dict:
     escaped_query = re.escape(normalized_query)
-    
-    # Strict 4-Level Relevance Scoring
-    # Priority 4: Exact Match (Score 40)
-    # Priority 3: Prefix Match (Score 30) - Starts with query + word boundary
-    # Priority 2: Word Match (Score 20) - Contains query as full word
-    # Priority 1: Partial Match (Score 10) - Verification fallback
-    
-    pipeline = [
-        # 1. Filter candidates first (Optimization)
-        {
-            "$match": {
-                "normalized_text": {
-                    "$regex": escaped_query,
-                    "$options": "i",
+    terms = _query_terms(normalized_query)
+
+    prefix_case = {
+        "$regexMatch": {
+            "input": "$normalized_text",
+            "regex": f"^{escaped_query}\\b",
+            "options": "i"
+        }
+    }
+    word_case = {
+        "$regexMatch": {
+            "input": "$normalized_text",
+            "regex": f"\\b{escaped_query}\\b",
+            "options": "i"
+        }
+    }
+
+    # Plain-word queries use the precomputed keys; documents not yet
+    # backfilled (no search_tokens array) fall back to the regex checks.
+    if terms:
+        if len(terms) == 1:
+            prefix_check = {"$eq": ["$first_token", terms[0]]}
+            word_check = {"$in": [terms[0], "$search_tokens"]}
+        else:
+            prefix_check = {"$and": [{"$eq": ["$first_token", terms[0]]}, prefix_case]}
+            word_check = {"$and": [{"$setIsSubset": [terms, "$search_tokens"]}, word_case]}
+
+        has_keys = {"$isArray": "$search_tokens"}
+        prefix_case = {"$cond": [has_keys, prefix_check, prefix_case]}
+        word_case = {"$cond": [has_keys, word_check, word_case]}
+
+    return {
+        "$addFields": {
+            "score": {
+                "$switch": {
+                    "branches": [
+                        # P4: EXACT MATCH
+                        {
+                            "case": {"$eq": ["$normalized_text", normalized_query]},
+                            "then": 40
+                        },
+                        # P3: PREFIX MATCH (Start + Word Boundary check)
+                        # Regex: ^query\b
+                        {
+                            "case": prefix_case,
+                            "then": 30
+                        },
+                        # P2: WORD BOUNDARY MATCH
+                        # Regex: \bquery\b
+                        {
+                            "case": word_case,
+                            "then": 20
+                        }
+                    ],
+                    # P1: PARTIAL MATCH (Default)
+                    "default": 10
                 }
-            }
-        },
+            },
+            # Shorter matches are "closer" to the query; stored at ingest time
+            "text_len": {"$ifNull": ["$text_len", {"$strLenCP": "$normalized_text"}]}
+        }
+    }
+
+
+# Upper bound on the ranked candidate list returned with every search
+SEARCH_RESULT_CAP = 200
+
+_search_cache = SearchCache(
+    max_entries=SEARCH_CACHE_SIZE,
+    ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+)
+
+RESULT_FIELDS = ("message_id", "channel_id", "file_name", "file_size")
+
+SORT_ORDER = {
+    "score": -1,        # Higher score first
+    "text_len": 1,      # Shorter text first (closer to exact match)
+    "file_name": 1      # Alphabetical tie-breaker
+}
+
+# Copies of a release (app.indexer.dedupe) count and show once; movies
+# without a cluster_id are their own cluster
+CLUSTER_KEY = {"$ifNull": ["$cluster_id", "$_id"]}
+
+
+def _search_pipeline(match: dict, normalized_query: str, ranked_limit: int) -> list[dict]:
+    return [
+        # 1. Filter candidates first (Optimization)
+        {"$match": match},
         # 2. Assign Scores
-        {
-            "$addFields": {
-                "score": {
-                    "$switch": {
-                        "branches": [
-                            # P4: EXACT MATCH
-                            {
-                                "case": {"$eq": ["$normalized_text", normalized_query]},
-                                "then": 40
-                            },
-                            # P3: PREFIX MATCH (Start + Word Boundary check)
-                            # Regex: ^query\b
-                            {
-                                "case": {
-                                    "$regexMatch": {
-                                        "input": "$normalized_text",
-                                        "regex": f"^{escaped_query}\\b",
-                                        "options": "i"
-                                    }
-                                },
-                                "then": 30
-                            },
-                            # P2: WORD BOUNDARY MATCH
-                            # Regex: \bquery\b
-                            {
-                                "case": {
-                                    "$regexMatch": {
-                                        "input": "$normalized_text",
-                                        "regex": f"\\b{escaped_query}\\b",
-                                        "options": "i"
-                                    }
-                                },
-                                "then": 20
-                            }
-                        ],
-                        # P1: PARTIAL MATCH (Default)
-                        "default": 10
-                    }
-                },
-                # Calculate length for tie-breaking: shorter matches are "closer" to the query
-                "text_len": {"$strLenCP": "$normalized_text"}
-            }
-        },
+        _score_stage(normalized_query),
         # 3. Sort deterministically
+        {"$sort": SORT_ORDER},
+        # 4. Best ranked copy of each duplicate cluster
         {
-            "$sort": {
-                "score": -1,        # Higher score first
-                "text_len": 1,      # Shorter text first (closer to exact match)
-                "file_name": 1      # Alphabetical tie-breaker
+            "$group": {
+                "_id": CLUSTER_KEY,
+                **{
+                    field: {"$first": f"${field}"}
+                    for field in (*SORT_ORDER, *RESULT_FIELDS)
+                },
             }
         },
-        {"$skip": offset},
-        {"$limit": limit},
+        {"$sort": SORT_ORDER},
+        # 5. Ranked candidates and total from the same pass
         {
-            "$project": {
-                "_id": 0,
-                "message_id": 1,
-                "channel_id": 1,
-                "file_name": 1,
-                "file_size": 1,
+            "$facet": {
+                "ranked": [
+                    {"$limit": ranked_limit},
+                    {"$project": {"_id": 0, **{field: 1 for field in RESULT_FIELDS}}},
+                ],
+                "total": [{"$count": "count"}],
             }
         },
     ]
 
-    cursor = db[MOVIES_COLLECTION].aggregate(pipeline)
 
-    return list(cursor)
+def _run_search_pipeline(match: dict, normalized_query: str, ranked_limit: int) -> tuple[list[dict], int]:
+    db = get_db()
+    facets = next(
+        db[MOVIES_COLLECTION].aggregate(
+            _search_pipeline(match, normalized_query, ranked_limit),
+            allowDiskUse=True,
+        )
+    )
+    total = facets["total"][0]["count"] if facets["total"] else 0
+    return facets["ranked"], total
 
 
-def count_movies(query: str) -> int:
+def _rank_matches(normalized_query: str, filters: dict, ranked_limit: int) -> dict:
+    index = get_search_index()
+    if index is not None:
+        ranked, total = index.search_page(normalized_query, ranked_limit, filters=filters)
+        return {"ranked": ranked, "total": total, "capped": False}
+
+    # Escape for regex safely
+    escaped_query = re.escape(normalized_query)
+    
+    # Strict 4-Level Relevance Scoring
+    # Priority 4: Exact Match (Score 40)
+    # Priority 3: Prefix Match (Score 30) - Starts with query + word boundary
+    # Priority 2: Word Match (Score 20) - Contains query as full word
+    # Priority 1: Partial Match (Score 10) - Verification fallback
+
+    terms = _query_terms(normalized_query)
+    if terms:
+        # Every doc scoring 20+ contains all query tokens, so those tiers
+        # are served by the multikey search_tokens index. Partial matches
+        # always rank below them; skip the regex scan when they could not
+        # make it into the ranked list anyway.
+        match = {"search_tokens": {"$all": terms}, **filters}
+        if len(terms) > 1:
+            match["normalized_text"] = {"$regex": f"\\b{escaped_query}\\b", "$options": "i"}
+
+        ranked, total = _run_search_pipeline(match, normalized_query, ranked_limit)
+        if total >= ranked_limit:
+            return {"ranked": ranked, "total": total, "capped": True}
+
+    match = {
+        "normalized_text": {
+            "$regex": escaped_query,
+            "$options": "i",
+        },
+        **filters,
+    }
+    ranked, total = _run_search_pipeline(match, normalized_query, ranked_limit)
+    return {"ranked": ranked, "total": total, "capped": False}
+
+
+def _rank_movies(normalized_query: str, ranked_limit: int) -> dict:
+    # "KGF 2022" / "Money Heist S1E1" / "KGF Tamil": match the title part as
+    # text and the qualifiers as indexed equality filters on release fields
+    title, filters = parse_query_qualifiers(normalized_query)
+    if filters:
+        search = _rank_matches(title, filters, ranked_limit)
+        if search["total"]:
+            return search
+
+    # Nothing parsed (or nothing matched the parsed fields): plain phrase search
+    return _rank_matches(normalized_query, {}, ranked_limit)
+
+
+def _covers_page(search: dict, offset: int, limit: int) -> bool:
+    ranked = search["ranked"]
+    if offset + limit <= len(ranked):
+        return True
+    # Uncapped and every match already ranked: deeper pages are just short
+    return not search["capped"] and len(ranked) >= search["total"]
+
+
+def search_movies_page(
+    query: str,
+    limit: int,
+    offset: int,
+) -> dict:
+    """
+    Run a search once and return everything the handlers need:
+      results - the requested page
+      total   - number of matches (a lower bound when capped is True)
+      capped  - True when total only counts the 20+ score tiers
+      ranked  - ranked candidates, at least SEARCH_RESULT_CAP long if available
+
+    Results are served from the shared search cache when possible.
+    """
+    normalized_query = normalize_query(query)
+
+    search = _search_cache.get(normalized_query)
+    if search is None or not _covers_page(search, offset, limit):
+        search = _rank_movies(normalized_query, max(SEARCH_RESULT_CAP, offset + limit))
+        title, filters = parse_query_qualifiers(normalized_query)
+        _search_cache.put(normalized_query, search, title, filters)
+
+    return {**search, "results": search["ranked"][offset:offset + limit]}
+
+
+def search_movies(
+    query: str,
+    limit: int,
+    offset: int,
+):
+    return search_movies_page(query, limit=limit, offset=offset)["results"]
+
+
+def _count_matches(normalized_query: str, filters: dict) -> int:
+    index = get_search_index()
+    if index is not None:
+        return index.count(normalized_query, filters=filters)
+
     db = get_db()
+
+    counted = list(db[MOVIES_COLLECTION].aggregate(
+        [
+            {
+                "$match": {
+                    "normalized_text": {
+                        "$regex": re.escape(normalized_query),
+                        "$options": "i",
+                    },
+                    **filters,
+                }
+            },
+            {"$group": {"_id": CLUSTER_KEY}},
+            {"$count": "count"},
+        ],
+        allowDiskUse=True,
+    ))
+    return counted[0]["count"] if counted else 0
+
+
+def count_movies(query: str) -> int:
+    """Number of movies search_movies can return for this query."""
     normalized = normalize_query(query)
 
-    terms = [re.escape(term) for term in normalized.split()]
-    pattern = r".*".join(terms)
+    title, filters = parse_query_qualifiers(normalized)
+    if filters:
+        total = _count_matches(title, filters)
+        if total:
+            return total
+
+    return _count_matches(normalized, {})
+
+
+def _prepare_movie(metadata: dict) -> dict:
+    metadata["created_at"] = metadata["updated_at"] = datetime.utcnow()
+    metadata.update(build_search_fields(metadata.get("normalized_text", "")))
+    metadata["cluster_id"] = cluster_id(metadata)
+    return metadata
+
+
+def _movie_inserted(metadata: dict):
+    """Keep the in-process indexes and cache in step with a new movie."""
+    index = get_search_index()
+    if index is not None:
+        index.add(metadata)
+    spelling_index = get_spelling_index()
+    if spelling_index is not None:
+        spelling_index.add_text(metadata.get("normalized_text", ""))
+    _search_cache.invalidate_matching(metadata.get("normalized_text", ""), metadata)
 
-    return db[MOVIES_COLLECTION].count_documents(
-        {
-            "normalized_text": {
-                "$regex": pattern,
-                "$options": "i",
-            }
-        }
-    )
 
 def insert_movie(metadata: dict) -> bool:
     """
@@ -165,12 +380,253 @@ def insert_movie(metadata: dict) -> bool:
     """
     db = get_db()
     try:
-        metadata["created_at"] = datetime.utcnow()
-        db[MOVIES_COLLECTION].insert_one(metadata)
-        return True
+        db[MOVIES_COLLECTION].insert_one(_prepare_movie(metadata))
     except DuplicateKeyError:
         return False
 
+    _movie_inserted(metadata)
+    return True
+
+
+def insert_movies(documents: list[dict]) -> tuple[int, int]:
+    """
+    Insert movie documents in one unordered bulk write.
+    Duplicates (unique_file_channel) are skipped per document.
+    Returns (inserted, duplicates); any other write error is raised.
+    """
+    if not documents:
+        return 0, 0
+
+    db = get_db()
+    for metadata in documents:
+        _prepare_movie(metadata)
+
+    failed = set()
+    try:
+        db[MOVIES_COLLECTION].insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        unexpected = [error for error in errors if error.get("code") != DUPLICATE_KEY_ERROR]
+        if unexpected or e.details.get("writeConcernErrors"):
+            raise
+        failed = {error["index"] for error in errors}
+
+    for position, metadata in enumerate(documents):
+        if position not in failed:
+            _movie_inserted(metadata)
+
+    return len(documents) - len(failed), len(failed)
+
+
+def update_movie(channel_id: int, message_id: int, metadata: dict) -> bool:
+    """
+    Apply an edited message to its movie document: file name, caption,
+    normalized text, search fields and release fields. Release fields the
+    new name no longer has are removed.
+    Returns False when the message is not indexed.
+    """
+    db = get_db()
+    now = datetime.utcnow()
+
+    fields = {
+        key: value for key, value in metadata.items()
+        if key not in ("channel_id", "message_id", "file_unique_id", "created_at")
+    }
+    fields.update(build_search_fields(fields.get("normalized_text", "")))
+    fields["cluster_id"] = cluster_id(fields)
+    fields["updated_at"] = now
+
+    update = {"$set": fields}
+    stale = [field for field in RELEASE_FIELDS if field not in fields]
+    if stale:
+        update["$unset"] = {field: "" for field in stale}
+
+    previous = db[MOVIES_COLLECTION].find_one_and_update(
+        {"channel_id": channel_id, "message_id": message_id},
+        update,
+        projection={"_id": 0, "normalized_text": 1, **{field: 1 for field in RELEASE_FIELDS}},
+    )
+    if previous is None:
+        return False
+
+    index = get_search_index()
+    if index is not None:
+        index.add({**fields, "channel_id": channel_id, "message_id": message_id})
+    spelling_index = get_spelling_index()
+    if spelling_index is not None:
+        spelling_index.add_text(fields.get("normalized_text", ""))
+    _search_cache.invalidate_matching(previous.get("normalized_text") or "", previous)
+    _search_cache.invalidate_matching(fields.get("normalized_text", ""), fields)
+    return True
+
+
+def delete_movies(channel_id: int, message_ids: list[int]) -> int:
+    """
+    Remove the movies for deleted channel messages. A tombstone is left for
+    each so other processes can drop them from their in-memory indexes.
+    Returns the number of movies removed.
+    """
+    if not message_ids:
+        return 0
+
+    db = get_db()
+    now = datetime.utcnow()
+    selector = {"channel_id": channel_id, "message_id": {"$in": list(message_ids)}}
+
+    removed = list(db[MOVIES_COLLECTION].find(
+        selector, {"_id": 0, "message_id": 1, "normalized_text": 1}
+    ))
+    if not removed:
+        return 0
+
+    db[MOVIES_COLLECTION].delete_many(selector)
+    db[TOMBSTONES_COLLECTION].insert_many([
+        {
+            "channel_id": channel_id,
+            "message_id": doc["message_id"],
+            "normalized_text": doc.get("normalized_text") or "",
+            "deleted_at": now,
+        }
+        for doc in removed
+    ])
+
+    for doc in removed:
+        _movie_removed(channel_id, doc["message_id"], doc.get("normalized_text") or "")
+
+    return len(removed)
+
+
+def _movie_removed(channel_id: int, message_id: int, normalized_text: str):
+    index = get_search_index()
+    if index is not None:
+        index.remove(channel_id, message_id)
+    # The spelling dictionary keeps the word; counts only break ties
+    _search_cache.invalidate_matching(normalized_text)
+
+
+def get_search_cache_stats() -> dict:
+    return _search_cache.stats()
+
+
+# ---------- IN-MEMORY INDEXES ----------
+
+# Overlap when polling for documents written by other processes (e.g. the indexer)
+MEMORY_SYNC_OVERLAP = timedelta(seconds=30)
+
+_memory_synced_at: datetime | None = None
+
+
+def _mark_loaded(started_at: datetime):
+    global _memory_synced_at
+    if _memory_synced_at is None or started_at < _memory_synced_at:
+        _memory_synced_at = started_at
+
+
+def load_search_index() -> int:
+    """
+    Build the in-memory search index from the movies collection.
+    Returns the number of indexed documents.
+    """
+    db = get_db()
+    started_at = datetime.utcnow()
+    projection = {"_id": 0, **{field: 1 for field in INDEX_FIELDS}}
+
+    index = SearchIndex()
+    for doc in db[MOVIES_COLLECTION].find({}, projection):
+        index.add(doc)
+
+    set_search_index(index)
+    _mark_loaded(started_at)
+
+    logger.info(f"🧠 In-memory search index loaded ({len(index)} movies)")
+    return len(index)
+
+
+def load_spelling_index() -> int:
+    """
+    Build the "did you mean" dictionary from the catalog's token vocabulary.
+    Returns the number of distinct words.
+    """
+    db = get_db()
+    started_at = datetime.utcnow()
+
+    index = SpellingIndex(max_distance=SPELLCHECK_MAX_DISTANCE)
+    cursor = db[MOVIES_COLLECTION].aggregate(
+        [
+            {"$unwind": "$search_tokens"},
+            {"$group": {"_id": "$search_tokens", "count": {"$sum": 1}}},
+        ],
+        allowDiskUse=True,
+    )
+    for doc in cursor:
+        index.add(doc["_id"], doc["count"])
+
+    set_spelling_index(index)
+    _mark_loaded(started_at)
+
+    logger.info(f"🔤 Spelling dictionary loaded ({len(index)} words)")
+    return len(index)
+
+
+def sync_memory_indexes() -> int:
+    """
+    Pull movies inserted, edited or deleted by other processes since the
+    last sync into the in-memory search index and spelling dictionary.
+    Returns the number of documents (re)applied.
+    """
+    global _memory_synced_at
+
+    search_index = get_search_index()
+    spelling_index = get_spelling_index()
+    if _memory_synced_at is None or (search_index is None and spelling_index is None):
+        return 0
+
+    db = get_db()
+    started_at = datetime.utcnow()
+    projection = {"_id": 0, **{field: 1 for field in INDEX_FIELDS}}
+
+    since = _memory_synced_at - MEMORY_SYNC_OVERLAP
+
+    applied = 0
+    # Tombstones first: a movie deleted and indexed again within the window
+    # has both, and the movies collection holds what is current
+    for tombstone in db[TOMBSTONES_COLLECTION].find({"deleted_at": {"$gte": since}}):
+        _movie_removed(
+            tombstone["channel_id"],
+            tombstone["message_id"],
+            tombstone.get("normalized_text") or "",
+        )
+        applied += 1
+
+    cursor = db[MOVIES_COLLECTION].find(
+        # Movies indexed before updated_at existed only have created_at
+        {"$or": [{"created_at": {"$gte": since}}, {"updated_at": {"$gte": since}}]},
+        projection,
+    )
+    for doc in cursor:
+        normalized_text = doc.get("normalized_text") or ""
+        if search_index is not None:
+            previous = search_index.get(doc["channel_id"], doc["message_id"])
+            if previous:
+                # Its release fields may have changed even if the text did not
+                _search_cache.invalidate_matching(previous["normalized_text"], previous)
+            search_index.add(doc)
+        if spelling_index is not None:
+            # Word counts only break ties, so overlap re-counts are harmless
+            spelling_index.add_text(normalized_text)
+        _search_cache.invalidate_matching(normalized_text, doc)
+        applied += 1
+
+    _memory_synced_at = started_at
+    return applied
+
+
+def suggest_queries(query: str, limit: int = 3) -> list[str]:
+    """Spelling corrections for a query that found nothing (in-memory only)."""
+    index = get_spelling_index()
+    if index is None:
+        return []
+    return index.suggest(normalize_query(query), limit=limit)
 
 
 # ---------- CONFIG ----------
@@ -202,7 +658,33 @@ def get_last_indexed_message(channel_id: int) -> int | None:
     doc = db[CONFIG_COLLECTION].find_one(
         {"_id": f"index_progress_{channel_id}"}
     )
-    return doc["last_message_id"] if doc else None
+    return doc.get("last_message_id") if doc else None
+
+
+def get_index_progress(channel_id: int) -> dict | None:
+    db = get_db()
+    return db[CONFIG_COLLECTION].find_one(
+        {"_id": f"index_progress_{channel_id}"}
+    )
+
+
+def record_index_rate(channel_id: int, stats: dict, field: str = "rate"):
+    """
+    Store the indexer's achieved throughput and learned rate limit. Takeout
+    exports have their own limits and are stored under "takeout_rate".
+    """
+    db = get_db()
+    db[CONFIG_COLLECTION].update_one(
+        {"_id": f"index_progress_{channel_id}"},
+        {
+            "$set": {
+                "channel_id": channel_id,
+                field: stats,
+                f"{field}_updated_at": datetime.utcnow(),
+            }
+        },
+        upsert=True,
+    )
 
 
 def update_last_indexed_message(channel_id: int, message_id: int):
@@ -221,27 +703,256 @@ def update_last_indexed_message(channel_id: int, message_id: int):
     )
 
 
-# ---------- AUTO DELETE ----------
+# ---------- BACKFILL RANGES ----------
+
+def _backfill_range_id(channel_id: int, index: int) -> str:
+    return f"backfill_{channel_id}_{index}"
+
 
-def schedule_db_deletion(chat_id: int, bot_message_id: int, user_message_id: int | None, delete_at: datetime):
+def get_backfill_ranges(channel_id: int) -> list[dict]:
     db = get_db()
-    db[DELETIONS_COLLECTION].insert_one({
-        "chat_id": chat_id,
-        "bot_message_id": bot_message_id,
-        "user_message_id": user_message_id,
-        "delete_at": delete_at,
-        "created_at": datetime.utcnow()
-    })
+    return list(
+        db[CONFIG_COLLECTION]
+        .find({"type": "backfill_range", "channel_id": channel_id})
+        .sort("index", 1)
+    )
+
+
+def create_backfill_ranges(channel_id: int, ranges: list[tuple[int, int]]):
+    """
+    Store a backfill plan: one document per (start, end] message id range,
+    each with its own checkpoint.
+    """
+    db = get_db()
+    now = datetime.utcnow()
+    db[CONFIG_COLLECTION].insert_many([
+        {
+            "_id": _backfill_range_id(channel_id, index),
+            "type": "backfill_range",
+            "channel_id": channel_id,
+            "index": index,
+            "start": start,
+            "end": end,
+            "checkpoint": start,
+            "scanned": 0,
+            "inserted": 0,
+            "done": False,
+            "updated_at": now,
+        }
+        for index, (start, end) in enumerate(ranges)
+    ])
 
 
-def get_due_deletions() -> list[dict]:
+def update_backfill_range(channel_id: int, index: int, **fields):
     db = get_db()
-    cursor = db[DELETIONS_COLLECTION].find(
-        {"delete_at": {"$lte": datetime.utcnow()}}
+    db[CONFIG_COLLECTION].update_one(
+        {"_id": _backfill_range_id(channel_id, index)},
+        {"$set": {**fields, "updated_at": datetime.utcnow()}},
     )
+
+
+def clear_backfill_ranges(channel_id: int) -> int:
+    db = get_db()
+    result = db[CONFIG_COLLECTION].delete_many(
+        {"type": "backfill_range", "channel_id": channel_id}
+    )
+    return result.deleted_count
+
+
+# ---------- AUTO DELETE ----------
+
+def schedule_db_deletion(chat_id: int, bot_message_id: int, user_message_id: int | None, delete_at: datetime) -> dict:
+    """
+    Journal a deletion task, or move the delete_at of the message's
+    existing task, and return it with its _id.
+    """
+    db = get_db()
+    deletions = db[DELETIONS_COLLECTION]
+    now = datetime.utcnow()
+    key = {"chat_id": chat_id, "bot_message_id": bot_message_id}
+
+    fields = {"delete_at": delete_at, "updated_at": now}
+    # A reschedule (e.g. a page click) does not know the user's message;
+    # keep the one recorded by the original search
+    if user_message_id is not None:
+        fields["user_message_id"] = user_message_id
+
+    # A moved task is free to be claimed again at its new time, unless a
+    # replica holds a live lease on it and may be deleting it right now
+    task = deletions.find_one_and_update(
+        {**key, "$or": [{"lease_expires": None}, {"lease_expires": {"$lt": now}}]},
+        {"$set": {**fields, "owner": None, "lease_expires": None}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if task is not None:
+        return task
+
+    on_insert = {"created_at": now, "owner": None, "lease_expires": None}
+    if user_message_id is None:
+        on_insert["user_message_id"] = None
+    return deletions.find_one_and_update(
+        key,
+        {"$set": fields, "$setOnInsert": on_insert},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def get_deletion_tasks() -> list[dict]:
+    """Every journaled task, replayed into the scheduler on startup."""
+    db = get_db()
+    cursor = db[DELETIONS_COLLECTION].find().sort("delete_at", 1)
     return list(cursor)
 
 
-def remove_deletion_task(task_id):
+def claim_deletion_task(task_id, owner: str, due_before: datetime, lease_seconds: float) -> dict | None:
+    """
+    Take the lease on one due task, unless another replica holds a live
+    lease on it or it has been moved past due_before. Returns the claimed
+    task, or None.
+    """
+    db = get_db()
+    now = datetime.utcnow()
+    return db[DELETIONS_COLLECTION].find_one_and_update(
+        {
+            "_id": task_id,
+            "delete_at": {"$lte": due_before},
+            "$or": [
+                {"owner": None},
+                {"owner": owner},
+                {"lease_expires": {"$lt": now}},
+            ],
+        },
+        {"$set": {"owner": owner, "lease_expires": now + timedelta(seconds=lease_seconds)}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def claim_deletion_tasks(task_ids: list, owner: str, due_before: datetime, lease_seconds: float) -> list[dict]:
+    claimed = (claim_deletion_task(task_id, owner, due_before, lease_seconds) for task_id in task_ids)
+    return [task for task in claimed if task is not None]
+
+
+def reclaim_deletion_tasks(owner: str, overdue_before: datetime, lease_seconds: float, fencing_token: int) -> list[dict]:
+    """
+    Claim the tasks past overdue_before that nobody holds: left unclaimed
+    by a replica that stopped, or claimed by one whose lease ran out.
+
+    Only the leader reclaims, and each claim is fenced with its leadership
+    token: a task already reclaimed under a newer token is refused to a
+    replica that lost the leadership without noticing yet.
+    """
+    db = get_db()
+    deletions = db[DELETIONS_COLLECTION]
+    now = datetime.utcnow()
+
+    unclaimed = {
+        "delete_at": {"$lte": overdue_before},
+        "$or": [
+            {"owner": None},
+            {"lease_expires": {"$lt": now}},
+        ],
+    }
+    candidates = [doc["_id"] for doc in deletions.find(unclaimed, {"_id": 1}).sort("delete_at", 1)]
+
+    claimed = []
+    for task_id in candidates:
+        task = deletions.find_one_and_update(
+            {
+                "_id": task_id,
+                **unclaimed,
+                "$and": [{"$or": [{"fencing_token": None}, {"fencing_token": {"$lte": fencing_token}}]}],
+            },
+            {"$set": {
+                "owner": owner,
+                "lease_expires": now + timedelta(seconds=lease_seconds),
+                "fencing_token": fencing_token,
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+        if task is not None:
+            claimed.append(task)
+    return claimed
+
+
+def remove_deletion_tasks(task_ids: list, owner: str | None = None) -> int:
+    """Acknowledge processed tasks; with an owner, only those it still holds."""
+    if not task_ids:
+        return 0
     db = get_db()
-    db[DELETIONS_COLLECTION].delete_one({"_id": task_id})
+    query = {"_id": {"$in": list(task_ids)}}
+    if owner is not None:
+        query["owner"] = owner
+    result = db[DELETIONS_COLLECTION].delete_many(query)
+    return result.deleted_count
+
+
+# ---------- LEADER ELECTION ----------
+
+def _leader_lease_id(name: str) -> str:
+    return f"leader_{name}"
+
+
+def acquire_leadership(name: str, owner: str, lease_seconds: float, token: int | None = None) -> int | None:
+    """
+    Renew or take the leader lease `name` for `owner`. Returns the fencing
+    token while owner holds the lease, or None when another replica does.
+    The token goes up every time the lease is taken, so work started by a
+    leader that has since lost the lease can be told apart.
+    """
+    db = get_db()
+    leases = db[CONFIG_COLLECTION]
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+
+    if token is not None:
+        renewed = leases.find_one_and_update(
+            {
+                "_id": _leader_lease_id(name),
+                "owner": owner,
+                "token": token,
+                "expires_at": {"$gt": now},
+            },
+            {"$set": {"expires_at": expires_at}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if renewed:
+            return renewed["token"]
+
+    try:
+        taken = leases.find_one_and_update(
+            {
+                "_id": _leader_lease_id(name),
+                "$or": [
+                    {"owner": None},
+                    {"owner": owner},
+                    {"expires_at": {"$lte": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "type": "leader_lease",
+                    "owner": owner,
+                    "expires_at": expires_at,
+                    "acquired_at": now,
+                },
+                "$inc": {"token": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # The lease exists and is held by someone else
+        return None
+
+    return taken["token"]
+
+
+def release_leadership(name: str, owner: str, token: int) -> bool:
+    """Give the lease up (on shutdown) so another replica takes over at once."""
+    db = get_db()
+    result = db[CONFIG_COLLECTION].update_one(
+        {"_id": _leader_lease_id(name), "owner": owner, "token": token},
+        {"$set": {"owner": None, "expires_at": datetime.utcnow()}},
+    )
+    return result.modified_count > 0
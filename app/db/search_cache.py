@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class SearchCache:
+    """
+    Bounded LRU cache with a TTL for search results, keyed by the
+    normalize_query output. Values are the dicts built by search_movies_page.
+
+    Each entry also keeps the title and qualifier filters parsed from its
+    query (parse_query_qualifiers), so a new movie invalidates "kgf 2022"
+    when its text contains "kgf" and its release fields have year 2022.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict, str, dict]] = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            expires_at, value, _, _ = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: dict, title: str | None = None, filters: dict | None = None):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + self.ttl_seconds, value, title or key, filters or {},
+            )
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_matching(self, normalized_text: str, fields: dict | None = None) -> int:
+        """
+        Drop every cached query a movie with this text and these release
+        fields would match. Without fields (e.g. a removed movie whose
+        fields are not known) any title match counts.
+        """
+        with self._lock:
+            stale = [
+                key for key, (_, _, title, filters) in self._entries.items()
+                if key in normalized_text
+                or (title in normalized_text and _filters_match(filters, fields))
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def _filters_match(filters: dict, fields: dict | None) -> bool:
+    if fields is None:
+        return True
+    for key, wanted in filters.items():
+        value = fields.get(key)
+        # languages is a list; the filter matches any one of them
+        if value != wanted and not (isinstance(value, list) and wanted in value):
+            return False
+    return True
@@ -0,0 +1,281 @@
+import heapq
+import re
+from collections import defaultdict
+from threading import RLock
+
+# Mirrors the MongoDB search pipeline in app.db.queries so the bot process can
+# answer searches from memory. Documents are keyed by (channel_id, message_id)
+# and tokens are \w+ runs of normalized_text, which keeps candidate lookups
+# aligned with the regex word boundaries used for scoring. MongoDB's regex
+# engine treats \w as ASCII-only, so the same flag is used here.
+
+_TOKEN_RE = re.compile(r"\w+", re.ASCII)
+_FLAGS = re.IGNORECASE | re.ASCII
+
+# Vocabulary tokens are indexed by their substrings of up to this length,
+# so a query term is expanded without scanning the whole vocabulary
+GRAM_SIZE = 3
+
+# Fields kept per document; everything search results need to render.
+INDEX_FIELDS = (
+    "channel_id", "message_id", "file_name", "file_size", "normalized_text",
+    # Release fields (app.utils.release_parser) used as search filters
+    "year", "season", "episode", "resolution", "codec", "languages",
+    # Copies of the same release share it (app.indexer.dedupe)
+    "cluster_id",
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text or "")
+
+
+def score_match(normalized_text: str, normalized_query: str) -> int:
+    """Same 40/30/20/10 tiers as the $switch in search_movies."""
+    return scorer(normalized_query)(normalized_text)
+
+
+def scorer(normalized_query: str):
+    """score_match for one query, with its patterns compiled once."""
+    escaped = re.escape(normalized_query)
+    prefix = re.compile(rf"{escaped}\b", _FLAGS)
+    word = re.compile(rf"\b{escaped}\b", _FLAGS)
+
+    def score(normalized_text: str) -> int:
+        if normalized_text == normalized_query:
+            return 40
+        if prefix.match(normalized_text):
+            return 30
+        if word.search(normalized_text):
+            return 20
+        return 10
+
+    return score
+
+
+def grams(text: str) -> set[str]:
+    """Every substring of up to GRAM_SIZE characters."""
+    return {
+        text[start:start + size]
+        for size in range(1, GRAM_SIZE + 1)
+        for start in range(len(text) - size + 1)
+    }
+
+
+def matches_filters(doc: dict, filters: dict) -> bool:
+    """Equality on release fields; list fields (languages) match any element."""
+    for field, expected in filters.items():
+        value = doc.get(field)
+        if isinstance(value, list):
+            if expected not in value:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def cluster_key(doc: dict):
+    return doc.get("cluster_id") or (doc["channel_id"], doc["message_id"])
+
+
+def order_key(doc: dict):
+    # text length ASC, file_name ASC; ids keep the order total
+    return (
+        len(doc["normalized_text"]),
+        doc.get("file_name") or "",
+        doc["channel_id"],
+        doc["message_id"],
+    )
+
+
+def rank_key(doc: dict, score: int):
+    # score DESC, then the query independent order
+    return (-score, order_key(doc))
+
+
+class SearchIndex:
+    """Inverted index of normalized tokens -> posting lists of (channel_id, message_id)."""
+
+    def __init__(self):
+        self._docs: dict[tuple[int, int], dict] = {}
+        self._postings: dict[str, set[tuple[int, int]]] = defaultdict(set)
+        # order_key of every document, computed once instead of per search
+        self._order: dict[tuple[int, int], tuple] = {}
+        # substring of up to GRAM_SIZE characters -> vocabulary tokens containing it
+        self._grams: dict[str, set[str]] = defaultdict(set)
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc: dict):
+        key = (doc["channel_id"], doc["message_id"])
+        entry = {field: doc.get(field) for field in INDEX_FIELDS}
+        entry["normalized_text"] = entry["normalized_text"] or ""
+
+        with self._lock:
+            if key in self._docs:
+                self._unlink(key)
+
+            self._docs[key] = entry
+            self._order[key] = order_key(entry)
+            for token in set(tokenize(entry["normalized_text"])):
+                if token not in self._postings:
+                    for gram in grams(token):
+                        self._grams[gram].add(token)
+                self._postings[token].add(key)
+
+    def get(self, channel_id: int, message_id: int) -> dict | None:
+        return self._docs.get((channel_id, message_id))
+
+    def remove(self, channel_id: int, message_id: int):
+        with self._lock:
+            self._unlink((channel_id, message_id))
+
+    def _unlink(self, key):
+        entry = self._docs.pop(key, None)
+        if not entry:
+            return
+        del self._order[key]
+        for token in set(tokenize(entry["normalized_text"])):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+                for gram in grams(token):
+                    tokens = self._grams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._grams[gram]
+
+    def _expand(self, term: str) -> set[str]:
+        """Vocabulary tokens containing term."""
+        if len(term) <= GRAM_SIZE:
+            return self._grams.get(term, set())
+
+        # Tokens holding every gram of the term, then the exact substring check
+        sets = sorted(
+            (self._grams.get(term[start:start + GRAM_SIZE], set())
+             for start in range(len(term) - GRAM_SIZE + 1)),
+            key=len,
+        )
+        tokens = set(sets[0])
+        for other in sets[1:]:
+            if not tokens:
+                break
+            tokens &= other
+        return {token for token in tokens if term in token}
+
+    def _candidates(self, terms: list[str]) -> list[tuple[int, int]]:
+        """
+        Keys whose text contains every term as part of some token.
+        A superset of the regex matches; callers verify each candidate.
+        """
+        if not terms:
+            return list(self._docs)
+
+        postings = []
+        for term in set(terms):
+            keys = set()
+            for token in self._expand(term):
+                keys |= self._postings[token]
+            if not keys:
+                return []
+            postings.append(keys)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates &= keys
+        return list(candidates)
+
+    def _matching_keys(self, normalized_query: str, filters: dict | None = None) -> list[tuple[int, int]]:
+        return [
+            key
+            for key in self._candidates(tokenize(normalized_query))
+            if normalized_query in self._docs[key]["normalized_text"]
+            and (not filters or matches_filters(self._docs[key], filters))
+        ]
+
+    def _matches(self, normalized_query: str, filters: dict | None = None) -> list[dict]:
+        with self._lock:
+            return [self._docs[key] for key in self._matching_keys(normalized_query, filters)]
+
+    def _whole_word_keys(self, normalized_query: str) -> set[tuple[int, int]] | None:
+        """
+        Keys holding every query token as a whole token. A query that starts
+        and ends with a word character can only score 20 or more (\\b on
+        both ends) in those; None when that does not apply.
+        """
+        terms = tokenize(normalized_query)
+        if not terms or not normalized_query.startswith(terms[0]) or not normalized_query.endswith(terms[-1]):
+            return None
+
+        postings = sorted((self._postings.get(term, set()) for term in set(terms)), key=len)
+        keys = set(postings[0])
+        for other in postings[1:]:
+            keys &= other
+        return keys
+
+    def search_page(
+        self,
+        normalized_query: str,
+        ranked_limit: int,
+        filters: dict | None = None,
+    ) -> tuple[list[dict], int]:
+        """
+        Top ranked_limit results and the total number of matches, in one
+        pass. Duplicate copies of a release count once and are represented
+        by their best ranked copy.
+
+        Only matches that can reach the 20+ tiers are scored with the
+        regexes; the rest rank by their precomputed order_key, and only the
+        top ranked_limit are sorted.
+        """
+        score = scorer(normalized_query)
+
+        with self._lock:
+            whole_word = self._whole_word_keys(normalized_query)
+            best: dict = {}
+            for key in self._matching_keys(normalized_query, filters):
+                doc = self._docs[key]
+                if whole_word is None or key in whole_word:
+                    ranked = (-score(doc["normalized_text"]), self._order[key])
+                else:
+                    ranked = (-10, self._order[key])
+                cluster = doc["cluster_id"] or key
+                current = best.get(cluster)
+                if current is None or ranked < current[0]:
+                    best[cluster] = (ranked, doc)
+
+        top = heapq.nsmallest(ranked_limit, best.values(), key=lambda ranked_doc: ranked_doc[0])
+        return [
+            {
+                "message_id": doc["message_id"],
+                "channel_id": doc["channel_id"],
+                "file_name": doc["file_name"],
+                "file_size": doc["file_size"],
+            }
+            for _, doc in top
+        ], len(best)
+
+    def search(self, normalized_query: str, limit: int, offset: int) -> list[dict]:
+        ranked, _ = self.search_page(normalized_query, offset + limit)
+        return ranked[offset:]
+
+    def count(self, normalized_query: str, filters: dict | None = None) -> int:
+        return len({cluster_key(doc) for doc in self._matches(normalized_query, filters)})
+
+
+_index: SearchIndex | None = None
+
+
+def get_search_index() -> SearchIndex | None:
+    return _index
+
+
+def set_search_index(index: SearchIndex | None):
+    global _index
+    _index = index
@@ -0,0 +1,147 @@
+from threading import Lock
+
+from app.db.search_index import tokenize
+
+# SymSpell-style spelling correction over the catalog's token vocabulary.
+# Every token is stored under all of its deletions (up to max_distance
+# characters removed from its first prefix_length characters), so a lookup
+# only needs the deletions of the misspelled term plus a few exact
+# edit-distance checks instead of comparing against the whole vocabulary.
+
+MIN_TOKEN_LENGTH = 3
+
+
+def _deletes(word: str, max_distance: int) -> set[str]:
+    deletes = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            candidate[:i] + candidate[i + 1:]
+            for candidate in frontier
+            for i in range(len(candidate))
+        } - deletes
+        deletes |= frontier
+    return deletes
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or max_distance + 1 when further apart."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous2 is not None and i > 1 and j > 1
+                and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+
+    return min(previous[-1], max_distance + 1)
+
+
+class SpellingIndex:
+    """Precomputed deletion dictionary with incremental inserts."""
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._words: dict[str, int] = {}
+        self._deletes: dict[str, set[str]] = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word: str):
+        return word in self._words
+
+    def add(self, word: str, count: int = 1):
+        if len(word) < MIN_TOKEN_LENGTH or word.isdigit():
+            return
+
+        with self._lock:
+            if word in self._words:
+                self._words[word] += count
+                return
+
+            self._words[word] = count
+            prefix = word[:self.prefix_length]
+            for key in _deletes(prefix, self.max_distance) | {prefix}:
+                self._deletes.setdefault(key, set()).add(word)
+
+    def add_text(self, normalized_text: str):
+        for token in set(tokenize(normalized_text)):
+            self.add(token)
+
+    def lookup(self, term: str, limit: int = 3) -> list[str]:
+        """Closest vocabulary words, nearest first, then most frequent."""
+        if term in self._words:
+            return [term]
+
+        prefix = term[:self.prefix_length]
+        with self._lock:
+            candidates = set()
+            for key in _deletes(prefix, self.max_distance) | {prefix}:
+                candidates |= self._deletes.get(key, set())
+
+            scored = []
+            for word in candidates:
+                distance = edit_distance(term, word, self.max_distance)
+                if distance <= self.max_distance:
+                    scored.append((distance, -self._words[word], word))
+
+        scored.sort()
+        return [word for _, _, word in scored[:limit]]
+
+    def suggest(self, normalized_query: str, limit: int = 3) -> list[str]:
+        """
+        Corrected versions of the query, best first. Tokens that are already
+        in the vocabulary, too short or numeric are kept as typed.
+        """
+        terms = normalized_query.split()
+        corrections = []
+        for term in terms:
+            if term in self._words or len(term) < MIN_TOKEN_LENGTH or term.isdigit():
+                corrections.append([term])
+                continue
+            candidates = self.lookup(term, limit=limit)
+            if not candidates:
+                return []
+            corrections.append(candidates)
+
+        if all(len(options) == 1 and options[0] == term for options, term in zip(corrections, terms)):
+            return []
+
+        best = [options[0] for options in corrections]
+        suggestions = [" ".join(best)]
+
+        # Alternatives: swap in runner-up corrections one token at a time
+        for position, options in enumerate(corrections):
+            for option in options[1:]:
+                if len(suggestions) >= limit:
+                    return suggestions
+                alternative = best[:position] + [option] + best[position + 1:]
+                suggestions.append(" ".join(alternative))
+
+        return suggestions
+
+
+_index: SpellingIndex | None = None
+
+
+def get_spelling_index() -> SpellingIndex | None:
+    return _index
+
+
+def set_spelling_index(index: SpellingIndex | None):
+    global _index
+    _index = index
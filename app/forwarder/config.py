@@ -3,7 +3,8 @@ from app.utils.config import (
     TG_API_HASH,
     DB_URI,
     DB_CHANNEL_ID,
-    CLIENT_CHANNEL_ID
+    CLIENT_CHANNEL_ID,
+    FORWARD_BLACKLIST_CHANNEL_IDS,
 )
 
 # Source and Target Channels
@@ -14,4 +15,16 @@ TARGET_CHANNEL_ID = CLIENT_CHANNEL_ID
 
 # Configuration Constraints
 MAX_FILE_SIZE = 1.2 * 1024 * 1024 * 1024  # 1.2 GB in bytes
-THROTTLE_DELAY = 1.5  # Seconds to wait between forwards
+THROTTLE_DELAY = 1.5  # Seconds between Telegram requests (fetches and forwards)
+THROTTLE_BURST = 3  # Requests allowed back to back before THROTTLE_DELAY applies
+
+# Batching
+FETCH_BATCH_SIZE = 100  # Message ids per get_messages call (Telegram's maximum)
+FORWARD_GROUP_SIZE = 20  # Messages per forward_messages call (Telegram allows 100)
+
+# Prefilter (decided from the indexed movie metadata, before any Telegram call)
+BLACKLISTED_CHANNEL_IDS = FORWARD_BLACKLIST_CHANNEL_IDS
+ALLOWED_MIME_PREFIXES = ("video/", "application/x-matroska")
+# Files uploaded without a useful type are judged by their extension
+GENERIC_MIME_TYPES = ("", "application/octet-stream")
+VIDEO_EXTENSIONS = (".mkv", ".mp4", ".avi", ".m4v", ".mov", ".webm", ".ts", ".wmv", ".flv", ".mpg", ".mpeg")
@@ -1,7 +1,7 @@
 
 import asyncio
+import itertools
 import logging
-import time
 import sys
 from telethon import TelegramClient, errors
 from app.forwarder.config import (
@@ -10,8 +10,14 @@ from app.forwarder.config import (
     SOURCE_CHANNEL_ID,
     TARGET_CHANNEL_ID,
     THROTTLE_DELAY,
-    MAX_FILE_SIZE
+    THROTTLE_BURST,
+    MAX_FILE_SIZE,
+    FETCH_BATCH_SIZE,
+    FORWARD_GROUP_SIZE,
+    BLACKLISTED_CHANNEL_IDS,
 )
+from app.forwarder.prefilter import skip_reason
+from app.forwarder.rate_limit import TokenBucket
 from app.forwarder.state import ForwarderState
 
 # Configure Logging
@@ -34,6 +40,183 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Fetched batches waiting to be forwarded; keeps the producer a little ahead
+QUEUE_SIZE = 2
+
+
+async def call_telegram(bucket, request, *args, **kwargs):
+    """Run one Telegram request under the token bucket, waiting out FloodWaits."""
+    while True:
+        await bucket.acquire()
+        try:
+            return await request(*args, **kwargs)
+        except errors.FloodWaitError as e:
+            logger.warning(f"FloodWaitError triggered. Waiting for {e.seconds} seconds...")
+            # Add a safety buffer of 2 seconds
+            bucket.pause(e.seconds + 2)
+
+
+async def record(state, watermark, msg_ids, status):
+    """Store the outcome for msg_ids and move the pair's watermark, in one thread hop."""
+    watermark.complete(msg_ids, failed=status == "failed")
+
+    def write():
+        state.mark_many([
+            (msg_id, watermark.source_channel, watermark.target_channel, status)
+            for msg_id in msg_ids
+        ])
+        state.save_watermark(watermark)
+
+    await asyncio.to_thread(write)
+
+
+async def fetch_batch(client, state, bucket, queue, stats, watermark, movies):
+    """
+    Skip the movies whose indexed metadata rules them out, fetch the rest
+    with a single get_messages call and queue the ones that still have files.
+    """
+    src_peer = watermark.source_channel
+    watermark.issue(movies)
+
+    msg_ids = []
+    prefiltered = []
+    for movie in movies:
+        reason = skip_reason(movie, MAX_FILE_SIZE)
+        if reason:
+            logger.debug(f"Message {movie['message_id']} prefiltered ({reason}).")
+            prefiltered.append(movie["message_id"])
+        else:
+            msg_ids.append(movie["message_id"])
+
+    if prefiltered:
+        logger.info(f"Prefiltered {len(prefiltered)} messages from metadata. Marking as skipped.")
+        await record(state, watermark, prefiltered, "skipped")
+        stats["prefiltered"] += len(prefiltered)
+
+    if not msg_ids:
+        return
+
+    try:
+        messages = await call_telegram(bucket, client.get_messages, src_peer, ids=msg_ids)
+    except Exception as e:
+        logger.error(f"Error fetching messages {msg_ids[0]}-{msg_ids[-1]}: {e}")
+        await record(state, watermark, msg_ids, "failed")
+        stats["failed"] += len(msg_ids)
+        return
+
+    skipped = []
+    forwardable = []
+    for msg_id, message in zip(msg_ids, messages):
+        if not message:
+            logger.warning(f"Message {msg_id} not found or deleted using get_messages.")
+            skipped.append(msg_id)
+        elif not message.file:
+            logger.info(f"Message {msg_id} is text/service (no file). Marking as skipped.")
+            skipped.append(msg_id)
+        else:
+            forwardable.append(message)
+
+    if skipped:
+        await record(state, watermark, skipped, "skipped")
+        stats["skipped"] += len(skipped)
+
+    if forwardable:
+        await queue.put((watermark, forwardable))
+
+
+async def produce(client, state, bucket, queue, stats):
+    """
+    For every source channel, retry the ids that failed last time, then
+    walk the movies above the channel's watermark FETCH_BATCH_SIZE at a time.
+    Blacklisted and inaccessible channels are left alone, watermark included.
+    """
+    for src_peer in await asyncio.to_thread(state.get_source_channels):
+        if src_peer in BLACKLISTED_CHANNEL_IDS:
+            logger.info(f"Source {src_peer} is blacklisted. Not forwarding from it.")
+            continue
+        try:
+            # Answered from the session cache for channels this account has seen
+            await client.get_input_entity(src_peer)
+        except (ValueError, errors.RPCError) as e:
+            logger.warning(f"Source {src_peer} is not accessible ({e}). Skipping its movies.")
+            continue
+
+        watermark = await asyncio.to_thread(state.get_watermark, src_peer, TARGET_CHANNEL_ID)
+        resume = f"movies indexed after {watermark.value}" if watermark.value else "the first indexed movie"
+        logger.info(f"Source {src_peer}: resuming from {resume} ({len(watermark.failed)} failed to retry)")
+
+        retries = await asyncio.to_thread(state.get_movies, src_peer, watermark.failed, MAX_FILE_SIZE)
+        for start in range(0, len(retries), FETCH_BATCH_SIZE):
+            await fetch_batch(client, state, bucket, queue, stats, watermark, retries[start:start + FETCH_BATCH_SIZE])
+
+        pending = state.get_pending_movies(MAX_FILE_SIZE, src_peer, after=watermark.value)
+        while True:
+            movies = await asyncio.to_thread(lambda: list(itertools.islice(pending, FETCH_BATCH_SIZE)))
+            if not movies:
+                break
+            await fetch_batch(client, state, bucket, queue, stats, watermark, movies)
+
+    await queue.put(None)
+
+
+async def consume(client, state, bucket, queue, stats):
+    """Forward queued messages FORWARD_GROUP_SIZE per request and record the outcome in bulk."""
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+
+        watermark, messages = item
+        src_peer = watermark.source_channel
+        for start in range(0, len(messages), FORWARD_GROUP_SIZE):
+            group = messages[start:start + FORWARD_GROUP_SIZE]
+            msg_ids = [message.id for message in group]
+            logger.info(f"Forwarding {len(group)} messages ({msg_ids[0]}-{msg_ids[-1]})...")
+
+            try:
+                forwarded = await call_telegram(
+                    bucket,
+                    client.forward_messages,
+                    entity=TARGET_CHANNEL_ID,
+                    messages=group, # Pass the message objects directly
+                    from_peer=src_peer # explicit from_peer is good practice
+                )
+            except Exception as e:
+                logger.error(f"Error forwarding messages {msg_ids[0]}-{msg_ids[-1]}: {e}")
+                # Marking as 'failed' allows us to manually inspect later.
+                forwarded = [None] * len(group)
+
+            succeeded = [msg_id for msg_id, result in zip(msg_ids, forwarded) if result]
+            failed = [msg_id for msg_id, result in zip(msg_ids, forwarded) if not result]
+            if succeeded:
+                await record(state, watermark, succeeded, "success")
+            if failed:
+                await record(state, watermark, failed, "failed")
+            stats["success"] += len(succeeded)
+            stats["failed"] += len(failed)
+
+            logger.info(f"Forwarded {sum(1 for result in forwarded if result)}/{len(group)} successfully")
+
+
+async def run_pipeline(client, state, stats):
+    bucket = TokenBucket(rate=1 / THROTTLE_DELAY, capacity=THROTTLE_BURST)
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    tasks = [
+        asyncio.create_task(produce(client, state, bucket, queue, stats)),
+        asyncio.create_task(consume(client, state, bucket, queue, stats)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            # Re-raise the first failure; the other stage is cancelled below
+            task.result()
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 async def main():
     logger.info("Starting Telegram File Forwarder...")
     
@@ -64,114 +247,21 @@ async def main():
     logger.info(f"Target Channel: {TARGET_CHANNEL_ID}")
     logger.info(f"Max File Size: {MAX_FILE_SIZE / (1024*1024*1024):.2f} GB")
     
-    # Get pending movies
-    # We get all movies that fit criteria
-    # The state class handles sorting by message_id ASC
-    logger.info("Fetching list of pending movies...")
-    cursor = state.get_pending_movies(MAX_FILE_SIZE)
-    total_found = state.collection.count_documents({}) 
-    # Note: total_found above is forwarded count, not source count.
-    # Source count is hard to get efficiently if we have filters, but we can iterate.
-    
+    # Pending movies (not forwarded yet, sorted by message_id ASC) are
+    # streamed from the state class by the producer
     logger.info("🔄 specific count not pre-calculated to save time. Starting stream...")
 
-    success_count = 0
-    skipped_count = 0
-    fail_count = 0
+    stats = {"success": 0, "skipped": 0, "prefiltered": 0, "failed": 0}
 
     try:
-        for movie in cursor:
-            msg_id = movie.get("message_id")
-            # Use the channel_id from the DB record if available, otherwise fallback to env config
-            # This handles cases where files are indexed from multiple channels
-            src_peer = movie.get("channel_id") or SOURCE_CHANNEL_ID
-            
-            if not msg_id:
-                logger.warning(f"Skipping document with missing message_id: {movie.get('_id')}")
-                continue
-
-            # Check if already forwarded
-            if state.is_forwarded(msg_id):
-                skipped_count += 1
-                if skipped_count % 1000 == 0:
-                    logger.info(f"Skipped {skipped_count} already forwarded messages...")
-                continue
-
-            # Fetch the message first to verify it contains a file
-            try:
-                # ids parameter gets a single message if passed as int/list of ints
-                messages = await client.get_messages(src_peer, ids=[msg_id])
-                message = messages[0] if messages else None
-
-                if not message:
-                    logger.warning(f"Message {msg_id} not found or deleted using get_messages.")
-                    state.mark_forwarded(msg_id, SOURCE_CHANNEL_ID, TARGET_CHANNEL_ID, "skipped")
-                    skipped_count += 1
-                    continue
-                
-                # Check for file
-                if not message.file:
-                    logger.info(f"Message {msg_id} is text/service (no file). Marking as skipped.")
-                    state.mark_forwarded(msg_id, SOURCE_CHANNEL_ID, TARGET_CHANNEL_ID, "skipped")
-                    skipped_count += 1
-                    continue
-
-                # Forward the message (using the message object is safer/faster if we already have it)
-                logger.info(f"Forwarding message {msg_id}...")
-                
-                await client.forward_messages(
-                    entity=TARGET_CHANNEL_ID,
-                    messages=message, # Pass the message object directly
-                    from_peer=src_peer # explicit from_peer is good practice
-                )
-                
-                # Mark as success
-                state.mark_forwarded(msg_id, src_peer, TARGET_CHANNEL_ID, "success")
-                success_count += 1
-                logger.info(f"Forwarded {msg_id} successfully")
-                
-                # Throttle
-                time.sleep(THROTTLE_DELAY)
-
-            except errors.FloodWaitError as e:
-                logger.warning(f"FloodWaitError triggered. Waiting for {e.seconds} seconds...")
-                # Add a safety buffer of 2 seconds
-                wait_time = e.seconds + 2
-                time.sleep(wait_time)
-                
-                # Retry
-                # ... retry logic ...
-                logger.info("Retrying after FloodWait...")
-                try:
-                    await client.forward_messages(
-                        entity=TARGET_CHANNEL_ID,
-                        messages=msg_id,
-                        from_peer=src_peer
-                    )
-                    state.mark_forwarded(msg_id, src_peer, TARGET_CHANNEL_ID, "success")
-                    success_count += 1
-                    logger.info(f"Forwarded {msg_id} successfully after retry")
-                    time.sleep(THROTTLE_DELAY)
-                except Exception as retry_e:
-                    logger.error(f"Failed to retry message {msg_id}: {retry_e}")
-                    state.mark_forwarded(msg_id, src_peer, TARGET_CHANNEL_ID, "failed")
-                    fail_count += 1
-
-            except Exception as e:
-                logger.error(f"Error forwarding message {msg_id}: {e}")
-                # Mark as failed so we can track it, or just don't mark it so we retry later?
-                # Marking as 'failed' allows us to manually inspect later.
-                state.mark_forwarded(msg_id, SOURCE_CHANNEL_ID, TARGET_CHANNEL_ID, "failed")
-                fail_count += 1
-                time.sleep(THROTTLE_DELAY)
-
+        await run_pipeline(client, state, stats)
     except KeyboardInterrupt:
         logger.info("Process interrupted by user.")
     except Exception as e:
         logger.error(f"Fatal error in main loop: {e}")
     finally:
         logger.info("Forwarding session finished.")
-        logger.info(f"Stats: Success={success_count}, Skipped={skipped_count}, Failed={fail_count}")
+        logger.info(f"Stats: Success={stats['success']}, Skipped={stats['skipped']}, Prefiltered={stats['prefiltered']}, Failed={stats['failed']}")
         state.close()
         await client.disconnect()
 
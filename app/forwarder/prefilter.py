@@ -0,0 +1,32 @@
+from app.forwarder.config import (
+    ALLOWED_MIME_PREFIXES,
+    GENERIC_MIME_TYPES,
+    MAX_FILE_SIZE,
+    VIDEO_EXTENSIONS,
+)
+
+# Movie fields the prefilter and the fetch stage need (_id is the
+# forwarder's position); everything else in the movies document is left
+# on the server
+PREFILTER_FIELDS = {"message_id": 1, "file_name": 1, "file_size": 1, "mime_type": 1}
+
+
+def skip_reason(movie: dict, max_size: float = MAX_FILE_SIZE) -> str | None:
+    """
+    Why a movie should not be forwarded, judged from its indexed metadata
+    alone, or None when it should be fetched and forwarded.
+    """
+    file_name = movie.get("file_name")
+    if not file_name:
+        return "no file"
+
+    file_size = movie.get("file_size")
+    if not file_size or file_size > max_size:
+        return "size"
+
+    mime_type = (movie.get("mime_type") or "").lower()
+    if mime_type.startswith(ALLOWED_MIME_PREFIXES):
+        return None
+    if mime_type in GENERIC_MIME_TYPES and file_name.lower().endswith(VIDEO_EXTENSIONS):
+        return None
+    return f"mime type {mime_type or 'unknown'}"
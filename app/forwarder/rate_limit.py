@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by the forwarder's fetch and forward stages.
+    Every Telegram request takes one token; tokens refill at `rate` per
+    second up to `capacity`, so short bursts are allowed but the long-run
+    request rate is fixed. A FloodWait empties the bucket and holds every
+    caller until it is over.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if now < self._paused_until:
+            self._updated = now
+            return
+        start = max(self._updated, self._paused_until)
+        self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds` (a FloodWait)."""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0
+        self._paused_until = max(self._paused_until, now + seconds)
@@ -1,7 +1,70 @@
 import pymongo
+from bson import ObjectId
+from collections import deque
+from pymongo import ASCENDING, UpdateOne
 from urllib.parse import urlparse
-from datetime import datetime
-from app.forwarder.config import DB_URI
+from datetime import datetime, timedelta
+from app.forwarder.config import DB_URI, SOURCE_CHANNEL_ID
+from app.forwarder.prefilter import PREFILTER_FIELDS
+
+# Statuses that mean a message needs no more work
+DONE_STATUSES = ["success", "skipped"]
+
+# Movies compared against forwarded_files per round trip in get_pending_movies
+PENDING_BATCH_SIZE = 1000
+
+# Movies are walked in indexing (_id) order. Ids are generated by the
+# writers just before their inserts, so the most recent ones are left for
+# the next run in case a slower concurrent writer still commits an older id.
+# Assumes indexer clocks agree to well within this.
+SETTLE_SECONDS = 60
+
+
+class Watermark:
+    """
+    Forwarding progress for one (source, target) channel pair: every movie
+    indexed up to `value` (a movies _id, None before the first) has been
+    processed, and `failed` holds the message ids of those that failed and
+    should be retried.
+
+    The position is in indexing order, not message id order: backfill
+    ranges and live messages are indexed out of message order, and a movie
+    indexed after the watermark passed its message id must still be seen.
+    Movies are issued in _id order but can complete out of order (skips
+    are recorded before earlier forwards finish), so the value only moves
+    over the contiguous completed prefix.
+    """
+
+    def __init__(self, source_channel, target_channel, value=None, failed=()):
+        self.source_channel = source_channel
+        self.target_channel = target_channel
+        self.value = value
+        self.failed = set(failed)
+        self._outstanding = deque()
+        self._positions = {}
+        self._completed = set()
+
+    def issue(self, movies):
+        for movie in movies:
+            # Retries of failed ids are already below the watermark
+            if self.value is None or movie["_id"] > self.value:
+                self._outstanding.append(movie["_id"])
+                self._positions[movie["message_id"]] = movie["_id"]
+
+    def complete(self, message_ids, failed=False):
+        for message_id in message_ids:
+            if failed:
+                self.failed.add(message_id)
+            else:
+                self.failed.discard(message_id)
+            position = self._positions.pop(message_id, None)
+            if position is not None:
+                self._completed.add(position)
+
+        while self._outstanding and self._outstanding[0] in self._completed:
+            self.value = self._outstanding.popleft()
+            self._completed.discard(self.value)
+
 
 class ForwarderState:
     def __init__(self):
@@ -13,21 +76,57 @@ class ForwarderState:
             
         self.db = self.client[db_name]
         self.collection = self.db["forwarded_files"]
+        self.movies = self.db["movies"]
+        self.progress = self.db["forwarder_progress"]
         self._ensure_indexes()
 
     def _ensure_indexes(self):
         # Remove any documents where source_message_id is null/None
         # This fixes the DuplicateKeyError if bad data exists
         self.collection.delete_many({"source_message_id": None})
-        
-        # Create unique index on source_message_id to prevent duplicates
-        self.collection.create_index("source_message_id", unique=True)
 
-    def is_forwarded(self, message_id):
+        # Message ids are only unique within a channel. Records written
+        # before several source channels were forwarded came from the
+        # single configured source.
+        self.collection.update_many(
+            {"source_channel_id": None},
+            {"$set": {"source_channel_id": SOURCE_CHANNEL_ID}}
+        )
+        if "source_message_id_1" in self.collection.index_information():
+            # Superseded by source_channel_message
+            self.collection.drop_index("source_message_id_1")
+
+        # Create unique index on (source channel, message id) to prevent duplicates
+        self.collection.create_index(
+            [("source_channel_id", ASCENDING), ("source_message_id", ASCENDING)],
+            unique=True,
+            name="source_channel_message"
+        )
+
+        # Pending movies are walked per source channel in indexing (_id)
+        # order with a file_size range: equality, sort, range. Failed ids are
+        # retried by message id. Same definitions as
+        # app.db.models.ensure_indexes; the forwarder can run without the
+        # bot having created them.
+        self.movies.create_index(
+            [("channel_id", ASCENDING), ("_id", ASCENDING), ("file_size", ASCENDING)],
+            name="channel_indexed_size"
+        )
+        self.movies.create_index(
+            [("channel_id", ASCENDING), ("message_id", ASCENDING), ("file_size", ASCENDING)],
+            name="channel_message_size"
+        )
+        existing = self.movies.index_information()
+        for superseded in ("message_id", "channel_message"):
+            if superseded in existing:
+                self.movies.drop_index(superseded)
+
+    def is_forwarded(self, message_id, source_channel):
         """Check if a message has already been processed (success or skipped)."""
         return self.collection.find_one({
+            "source_channel_id": source_channel,
             "source_message_id": message_id,
-            "status": {"$in": ["success", "skipped"]}
+            "status": {"$in": DONE_STATUSES}
         }) is not None
 
     def mark_forwarded(self, source_msg_id, source_channel, target_channel, status="success"):
@@ -44,33 +143,125 @@ class ForwarderState:
         except pymongo.errors.DuplicateKeyError:
             # If it exists, update the status just in case it was failed before
             self.collection.update_one(
-                {"source_message_id": source_msg_id},
+                {"source_channel_id": source_channel, "source_message_id": source_msg_id},
                 {"$set": {
                     "status": status,
                     "forwarded_at": datetime.utcnow()
                 }}
             )
 
-    def get_pending_movies(self, max_size):
+    def mark_many(self, records):
         """
-        Get all movies that qualify for forwarding and have NOT been forwarded yet.
-        Returns a cursor of movie documents.
+        Bulk version of mark_forwarded for (source_msg_id, source_channel,
+        target_channel, status) tuples, written in one unordered round trip.
         """
-        # 1. Get List of all forwarded message_ids to avoid processing them again
-        # This is more efficient than checking one by one if the list is not massive (e.g. < 100k)
-        forwarded_cursor = self.collection.find(
-            {"status": {"$in": ["success", "skipped"]}},
-            {"source_message_id": 1}
+        if not records:
+            return
+
+        now = datetime.utcnow()
+        self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"source_channel_id": source_channel, "source_message_id": source_msg_id},
+                    {
+                        "$set": {
+                            "target_channel_id": target_channel,
+                            "forwarded_at": now,
+                            "status": status,
+                        }
+                    },
+                    upsert=True,
+                )
+                for source_msg_id, source_channel, target_channel, status in records
+            ],
+            ordered=False,
+        )
+
+    def get_watermark(self, source_channel, target_channel):
+        doc = self.progress.find_one({"_id": f"{source_channel}:{target_channel}"}) or {}
+        # Progress saved as a message id ("watermark") is not a position in
+        # indexing order; such pairs restart from the beginning, where the
+        # forwarded_files records skip everything already done
+        return Watermark(
+            source_channel,
+            target_channel,
+            value=doc.get("position"),
+            failed=doc.get("failed", []),
+        )
+
+    def save_watermark(self, watermark):
+        self.progress.update_one(
+            {"_id": f"{watermark.source_channel}:{watermark.target_channel}"},
+            {
+                "$set": {
+                    "source_channel_id": watermark.source_channel,
+                    "target_channel_id": watermark.target_channel,
+                    "position": watermark.value,
+                    "failed": sorted(watermark.failed),
+                    "updated_at": datetime.utcnow(),
+                },
+                "$unset": {"watermark": ""},
+            },
+            upsert=True,
         )
-        forwarded_ids = [doc["source_message_id"] for doc in forwarded_cursor]
-        
-        # 2. Query movies that are NOT in this list
-        query = {
+
+    def get_source_channels(self):
+        return sorted(channel for channel in self.movies.distinct("channel_id") if channel)
+
+    def get_movies(self, channel_id, message_ids, max_size):
+        """Movies for specific message ids (failed ids being retried)."""
+        if not message_ids:
+            return []
+        return list(self.movies.find({
+            "channel_id": channel_id,
+            "message_id": {"$in": list(message_ids)},
             "file_size": {"$lte": max_size},
-            "message_id": {"$nin": forwarded_ids}
-        }
-        
-        return self.db["movies"].find(query).sort("message_id", 1)
-    
+        }, PREFILTER_FIELDS).sort("message_id", 1))
+
+    def get_pending_movies(self, max_size, channel_id, after=None, batch_size=PENDING_BATCH_SIZE):
+        """
+        Yield the movies of one source channel indexed after `after` (its
+        watermark) that qualify for forwarding and have NOT been forwarded
+        yet, in indexing order. Movies indexed in the last SETTLE_SECONDS
+        are left for the next run.
+
+        Movies are read in _id batches and each batch is merged with the
+        channel's forwarded records for the same message ids, so memory
+        stays at one batch and there are two queries per batch instead of
+        one per movie. Short queries also avoid holding a cursor open
+        across slow forwards.
+        """
+        settled = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS))
+        movie_filter = {"channel_id": channel_id, "file_size": {"$lte": max_size}}
+
+        while True:
+            position = {"$lt": settled}
+            if after is not None:
+                position["$gt"] = after
+            query = {**movie_filter, "_id": position}
+            batch = list(
+                self.movies.find(query, PREFILTER_FIELDS).sort("_id", 1).limit(batch_size)
+            )
+            if not batch:
+                return
+
+            done = {
+                doc["source_message_id"]
+                for doc in self.collection.find(
+                    {
+                        "source_channel_id": channel_id,
+                        "source_message_id": {"$in": [movie["message_id"] for movie in batch]},
+                        "status": {"$in": DONE_STATUSES},
+                    },
+                    {"_id": 0, "source_message_id": 1},
+                )
+            }
+
+            for movie in batch:
+                if movie["message_id"] not in done:
+                    yield movie
+
+            after = batch[-1]["_id"]
+
     def close(self):
         self.client.close()
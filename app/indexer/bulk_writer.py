@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Callable
+
+from app.db.queries import insert_movies, update_last_indexed_message
+from app.utils.logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds
+
+
+class BufferedMovieWriter:
+    """
+    Collects movie metadata from the indexer and writes it in unordered
+    bulk inserts of up to batch_size documents, or whatever has been
+    collected after flush_interval seconds.
+
+    A full batch is written in the background while the caller goes on
+    fetching; the next one waits for it, so at most one batch is in
+    flight. flush() writes whatever is buffered and waits for it.
+
+    The channel checkpoint only advances after a batch has been written,
+    so a crash re-scans at most the unwritten batches. By default it is the
+    channel's index_progress document; checkpoint overrides that (it is
+    called with the message id from a worker thread).
+    """
+
+    def __init__(
+        self,
+        channel_id: int,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        checkpoint: Callable[[int], None] | None = None,
+    ):
+        self.channel_id = channel_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._save_checkpoint = checkpoint or (
+            lambda message_id: update_last_indexed_message(channel_id, message_id)
+        )
+
+        self._buffer: list[dict] = []
+        self._last_scanned: int | None = None
+        self._checkpoint: int | None = None
+        self._last_flush = time.monotonic()
+        self._writing: asyncio.Task | None = None
+
+        self.scanned_count = 0
+        self.inserted = 0
+        self.duplicates = 0
+
+    @property
+    def last_scanned(self) -> int | None:
+        return self._last_scanned
+
+    async def add(self, metadata: dict):
+        self._buffer.append(metadata)
+        await self.scanned(metadata["message_id"])
+
+    async def scanned(self, message_id: int):
+        """Record a scanned message (with or without a file) for the checkpoint."""
+        self.scanned_count += 1
+        if self._last_scanned is None or message_id > self._last_scanned:
+            self._last_scanned = message_id
+
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self._start_write()
+
+    async def flush(self):
+        """Write everything buffered and wait until it is stored."""
+        await self._start_write()
+        await self._wait_for_write()
+
+    async def _start_write(self):
+        # One batch in flight: wait for (and surface errors from) the previous one
+        await self._wait_for_write()
+        self._last_flush = time.monotonic()
+
+        batch, self._buffer = self._buffer, []
+        self._writing = asyncio.create_task(self._write(batch, self._last_scanned))
+
+    async def _wait_for_write(self):
+        writing, self._writing = self._writing, None
+        if writing is not None:
+            await writing
+
+    async def _write(self, batch: list[dict], checkpoint: int | None):
+        if batch:
+            inserted, duplicates = await asyncio.to_thread(insert_movies, batch)
+            self.inserted += inserted
+            self.duplicates += duplicates
+            logger.info(
+                f"📦 Indexed batch of {len(batch)} "
+                f"(new={inserted}, duplicates={duplicates}) up to msg {checkpoint}"
+            )
+
+        if checkpoint is not None and checkpoint != self._checkpoint:
+            await asyncio.to_thread(self._save_checkpoint, checkpoint)
+            self._checkpoint = checkpoint
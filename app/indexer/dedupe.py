@@ -1 +1,25 @@
-# Duplicate protection
+import hashlib
+
+from app.utils.release_parser import parse_release_name
+
+# The same release uploaded to several channels, or forwarded again with a
+# new file id, has the same title, byte size and duration. Those copies get
+# one cluster_id at ingest time and search shows one of them. Re-encodes
+# differ in size and stay separate results.
+
+
+def fingerprint(title: str | None, file_size: int | None, duration: float | None = None) -> str | None:
+    """Cluster key for a release, or None when there is too little to go on."""
+    if not title or not file_size:
+        return None
+
+    key = f"{title}|{file_size}|{round(duration) if duration else ''}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def cluster_id(metadata: dict) -> str | None:
+    title = metadata.get("title")
+    if title is None:
+        title = parse_release_name(metadata.get("file_name") or "")["title"]
+
+    return fingerprint(title, metadata.get("file_size"), metadata.get("duration"))
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from app.db.queries import (
+    clear_backfill_ranges,
+    create_backfill_ranges,
+    get_backfill_ranges,
+    get_index_progress,
+    record_index_rate,
+    update_backfill_range,
+    update_last_indexed_message,
+)
+from app.indexer.bulk_writer import BufferedMovieWriter
+from app.indexer.rate_control import AdaptiveThrottle, DEFAULT_INITIAL_RATE
+from app.indexer.telethon_scanner import (
+    INDEXER_SESSION,
+    create_client,
+    resolve_channels,
+    scan_messages,
+)
+from app.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# A channel's message-id space is cut into more ranges than there are
+# workers so a worker that finishes a sparse range picks up another one
+DEFAULT_WORKERS = 4
+RANGES_PER_WORKER = 4
+PROGRESS_INTERVAL = 30  # seconds
+
+
+def plan_ranges(start_after: int, last_id: int, parts: int) -> list[tuple[int, int]]:
+    """Split the message ids (start_after, last_id] into contiguous (start, end] ranges."""
+    span = last_id - start_after
+    if span <= 0:
+        return []
+
+    parts = max(1, min(parts, span))
+    step, extra = divmod(span, parts)
+
+    ranges = []
+    start = start_after
+    for index in range(parts):
+        end = start + step + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+class _RangeWorker:
+    """One range being scanned: its writer, checkpointing and progress."""
+
+    def __init__(self, channel_id: int, doc: dict):
+        self.channel_id = channel_id
+        self.index = doc["index"]
+        self.start = doc["start"]
+        self.end = doc["end"]
+        self.checkpoint = doc["checkpoint"]
+        self._previous_scanned = doc.get("scanned", 0)
+        self._previous_inserted = doc.get("inserted", 0)
+        self.started_at = time.monotonic()
+        self.writer = BufferedMovieWriter(channel_id, checkpoint=self._save)
+
+    def _totals(self) -> dict:
+        return {
+            "scanned": self._previous_scanned + self.writer.scanned_count,
+            "inserted": self._previous_inserted + self.writer.inserted,
+        }
+
+    def _save(self, message_id: int):
+        # Called by the writer after each batch is in the movies collection
+        update_backfill_range(self.channel_id, self.index, checkpoint=message_id, **self._totals())
+
+    def finish(self):
+        update_backfill_range(
+            self.channel_id, self.index, checkpoint=self.end, done=True, **self._totals()
+        )
+
+    def describe(self) -> str:
+        position = self.writer.last_scanned or self.checkpoint
+        percent = 100 * (position - self.start) / (self.end - self.start)
+        elapsed = time.monotonic() - self.started_at
+        rate = self.writer.scanned_count / elapsed if elapsed > 0 else 0.0
+        return (
+            f"range {self.index} ({self.start}, {self.end}]: msg {position} ({percent:.0f}%), "
+            f"{self.writer.scanned_count} scanned at {rate:.1f} msg/s, "
+            f"new={self.writer.inserted} duplicates={self.writer.duplicates}"
+        )
+
+
+async def _scan_range(client, throttle, worker: _RangeWorker, semaphore, active: dict):
+    async with semaphore:
+        worker.started_at = time.monotonic()
+        active[worker.index] = worker
+        try:
+            # iter_messages bounds are exclusive
+            await scan_messages(
+                client,
+                worker.channel_id,
+                throttle,
+                worker.writer,
+                min_id=worker.checkpoint,
+                max_id=worker.end + 1,
+            )
+        except Exception:
+            logger.exception(f"❌ Backfill {worker.describe()} failed")
+            raise
+        finally:
+            active.pop(worker.index, None)
+
+        await asyncio.to_thread(worker.finish)
+        logger.info(f"✅ Backfill {worker.describe()} done")
+
+
+async def _report_progress(active: dict, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        for index in sorted(active):
+            logger.info(f"📈 Backfill {active[index].describe()}")
+
+
+async def run_range_backfill(
+    channel_id: int,
+    workers: int = DEFAULT_WORKERS,
+    extra_sessions: list[str] | None = None,
+):
+    """
+    Backfill one large channel by scanning ranges of its message ids in
+    parallel. Ranges are spread over the indexer session and any extra
+    Telethon sessions (each must already be logged in); every session has
+    its own throttle.
+
+    The plan and every range's checkpoint live in the config collection,
+    so a restarted backfill resumes the unfinished ranges. When all ranges
+    are done the channel's normal checkpoint is moved to the end of the
+    plan and incremental runs carry on from there.
+    """
+    sessions = list(dict.fromkeys([INDEXER_SESSION, *(extra_sessions or [])]))
+
+    async with AsyncExitStack() as stack:
+        clients = [
+            await stack.enter_async_context(create_client(session))
+            for session in sessions
+        ]
+        for session, client in zip(sessions, clients):
+            if not await resolve_channels(client, [channel_id]):
+                logger.error(f"❌ Session {session} cannot read channel {channel_id}")
+                return
+
+        docs = get_backfill_ranges(channel_id)
+        if docs:
+            logger.info(f"🔁 Resuming backfill of {channel_id}: {len(docs)} ranges")
+        else:
+            start_after = (get_index_progress(channel_id) or {}).get("last_message_id") or 0
+            latest = await clients[0].get_messages(channel_id, limit=1)
+            last_id = latest[0].id if latest else 0
+
+            plan = plan_ranges(start_after, last_id, workers * RANGES_PER_WORKER)
+            if not plan:
+                logger.info(f"✅ Channel {channel_id} is already indexed up to {start_after}")
+                return
+
+            create_backfill_ranges(channel_id, plan)
+            docs = get_backfill_ranges(channel_id)
+            logger.info(
+                f"🗺️ Backfill of {channel_id}: messages {start_after + 1}–{last_id} "
+                f"in {len(docs)} ranges, {workers} workers, {len(clients)} session(s)"
+            )
+
+        learned_rate = ((get_index_progress(channel_id) or {}).get("rate") or {}).get("rate_limit")
+        throttles = [
+            AdaptiveThrottle(initial_rate=learned_rate or DEFAULT_INITIAL_RATE)
+            for _ in clients
+        ]
+        semaphore = asyncio.Semaphore(workers)
+        active: dict[int, _RangeWorker] = {}
+
+        pending = [doc for doc in docs if not doc["done"]]
+        reporter = asyncio.create_task(_report_progress(active, PROGRESS_INTERVAL))
+        try:
+            results = await asyncio.gather(
+                *[
+                    _scan_range(
+                        clients[doc["index"] % len(clients)],
+                        throttles[doc["index"] % len(clients)],
+                        _RangeWorker(channel_id, doc),
+                        semaphore,
+                        active,
+                    )
+                    for doc in pending
+                ],
+                return_exceptions=True,
+            )
+        finally:
+            reporter.cancel()
+
+    for session, throttle in zip(sessions, throttles):
+        stats = throttle.stats()
+        logger.info(
+            f"🚦 Session {session}: {stats['messages_per_second']} msg/s achieved, "
+            f"settled at {stats['rate_limit']} msg/s ({stats['floods']} FloodWaits)"
+        )
+    record_index_rate(channel_id, throttles[0].stats())
+
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        logger.error(f"❌ {len(failed)} of {len(pending)} ranges did not finish; run the backfill again to resume")
+        raise failed[0]
+
+    docs = get_backfill_ranges(channel_id)
+    update_last_indexed_message(channel_id, max(doc["end"] for doc in docs))
+    clear_backfill_ranges(channel_id)
+
+    logger.info(
+        f"🏁 Backfill of {channel_id} complete: "
+        f"{sum(doc['scanned'] for doc in docs)} messages scanned, "
+        f"{sum(doc['inserted'] for doc in docs)} new movies"
+    )
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+from app.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Rates are messages scanned per second. Telegram returns history in pages
+# of 100, so 100 msg/s is roughly one GetHistory request per second.
+DEFAULT_INITIAL_RATE = 20.0
+DEFAULT_MIN_RATE = 2.0
+DEFAULT_MAX_RATE = 3000.0
+DEFAULT_INCREASE = 10.0          # msg/s added per clean window
+DEFAULT_WINDOW = 200             # messages between increases
+DEFAULT_DECREASE = 0.5           # rate multiplier on a short FloodWait
+FLOOD_REFERENCE_SECONDS = 30     # a FloodWait this long or longer halves the rate again
+
+
+class AdaptiveThrottle:
+    """
+    AIMD pacing for the history indexer: the rate grows additively while
+    Telegram accepts it and is cut multiplicatively when a FloodWait
+    arrives, deeper the longer the requested wait.
+
+    Shared between tasks, it acts as one global rate budget.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = DEFAULT_INITIAL_RATE,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        increase: float = DEFAULT_INCREASE,
+        window: int = DEFAULT_WINDOW,
+        decrease: float = DEFAULT_DECREASE,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.increase = increase
+        self.window = window
+        self.decrease = decrease
+
+        self._next_slot = time.monotonic()
+        self._flood_until = 0.0
+        self._since_increase = 0
+        self._lock = asyncio.Lock()
+
+        self.started_at = time.monotonic()
+        self.messages = 0
+        self.floods = 0
+        self.flood_seconds = 0
+
+    async def wait(self):
+        """Block until the next message may be processed."""
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.rate
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+        self.messages += 1
+        self._since_increase += 1
+        if self._since_increase >= self.window:
+            self._since_increase = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    async def pause(self):
+        """Sleep out any FloodWait in progress before the next request."""
+        delay = self._next_slot - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_flood(self, seconds: int):
+        """Back off in proportion to the FloodWait Telegram asked for."""
+        now = time.monotonic()
+        self.floods += 1
+        self.flood_seconds += seconds
+
+        if now < self._flood_until:
+            # Another task hit the same wait; one cut per FloodWait
+            self._flood_until = max(self._flood_until, now + seconds)
+            self._next_slot = max(self._next_slot, self._flood_until)
+            return
+
+        factor = self.decrease ** (1 + seconds / FLOOD_REFERENCE_SECONDS)
+        self.rate = max(self.min_rate, self.rate * factor)
+        self._since_increase = 0
+        # Nothing goes out until the wait is over
+        self._flood_until = now + seconds
+        self._next_slot = max(self._next_slot, self._flood_until)
+
+        logger.warning(
+            f"⏳ FloodWait {seconds}s — rate lowered to {self.rate:.1f} msg/s"
+        )
+
+    @property
+    def achieved_rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.messages / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "rate_limit": round(self.rate, 2),
+            "messages_per_second": round(self.achieved_rate, 2),
+            "messages": self.messages,
+            "floods": self.floods,
+            "flood_seconds": self.flood_seconds,
+        }
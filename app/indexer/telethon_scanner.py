@@ -1,16 +1,15 @@
 import re
 import asyncio
 from telethon import TelegramClient
-from telethon.errors import FloodWaitError
+from telethon.errors import FloodWaitError, TakeoutInitDelayError
 from telethon.tl.types import Message
 
-from app.db.queries import (
-    insert_movie,
-    get_last_indexed_message,
-    update_last_indexed_message,
-)
-from app.utils.config import DB_CHANNEL_ID
+from app.db.queries import get_index_progress, record_index_rate
+from app.indexer.bulk_writer import BufferedMovieWriter
+from app.indexer.rate_control import AdaptiveThrottle, DEFAULT_INITIAL_RATE
+from app.utils.config import INDEX_CHANNEL_IDS
 from app.utils.logger import setup_logger
+from app.utils.release_parser import parse_release_name
 from app.utils.config import (
     TG_API_ID,
     TG_API_HASH,
@@ -18,6 +17,14 @@ from app.utils.config import (
 
 logger = setup_logger()
 
+INDEXER_SESSION = "indexer_session"
+
+# Takeout sessions get far more lenient flood limits, so they start faster.
+# Only channels at least TAKEOUT_MIN_BACKLOG messages behind use one;
+# incremental runs stay on the normal session.
+TAKEOUT_INITIAL_RATE = 300.0
+TAKEOUT_MIN_BACKLOG = 10_000
+
 
 def normalize_text(text: str) -> str:
     text = text.lower()
@@ -26,113 +33,308 @@ def normalize_text(text: str) -> str:
     return text.strip()
 
 
-async def run_telethon_indexer():
-    last_indexed = get_last_indexed_message(DB_CHANNEL_ID) or 0
-    logger.info(
-        f"📡 Telethon indexing started "
-        f"(resume from message_id={last_indexed})"
-    )
+def extract_metadata(message: Message, channel_id: int) -> dict | None:
+    """Movie document for a message, or None when it has no named file."""
+    if not message.file:
+        logger.debug(f"⏭️  Msg {message.id}: No file attached, skipping")
+        return None
+
+    if not message.file.name:
+        # Try to get filename from document attribute for forwarded messages
+        file_name = None
+        if hasattr(message, 'document') and message.document:
+            for attr in message.document.attributes:
+                if hasattr(attr, 'file_name'):
+                    file_name = attr.file_name
+                    break
+
+        if not file_name:
+            logger.debug(f"⏭️  Msg {message.id}: File has no name, skipping")
+            return None
+    else:
+        file_name = message.file.name
+
+    return {
+        "message_id": message.id,
+        "channel_id": channel_id,
+        "file_id": message.file.id,
+        "file_unique_id": str(message.file.id),
+        "file_name": file_name,
+        "file_size": message.file.size,
+        "caption": message.text or "",
+        "mime_type": message.file.mime_type,
+        "duration": message.file.duration,
+        "normalized_text": normalize_text(
+            f"{file_name} {message.text or ''}"
+        ),
+        **parse_release_name(file_name),
+    }
+
+
+def create_client(session: str = INDEXER_SESSION) -> TelegramClient:
+    # Surface every FloodWait so the throttle can learn from it
+    return TelegramClient(session, TG_API_ID, TG_API_HASH, flood_sleep_threshold=0)
+
+
+async def resolve_channels(client: TelegramClient, channel_ids: list[int]) -> list[int]:
+    """Channels the account can read; the others are reported and dropped."""
+    missing = []
+    for channel_id in channel_ids:
+        try:
+            await client.get_entity(channel_id)
+        except ValueError:
+            missing.append(channel_id)
 
-    processed_since_checkpoint = 0
-    CHECKPOINT_INTERVAL = 50
-    THROTTLE_DELAY = 0.15
+    if not missing:
+        return channel_ids
 
-    async with TelegramClient(
-        "indexer_session",
-        TG_API_ID,
-        TG_API_HASH,
-    ) as client:
+    logger.info("🔄 Channel entity not found in cache. Refreshing dialogs...")
+    dialogs = await client.get_dialogs()
 
+    resolved = []
+    for channel_id in channel_ids:
+        if channel_id not in missing:
+            resolved.append(channel_id)
+            continue
         try:
-            await client.get_entity(DB_CHANNEL_ID)
+            await client.get_entity(channel_id)
+            resolved.append(channel_id)
         except ValueError:
-            logger.info("🔄 Channel entity not found in cache. Refreshing dialogs...")
-            dialogs = await client.get_dialogs()
-
-            try:
-                await client.get_entity(DB_CHANNEL_ID)
-            except ValueError:
-                logger.error(f"❌ Channel {DB_CHANNEL_ID} NOT found in account dialogs!")
-                logger.info("👇 Available Channels (copy the ID of the one you want):")
-                for d in dialogs:
-                    if d.is_channel:
-                        logger.info(f"   ID: {d.id}  |  Name: {d.title}")
-                
-                logger.warning("⚠️ Please update TEST_DB_CHANNEL_ID or PROD_DB_CHANNEL_ID in .env")
-                return
+            logger.error(f"❌ Channel {channel_id} NOT found in account dialogs!")
+
+    if len(resolved) < len(channel_ids):
+        logger.info("👇 Available Channels (copy the ID of the one you want):")
+        for d in dialogs:
+            if d.is_channel:
+                logger.info(f"   ID: {d.id}  |  Name: {d.title}")
+
+        logger.warning("⚠️ Please update INDEX_CHANNEL_IDS (or TEST_DB_CHANNEL_ID / PROD_DB_CHANNEL_ID) in .env")
+
+    return resolved
 
+
+async def scan_messages(
+    client: TelegramClient,
+    channel_id: int,
+    throttle: AdaptiveThrottle,
+    writer: BufferedMovieWriter,
+    min_id: int = 0,
+    max_id: int = 0,
+) -> int:
+    """
+    Feed the messages strictly between min_id and max_id (0 = newest) to
+    the writer, oldest first, and return how many were scanned. FloodWaits
+    slow the shared throttle down and the scan resumes where it stopped.
+    """
+    message_count = 0
+    resume_from = min_id
+
+    while True:
         try:
-            message_count = 0
             async for message in client.iter_messages(
-                DB_CHANNEL_ID,
-                min_id=last_indexed,
+                channel_id,
+                min_id=resume_from,
+                max_id=max_id,
                 reverse=True,
+                # Telethon otherwise sleeps 1s per 100-message page on long
+                # scans; the throttle does the pacing instead
+                wait_time=0,
             ):
+                await throttle.wait()
                 message_count += 1
-                
-                # Debug: Log every message being processed
-                if not message.file:
-                    logger.debug(f"⏭️  Msg {message.id}: No file attached, skipping")
+                resume_from = message.id
+
+                metadata = extract_metadata(message, channel_id)
+                if metadata is None:
+                    await writer.scanned(message.id)
                     continue
-                    
-                if not message.file.name:
-                    # Try to get filename from document attribute for forwarded messages
-                    file_name = None
-                    if hasattr(message, 'document') and message.document:
-                        for attr in message.document.attributes:
-                            if hasattr(attr, 'file_name'):
-                                file_name = attr.file_name
-                                break
-                    
-                    if not file_name:
-                        logger.debug(f"⏭️  Msg {message.id}: File has no name, skipping")
-                        continue
-                else:
-                    file_name = message.file.name
-                
-                logger.info(f"🔍 Processing msg {message.id}: {file_name}")
-
-                metadata = {
-                    "message_id": message.id,
-                    "channel_id": DB_CHANNEL_ID,
-                    "file_id": message.file.id,
-                    "file_unique_id": str(message.file.id),
-                    "file_name": file_name,
-                    "file_size": message.file.size,
-                    "caption": message.text or "",
-                    "mime_type": message.file.mime_type,
-                    "normalized_text": normalize_text(
-                        f"{file_name} {message.text or ''}"
-                    ),
-                }
-
-                inserted = insert_movie(metadata)
-                processed_since_checkpoint += 1
-
-                if inserted:
-                    logger.info(f"📦 Indexed: {file_name}")
-                else:
-                    logger.info(f"⚠️  Duplicate, skipped: {file_name}")
-
-                if processed_since_checkpoint >= CHECKPOINT_INTERVAL:
-                    update_last_indexed_message(DB_CHANNEL_ID, message.id)
-                    processed_since_checkpoint = 0
-
-                await asyncio.sleep(THROTTLE_DELAY)
-            
-            logger.info(f"📊 Total messages processed in this run: {message_count}")
+
+                logger.info(f"🔍 Processing msg {message.id} in {channel_id}: {metadata['file_name']}")
+                await writer.add(metadata)
+
+            break
 
         except FloodWaitError as e:
-            logger.warning(
-                f"⏳ FloodWait hit. Sleeping for {e.seconds + 5} seconds"
-            )
-            await asyncio.sleep(e.seconds + 5)
-            return await run_telethon_indexer()
+            # Keep the client and the position; only slow down
+            await writer.flush()
+            throttle.on_flood(e.seconds)
+            logger.info(f"⏳ Resuming {channel_id} after msg {resume_from} in {e.seconds}s")
+            await throttle.pause()
+
+        except Exception:
+            await writer.flush()
+            raise
+
+    await writer.flush()
+    return message_count
+
+
+async def index_channel(
+    client: TelegramClient,
+    channel_id: int,
+    throttle: AdaptiveThrottle,
+    last_indexed: int = 0,
+):
+    """
+    Scan one channel from its checkpoint to the newest message. Several
+    channels can be scanned concurrently over the same client; they share
+    the throttle and each keep their own writer and checkpoint.
+    """
+    writer = BufferedMovieWriter(channel_id)
+
+    logger.info(f"📡 Indexing channel {channel_id} (resume from message_id={last_indexed})")
+
+    try:
+        message_count = await scan_messages(
+            client, channel_id, throttle, writer, min_id=last_indexed
+        )
+    except Exception:
+        logger.exception(f"❌ Indexing channel {channel_id} failed unexpectedly")
+        raise
+
+    logger.info(f"📊 Channel {channel_id}: {message_count} messages processed in this run")
+    logger.info(f"📦 Channel {channel_id}: New: {writer.inserted} | Duplicates skipped: {writer.duplicates}")
+
+
+def _learned_rate(progress: dict, field: str, default: float) -> float:
+    # Start from the most conservative rate a previous run settled on
+    rates = [
+        doc[field]["rate_limit"]
+        for doc in progress.values()
+        if (doc.get(field) or {}).get("rate_limit")
+    ]
+    return min(rates, default=default)
+
+
+async def _index_channels(
+    client: TelegramClient,
+    channel_ids: list[int],
+    throttle: AdaptiveThrottle,
+    last_indexed: dict[int, int],
+) -> dict:
+    """Scan channels concurrently; maps each channel to None or its exception."""
+    results = await asyncio.gather(
+        *[
+            index_channel(client, channel_id, throttle, last_indexed=last_indexed[channel_id])
+            for channel_id in channel_ids
+        ],
+        return_exceptions=True,
+    )
+    return dict(zip(channel_ids, results))
+
+
+async def _export_backlog(
+    client: TelegramClient,
+    channel_ids: list[int],
+    last_indexed: dict[int, int],
+) -> list[int]:
+    """Channels far enough behind to be worth a takeout export."""
+    backlogged = []
+    for channel_id in channel_ids:
+        latest = await client.get_messages(channel_id, limit=1)
+        backlog = (latest[0].id if latest else 0) - last_indexed[channel_id]
+        if backlog >= TAKEOUT_MIN_BACKLOG:
+            backlogged.append(channel_id)
+        else:
+            logger.info(f"📡 Channel {channel_id} is {max(backlog, 0)} messages behind; indexing normally")
+    return backlogged
+
+
+async def _run_takeout(
+    client: TelegramClient,
+    channel_ids: list[int],
+    throttle: AdaptiveThrottle,
+    fallback_throttle: AdaptiveThrottle,
+    last_indexed: dict[int, int],
+) -> dict:
+    """
+    Scan channel_ids inside a takeout session. If Telegram will not open
+    one yet (a first takeout has to be confirmed from another device) the
+    channels are indexed on the normal session instead.
+    """
+    try:
+        async with client.takeout(finalize=True, channels=True, megagroups=True) as takeout:
+            logger.info(f"📦 Takeout session open, exporting {len(channel_ids)} channel(s)")
+            return await _index_channels(takeout, channel_ids, throttle, last_indexed)
+    except TakeoutInitDelayError as e:
+        logger.warning(
+            f"⚠️ Takeout not available for another {e.seconds}s "
+            f"(confirm it in the Telegram app); indexing normally"
+        )
+        return await _index_channels(client, channel_ids, fallback_throttle, last_indexed)
+
+
+def _report_rate(label: str, throttle: AdaptiveThrottle):
+    stats = throttle.stats()
+    logger.info(
+        f"🚦 {label}: {stats['messages_per_second']} msg/s achieved, "
+        f"settled at {stats['rate_limit']} msg/s "
+        f"({stats['floods']} FloodWaits, {stats['flood_seconds']}s waited)"
+    )
+
+
+async def run_telethon_indexer(channel_ids: list[int] | None = None, takeout: bool = False):
+    """
+    Index channels from their checkpoints. With takeout=True, channels with
+    a large backlog (a first full-history scan) are exported through a
+    takeout session; the rest are indexed on the normal session.
+    """
+    channel_ids = list(dict.fromkeys(channel_ids or INDEX_CHANNEL_IDS))
+    progress = {
+        channel_id: get_index_progress(channel_id) or {}
+        for channel_id in channel_ids
+    }
+
+    throttle = AdaptiveThrottle(initial_rate=_learned_rate(progress, "rate", DEFAULT_INITIAL_RATE))
+    takeout_throttle = AdaptiveThrottle(
+        initial_rate=_learned_rate(progress, "takeout_rate", TAKEOUT_INITIAL_RATE)
+    )
+
+    logger.info(
+        f"📡 Telethon indexing started for {len(channel_ids)} channel(s) "
+        f"(rate={throttle.rate:.1f} msg/s{', takeout enabled' if takeout else ''})"
+    )
+
+    async with create_client() as client:
+        channel_ids = await resolve_channels(client, channel_ids)
+        if not channel_ids:
+            return
+
+        last_indexed = {
+            channel_id: progress[channel_id].get("last_message_id") or 0
+            for channel_id in channel_ids
+        }
+        exported = await _export_backlog(client, channel_ids, last_indexed) if takeout else []
+        incremental = [channel_id for channel_id in channel_ids if channel_id not in exported]
+
+        runs = []
+        if incremental:
+            runs.append(_index_channels(client, incremental, throttle, last_indexed))
+        if exported:
+            runs.append(_run_takeout(client, exported, takeout_throttle, throttle, last_indexed))
 
-        except Exception as e:
-            logger.exception("❌ Indexing failed unexpectedly")
-            raise e
+        results = {}
+        for run_results in await asyncio.gather(*runs):
+            results.update(run_results)
 
+    # The budget is shared, so every channel records the same rate
+    if throttle.messages:
+        for channel_id in channel_ids:
+            record_index_rate(channel_id, throttle.stats())
+        _report_rate("Normal session", throttle)
+    if takeout_throttle.messages:
+        for channel_id in exported:
+            record_index_rate(channel_id, takeout_throttle.stats(), field="takeout_rate")
+        _report_rate("Takeout session", takeout_throttle)
 
+    failed = [
+        (channel_id, result)
+        for channel_id, result in results.items()
+        if isinstance(result, BaseException)
+    ]
+    if failed:
+        for channel_id, error in failed:
+            logger.error(f"❌ Channel {channel_id} did not finish: {error!r}")
+        raise failed[0][1]
 
     logger.info("✅ Telethon indexing complete")
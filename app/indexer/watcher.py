@@ -1 +1,118 @@
-# Auto-index new files
+import asyncio
+
+from telethon import TelegramClient, events
+
+from app.db.queries import (
+    delete_movies,
+    get_index_progress,
+    insert_movie,
+    update_last_indexed_message,
+    update_movie,
+)
+from app.indexer.rate_control import AdaptiveThrottle, DEFAULT_INITIAL_RATE
+from app.indexer.telethon_scanner import (
+    create_client,
+    extract_metadata,
+    index_channel,
+    resolve_channels,
+)
+from app.utils.config import INDEX_CHANNEL_IDS
+from app.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class LiveIndexer:
+    """
+    Keeps the movies collection in step with the source channels from
+    Telethon update events: new files are inserted, edits re-index the
+    document and deletions remove it.
+
+    Each channel is first caught up from its checkpoint with a normal scan.
+    Until that finishes, live messages are indexed but do not move the
+    checkpoint, so a crash during catch-up cannot skip the unscanned gap.
+    """
+
+    def __init__(self, client: TelegramClient, channel_ids: list[int]):
+        self.client = client
+        self.channel_ids = channel_ids
+        self._caught_up: set[int] = set()
+        self._checkpoints: dict[int, int] = {}
+
+    def register(self):
+        chats = self.channel_ids
+        self.client.add_event_handler(self.on_new_message, events.NewMessage(chats=chats))
+        self.client.add_event_handler(self.on_message_edited, events.MessageEdited(chats=chats))
+        self.client.add_event_handler(self.on_message_deleted, events.MessageDeleted(chats=chats))
+
+    async def catch_up(self, throttle: AdaptiveThrottle):
+        async def catch_up_channel(channel_id: int):
+            last_indexed = (get_index_progress(channel_id) or {}).get("last_message_id") or 0
+            await index_channel(self.client, channel_id, throttle, last_indexed=last_indexed)
+            self._caught_up.add(channel_id)
+            logger.info(f"👀 Channel {channel_id} caught up; following live updates")
+
+        await asyncio.gather(*[catch_up_channel(channel_id) for channel_id in self.channel_ids])
+
+    async def _advance_checkpoint(self, channel_id: int, message_id: int):
+        if channel_id not in self._caught_up:
+            return
+        if message_id <= self._checkpoints.get(channel_id, 0):
+            return
+        self._checkpoints[channel_id] = message_id
+        await asyncio.to_thread(update_last_indexed_message, channel_id, message_id)
+
+    async def on_new_message(self, event):
+        message = event.message
+        metadata = extract_metadata(message, event.chat_id)
+
+        if metadata is not None:
+            inserted = await asyncio.to_thread(insert_movie, metadata)
+            if inserted:
+                logger.info(f"🆕 Live-indexed msg {message.id} in {event.chat_id}: {metadata['file_name']}")
+
+        await self._advance_checkpoint(event.chat_id, message.id)
+
+    async def on_message_edited(self, event):
+        message = event.message
+        metadata = extract_metadata(message, event.chat_id)
+
+        if metadata is None:
+            # The file was removed from the message
+            removed = await asyncio.to_thread(delete_movies, event.chat_id, [message.id])
+            if removed:
+                logger.info(f"🗑️ Msg {message.id} in {event.chat_id} no longer has a file; removed")
+            return
+
+        updated = await asyncio.to_thread(update_movie, event.chat_id, message.id, metadata)
+        if updated:
+            logger.info(f"✏️ Re-indexed edited msg {message.id} in {event.chat_id}: {metadata['file_name']}")
+        elif await asyncio.to_thread(insert_movie, metadata):
+            logger.info(f"🆕 Indexed edited msg {message.id} in {event.chat_id}: {metadata['file_name']}")
+
+    async def on_message_deleted(self, event):
+        # Channel deletions always carry the chat; others cannot be attributed
+        if event.chat_id is None:
+            return
+
+        removed = await asyncio.to_thread(delete_movies, event.chat_id, event.deleted_ids)
+        if removed:
+            logger.info(f"🗑️ Removed {removed} movie(s) deleted from {event.chat_id}")
+
+
+async def run_watcher(channel_ids: list[int] | None = None):
+    """Catch every channel up from its checkpoint, then follow it live."""
+    channel_ids = list(dict.fromkeys(channel_ids or INDEX_CHANNEL_IDS))
+
+    async with create_client() as client:
+        channel_ids = await resolve_channels(client, channel_ids)
+        if not channel_ids:
+            return
+
+        live = LiveIndexer(client, channel_ids)
+        # Register first so nothing posted during catch-up is missed
+        live.register()
+
+        logger.info(f"👀 Watching {len(channel_ids)} channel(s) for new, edited and deleted files")
+        await live.catch_up(AdaptiveThrottle(initial_rate=DEFAULT_INITIAL_RATE))
+        await client.run_until_disconnected()
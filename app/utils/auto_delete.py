@@ -1,61 +1,242 @@
+import asyncio
+import heapq
+import itertools
 from datetime import datetime, timedelta
+from telegram import Bot
+from telegram.constants import BulkRequestLimit
 from telegram.ext import ContextTypes
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TelegramError
+from app.utils.config import AUTO_DELETE_SECONDS, INSTANCE_ID
 from app.utils.logger import setup_logger
-from app.db.queries import schedule_db_deletion, get_due_deletions, remove_deletion_task
+from app.db.async_queries import (
+    schedule_db_deletion,
+    get_deletion_tasks,
+    claim_deletion_tasks,
+    reclaim_deletion_tasks,
+    remove_deletion_tasks,
+)
 
 logger = setup_logger()
 
-AUTO_DELETE_SECONDS = 120
+# Message ids per deleteMessages call
+DELETE_BATCH_SIZE = BulkRequestLimit.MAX_LIMIT
 
+# Tasks due within this many seconds of the earliest one are deleted with
+# it, so a busy chat's deletions share requests instead of trickling out
+GROUP_WINDOW = 1.0
 
-async def process_deletions_job(context: ContextTypes.DEFAULT_TYPE):
-    """Background job to poll MongoDB and delete due messages."""
-    try:
-        due_tasks = get_due_deletions()
-        if not due_tasks:
+# A round that fails (database or network trouble) is retried after a
+# delay that doubles on every failure of the same task, up to the maximum
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 300
+
+# Replicas claim a task before deleting it. A lease that runs out (its
+# owner died mid-batch) lets another replica take the task over.
+LEASE_SECONDS = 60
+
+# How often the leader replica looks for tasks no live replica is
+# handling, and how overdue a task must be before it counts as abandoned
+RECLAIM_INTERVAL = 60
+RECLAIM_GRACE = 30
+
+
+class DeletionScheduler:
+    """
+    Fires auto-delete tasks at their delete_at from an in-memory min-heap.
+
+    The deletions collection is only a durable journal: tasks are written
+    to it when scheduled, replayed into the heap on startup and removed in
+    bulk once processed. Between deadlines the runner sleeps until the
+    earliest one, or until a task is added when the heap is empty, so an
+    idle bot makes no queries at all.
+
+    There is one task per (chat_id, bot_message_id). Adding it again
+    reschedules it: the old heap entry is marked dead and skipped when it
+    surfaces.
+
+    Several bot replicas can share the journal. Every replica replays it,
+    and a due task is only executed by the replica that claims its lease.
+    A slow sweep (reclaim_deletions_job, run by the leader) picks up tasks
+    that were scheduled by a replica that has since stopped, or whose
+    lease has expired.
+    """
+
+    def __init__(self):
+        # Entries are [delete_at, seq, task]; task is None once superseded
+        self._heap: list[list] = []
+        self._entries: dict[tuple[int, int], list] = {}
+        self._counter = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._runner: asyncio.Task | None = None
+        self._bot: Bot | None = None
+
+    async def start(self, bot: Bot):
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+
+        # The journal is the source of truth; anything added before start is in it
+        self._heap = []
+        self._entries = {}
+        tasks = await get_deletion_tasks()
+        for task in tasks:
+            self.add(task)
+
+        self._runner = asyncio.create_task(self._run())
+        logger.info(f"⏲️ Deletion scheduler started as {INSTANCE_ID} ({len(tasks)} pending tasks replayed)")
+
+    async def stop(self):
+        if self._runner is None:
             return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
 
-        for task in due_tasks:
-            task_id = task["_id"]
-            chat_id = task["chat_id"]
-            bot_msg_id = task.get("bot_message_id")
-            user_msg_id = task.get("user_message_id")
+    def add(self, task: dict):
+        key = (task["chat_id"], task["bot_message_id"])
+        previous = self._entries.get(key)
+        if previous is not None:
+            previous[2] = None
 
-            # Try deleting bot message
-            if bot_msg_id:
-                try:
-                    await context.bot.delete_message(chat_id=chat_id, message_id=bot_msg_id)
-                except TelegramError as e:
-                    logger.warning(f"Failed to delete bot message {bot_msg_id} in {chat_id}: {e}")
+        entry = [task["delete_at"], next(self._counter), task]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+        # Wake the runner only when its current deadline moved earlier
+        if self._wakeup is not None and self._heap[0] is entry:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._entries)
+
+    def _discard_dead(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
 
-            # Try deleting user message
-            if user_msg_id:
+    def _pop_due(self, now: datetime) -> list[dict]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            task = heapq.heappop(self._heap)[2]
+            if task is not None:
+                del self._entries[(task["chat_id"], task["bot_message_id"])]
+                due.append(task)
+        return due
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            self._discard_dead()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+            if delay > 0:
                 try:
-                    await context.bot.delete_message(chat_id=chat_id, message_id=user_msg_id)
-                except TelegramError as e:
-                    logger.warning(f"Failed to delete user message {user_msg_id} in {chat_id}: {e}")
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            cutoff = datetime.utcnow() + timedelta(seconds=GROUP_WINDOW)
+            due = self._pop_due(cutoff)
+            try:
+                # Tasks another replica holds, or that were moved later, are not returned
+                claimed = await claim_deletion_tasks(
+                    [task["_id"] for task in due], INSTANCE_ID, cutoff, LEASE_SECONDS
+                )
+                if claimed:
+                    await self._execute(claimed)
+            except Exception as e:
+                logger.error(f"Error in deletion scheduler: {e}; retrying {len(due)} task(s)")
+                self._retry_later(due)
+
+    def _retry_later(self, tasks: list[dict]):
+        now = datetime.utcnow()
+        for task in tasks:
+            if (task["chat_id"], task["bot_message_id"]) in self._entries:
+                # Rescheduled while this round ran; the new entry wins
+                continue
+            retries = task.get("retries", 0)
+            delay = min(RETRY_DELAY * 2 ** retries, MAX_RETRY_DELAY)
+            self.add({**task, "delete_at": now + timedelta(seconds=delay), "retries": retries + 1})
+
+    async def reclaim(self, fencing_token: int) -> int:
+        overdue = datetime.utcnow() - timedelta(seconds=RECLAIM_GRACE)
+        tasks = await reclaim_deletion_tasks(INSTANCE_ID, overdue, LEASE_SECONDS, fencing_token)
+        for task in tasks:
+            self.add(task)
+        return len(tasks)
+
+    async def _execute(self, tasks: list[dict]):
+        by_chat: dict[int, list[int]] = {}
+        for task in tasks:
+            message_ids = by_chat.setdefault(task["chat_id"], [])
+            for key in ("bot_message_id", "user_message_id"):
+                if task.get(key):
+                    message_ids.append(task[key])
+
+        for chat_id, message_ids in by_chat.items():
+            for start in range(0, len(message_ids), DELETE_BATCH_SIZE):
+                await self._delete_group(chat_id, message_ids[start:start + DELETE_BATCH_SIZE])
 
-            # Remove from DB regardless of success/failure (to prevent infinite retry loops)
-            remove_deletion_task(task_id)
-            logger.info(f"🗑️ Processed auto-delete task {task_id}")
+        # Remove from DB regardless of success/failure (to prevent infinite retry loops)
+        await remove_deletion_tasks([task["_id"] for task in tasks], INSTANCE_ID)
+        logger.info(f"🗑️ Processed {len(tasks)} auto-delete task(s) in {len(by_chat)} chat(s)")
 
+    async def _delete_group(self, chat_id: int, message_ids: list[int]):
+        if not message_ids:
+            return
+
+        while True:
+            try:
+                # Ids that are already gone are skipped by Telegram
+                await self._bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+                return
+            except RetryAfter as e:
+                # Rate limited, not a bad id: one by one would only make it worse
+                await asyncio.sleep(e.retry_after)
+            except TelegramError as e:
+                # One message we may not delete fails the whole request
+                logger.warning(f"Bulk delete of {len(message_ids)} messages in {chat_id} failed: {e}; deleting one by one")
+                break
+
+        for message_id in message_ids:
+            try:
+                await self._bot.delete_message(chat_id=chat_id, message_id=message_id)
+            except TelegramError as e:
+                logger.warning(f"Failed to delete message {message_id} in {chat_id}: {e}")
+
+
+deletion_scheduler = DeletionScheduler()
+
+
+async def reclaim_deletions_job(context: ContextTypes.DEFAULT_TYPE, fencing_token: int):
+    """Leader-only job to take over deletions abandoned by stopped replicas."""
+    try:
+        reclaimed = await deletion_scheduler.reclaim(fencing_token)
+        if reclaimed:
+            logger.info(f"♻️ Reclaimed {reclaimed} abandoned auto-delete task(s)")
     except Exception as e:
-        logger.error(f"Error in process_deletions_job: {e}")
+        logger.error(f"Error in reclaim_deletions_job: {e}")
 
 
-def schedule_auto_delete(
+async def schedule_auto_delete(
     context: ContextTypes.DEFAULT_TYPE,
     chat_id: int,
     bot_message_id: int,
     user_message_id: int | None = None,
 ):
-    """Schedules a deletion by saving it to the database."""
+    """Journals a deletion in the database and hands it to the scheduler."""
     delete_at = datetime.utcnow() + timedelta(seconds=AUTO_DELETE_SECONDS)
-    schedule_db_deletion(
+    task = await schedule_db_deletion(
         chat_id=chat_id,
         bot_message_id=bot_message_id,
         user_message_id=user_message_id,
         delete_at=delete_at
     )
+    deletion_scheduler.add(task)
     logger.info(f"Scheduled persistent deletion for msg {bot_message_id} in {chat_id}")
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -35,6 +36,21 @@ CLIENT_CHANNEL_ID = int(
     else _required("PROD_CLIENT_CHANNEL_ID")
 )
 
+# Optional: source channels scanned by run_indexer.py (comma separated);
+# defaults to the DB channel alone
+INDEX_CHANNEL_IDS = [
+    int(x.strip())
+    for x in os.getenv("INDEX_CHANNEL_IDS", "").split(",")
+    if x.strip()
+] or [DB_CHANNEL_ID]
+
+# Optional: source channels the forwarder never forwards from (comma separated)
+FORWARD_BLACKLIST_CHANNEL_IDS = {
+    int(x.strip())
+    for x in os.getenv("FORWARD_BLACKLIST_CHANNEL_IDS", "").split(",")
+    if x.strip()
+}
+
 # Optional: Channel to collect small files
 _col_id_str = (
     os.getenv("TEST_COLLECTION_CHANNEL_ID") if MODE == "TEST"
@@ -55,6 +71,35 @@ AUTO_DELETE_SECONDS = int(
     os.getenv("AUTO_DELETE_SECONDS", "120")
 )
 
+# Optional: serve searches from an in-memory inverted index in the bot process
+IN_MEMORY_SEARCH = os.getenv("IN_MEMORY_SEARCH", "false").lower() in ("1", "true", "yes")
+
+SEARCH_INDEX_SYNC_SECONDS = int(
+    os.getenv("SEARCH_INDEX_SYNC_SECONDS", "60")
+)
+
+# "Did you mean" suggestions when a search finds nothing (0 disables them)
+SPELLCHECK_MAX_DISTANCE = int(
+    os.getenv("SPELLCHECK_MAX_DISTANCE", "2")
+)
+
+# Search result cache shared by /search and pagination (0 disables it)
+SEARCH_CACHE_SIZE = int(
+    os.getenv("SEARCH_CACHE_SIZE", "1000")
+)
+
+SEARCH_CACHE_TTL_SECONDS = int(
+    os.getenv("SEARCH_CACHE_TTL_SECONDS", "300")
+)
+
+# Threads used by the bot to run MongoDB calls off the event loop
+DB_EXECUTOR_WORKERS = int(
+    os.getenv("DB_EXECUTOR_WORKERS", "8")
+)
+
+# Identifies this bot process when several replicas share the database
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
 TG_API_ID = int(_required("TG_API_ID"))
 TG_API_HASH = _required("TG_API_HASH")
 
@@ -0,0 +1,116 @@
+import time
+from functools import wraps
+from telegram.ext import ContextTypes, JobQueue
+from app.utils.config import INSTANCE_ID
+from app.utils.logger import setup_logger
+from app.db.async_queries import acquire_leadership, release_leadership
+
+logger = setup_logger()
+
+# A crashed leader is replaced within LEASE + HEARTBEAT seconds; one that
+# shuts down cleanly releases the lease and is replaced at the next heartbeat
+LEADER_LEASE_SECONDS = 6
+LEADER_HEARTBEAT_SECONDS = 2
+
+
+class LeaderElection:
+    """
+    Elects one bot replica as leader through a lease document in MongoDB,
+    so periodic work that must happen once per fleet (not once per
+    process) runs on a single replica.
+
+    Every replica runs the heartbeat job. The leader renews its lease;
+    the others try to take it once it has expired. Each new lease comes
+    with a higher fencing `token`. Leader-only jobs are called with it and
+    must guard their writes with it, so that a leader which lost the lease
+    mid-job cannot overwrite its successor's work. A leader stops trusting
+    its lease when a renewal has not succeeded within the lease time,
+    before any other replica can take it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        instance_id: str = INSTANCE_ID,
+        lease_seconds: float = LEADER_LEASE_SECONDS,
+        heartbeat_seconds: float = LEADER_HEARTBEAT_SECONDS,
+    ):
+        self.name = name
+        self.instance_id = instance_id
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.token: int | None = None
+        self._valid_until = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None and time.monotonic() < self._valid_until
+
+    async def heartbeat(self, context: ContextTypes.DEFAULT_TYPE | None = None):
+        # Measured from before the request, so the local view of the lease
+        # always ends before the one stored in the database
+        started = time.monotonic()
+        was_leader = self.is_leader
+
+        try:
+            token = await acquire_leadership(self.name, self.instance_id, self.lease_seconds, self.token)
+        except Exception as e:
+            # Not renewed: a current lease simply runs out locally
+            logger.error(f"Leader heartbeat for {self.name} failed: {e}")
+            return
+
+        if token is not None:
+            if token != self.token or not was_leader:
+                logger.info(f"👑 {self.instance_id} is now the {self.name} leader (token {token})")
+            self._valid_until = started + self.lease_seconds
+        elif was_leader:
+            logger.warning(f"👋 {self.instance_id} lost the {self.name} leadership")
+
+        self.token = token
+
+    async def release(self):
+        if self.token is None:
+            return
+        try:
+            await release_leadership(self.name, self.instance_id, self.token)
+        except Exception as e:
+            logger.error(f"Could not release the {self.name} leadership: {e}")
+        self.token = None
+
+    def register(self, job_queue: JobQueue):
+        job_queue.run_repeating(
+            self.heartbeat,
+            interval=self.heartbeat_seconds,
+            first=0,
+            name=f"leader_heartbeat_{self.name}",
+        )
+
+    def leader_only(self, callback):
+        """
+        Wrap a job callback so it only runs on the current leader. The
+        callback is called as callback(context, fencing_token).
+        """
+
+        @wraps(callback)
+        async def wrapper(context: ContextTypes.DEFAULT_TYPE):
+            if not self.is_leader:
+                return
+            await callback(context, self.token)
+
+        return wrapper
+
+    def schedule(
+        self,
+        job_queue: JobQueue,
+        callback,
+        interval: float,
+        first: float | None = None,
+        leader_only: bool = False,
+    ):
+        """
+        Register a repeating job that runs either on every replica (e.g.
+        refreshing in-process state) or only on the leader.
+        """
+        if leader_only:
+            callback = self.leader_only(callback)
+        return job_queue.run_repeating(callback, interval=interval, first=first)
@@ -0,0 +1,140 @@
+import re
+
+# Release names look like "KGF.Chapter.2.2022.1080p.WEB-DL.x264.Tamil.mkv" or
+# "Money Heist S01E01 720p HEVC". Qualifiers are pulled out into fields the
+# search can filter on with indexed equality; whatever comes before the
+# first qualifier is the title.
+
+_SEPARATORS_RE = re.compile(r"[.\-_()\[\]+{}]+")
+_SPACES_RE = re.compile(r"\s+")
+_EXTENSION_RE = re.compile(r"\.(mkv|mp4|avi|mov|m4v|webm|ts|wmv|flv|3gp)$", re.IGNORECASE)
+
+YEAR_RE = re.compile(r"\b(19[3-9]\d|20[0-4]\d)\b")
+SEASON_EPISODE_RE = re.compile(r"\bs(\d{1,2}) ?e(\d{1,3})\b")
+SEASON_RE = re.compile(r"\b(?:s|season )(\d{1,2})\b")
+EPISODE_RE = re.compile(r"\b(?:ep|episode )(\d{1,3})\b")
+RESOLUTION_RE = re.compile(r"\b(360|480|540|576|720|1080|1440|2160)p\b|\b(4k|uhd)\b")
+CODEC_RE = re.compile(r"\b(x ?264|h ?264|avc|x ?265|h ?265|hevc|av1|xvid|vp9)\b")
+
+CODECS = {
+    "x264": "x264", "h264": "x264", "avc": "x264",
+    "x265": "x265", "h265": "x265", "hevc": "x265",
+    "av1": "av1",
+    "xvid": "xvid",
+    "vp9": "vp9",
+}
+
+LANGUAGES = {
+    "tamil": "tamil", "tam": "tamil",
+    "telugu": "telugu", "tel": "telugu",
+    "hindi": "hindi", "hin": "hindi",
+    "malayalam": "malayalam", "mal": "malayalam",
+    "kannada": "kannada", "kan": "kannada",
+    "english": "english", "eng": "english",
+    "bengali": "bengali", "marathi": "marathi", "punjabi": "punjabi",
+    "korean": "korean", "japanese": "japanese", "chinese": "chinese",
+    "spanish": "spanish", "french": "french",
+}
+LANGUAGE_RE = re.compile(r"\b(" + "|".join(sorted(LANGUAGES, key=len, reverse=True)) + r")\b")
+
+# Stored on movie documents; also the filters search understands
+RELEASE_FIELDS = ("title", "year", "season", "episode", "resolution", "codec", "languages")
+
+
+def _normalize(text: str) -> str:
+    text = _SEPARATORS_RE.sub(" ", text.lower())
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def _extract(text: str) -> tuple[dict, list[tuple[int, int]]]:
+    """Qualifier values and the (start, end) spans they were read from."""
+    fields = {}
+    spans = []
+
+    match = SEASON_EPISODE_RE.search(text)
+    if match:
+        fields["season"] = int(match.group(1))
+        fields["episode"] = int(match.group(2))
+        spans.append(match.span())
+    else:
+        match = SEASON_RE.search(text)
+        if match:
+            fields["season"] = int(match.group(1))
+            spans.append(match.span())
+        match = EPISODE_RE.search(text)
+        if match:
+            fields["episode"] = int(match.group(1))
+            spans.append(match.span())
+
+    # The release year is the last one; a year at the very start is usually
+    # the title ("1917", "2012") and earlier ones belong to it ("Blade Runner 2049")
+    years = [match for match in YEAR_RE.finditer(text) if match.start() > 0]
+    if years:
+        fields["year"] = int(years[-1].group(1))
+        spans.append(years[-1].span())
+
+    match = RESOLUTION_RE.search(text)
+    if match:
+        fields["resolution"] = f"{match.group(1)}p" if match.group(1) else "2160p"
+        spans.append(match.span())
+
+    match = CODEC_RE.search(text)
+    if match:
+        fields["codec"] = CODECS[match.group(1).replace(" ", "")]
+        spans.append(match.span())
+
+    languages = []
+    for match in LANGUAGE_RE.finditer(text):
+        language = LANGUAGES[match.group(1)]
+        if language not in languages:
+            languages.append(language)
+        spans.append(match.span())
+    if languages:
+        fields["languages"] = languages
+
+    return fields, spans
+
+
+def parse_release_name(file_name: str) -> dict:
+    """
+    Structured metadata for a release file name. Only fields that were
+    recognised are returned, plus the title which is always present.
+    """
+    text = _normalize(_EXTENSION_RE.sub("", file_name or ""))
+    fields, spans = _extract(text)
+
+    title_end = min((start for start, _ in spans), default=len(text))
+    title_tokens = [
+        token for token in text[:title_end].split()
+        # Uploader tags such as "@TamilMV" often lead the name
+        if not token.startswith("@")
+    ]
+    fields["title"] = " ".join(title_tokens) or text
+
+    return fields
+
+
+def parse_query_qualifiers(normalized_query: str) -> tuple[str, dict]:
+    """
+    Split a normalized search query into its title part and the qualifier
+    filters (year, season, episode, resolution, codec, language) it names.
+    Returns (normalized_query, {}) when there is no title left to search for.
+    """
+    fields, spans = _extract(normalized_query)
+    if not spans:
+        return normalized_query, {}
+
+    title = normalized_query
+    for start, end in sorted(spans, reverse=True):
+        title = title[:start] + " " + title[end:]
+    title = _SPACES_RE.sub(" ", title).strip()
+
+    if not title:
+        return normalized_query, {}
+
+    filters = {key: value for key, value in fields.items() if key != "languages"}
+    if "languages" in fields:
+        # Multikey equality: any matching audio language
+        filters["languages"] = fields["languages"][0]
+
+    return title, filters
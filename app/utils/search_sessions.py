@@ -0,0 +1,84 @@
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from app.utils.config import AUTO_DELETE_SECONDS
+
+# Sessions outlive the result message by a little so a click that races
+# the auto-delete still finds its results.
+SESSION_GRACE_SECONDS = 30
+MAX_SESSIONS = 10000
+
+
+class SearchSessionStore:
+    """
+    Ranked search results kept server-side under a short id, so pagination
+    buttons carry `search|<id>|<page>` instead of the query text and every
+    page is a slice of the list computed by the first search.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int = MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        # Ordered by last use, so expired sessions collect at the front
+        self._sessions: OrderedDict[str, dict] = OrderedDict()
+        self._lock = Lock()
+
+    def create(self, query: str, search: dict) -> str:
+        session_id = secrets.token_urlsafe(8)
+
+        with self._lock:
+            self._purge()
+            self._sessions[session_id] = {
+                "query": query,
+                "ranked": search["ranked"],
+                "total": search["total"],
+                "capped": search["capped"],
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+
+        return session_id
+
+    def get(self, session_id: str) -> dict | None:
+        """Return the session and push its expiry back, like its message's auto-delete."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+
+            now = time.monotonic()
+            if session["expires_at"] <= now:
+                del self._sessions[session_id]
+                return None
+
+            session["expires_at"] = now + self.ttl_seconds
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def update(self, session_id: str, search: dict):
+        """Replace the ranked list after a deeper page had to be fetched."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.update(
+                    ranked=search["ranked"],
+                    total=search["total"],
+                    capped=search["capped"],
+                )
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _purge(self):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["expires_at"] > now and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+
+search_sessions = SearchSessionStore(
+    ttl_seconds=AUTO_DELETE_SECONDS + SESSION_GRACE_SECONDS,
+)
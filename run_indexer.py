@@ -1,4 +1,55 @@
+import argparse
 import asyncio
 from app.indexer.telethon_scanner import run_telethon_indexer
+from app.utils.config import INDEX_CHANNEL_IDS
 
-asyncio.run(run_telethon_indexer())
+parser = argparse.ArgumentParser(description="Index movie files from Telegram channels")
+parser.add_argument(
+    "channels",
+    type=int,
+    nargs="*",
+    help="source channel ids (default: INDEX_CHANNEL_IDS, or the DB channel)",
+)
+parser.add_argument(
+    "--backfill",
+    action="store_true",
+    help="scan one large channel in parallel message-id ranges",
+)
+parser.add_argument(
+    "--watch",
+    action="store_true",
+    help="after catching up, keep following new, edited and deleted messages",
+)
+parser.add_argument(
+    "--takeout",
+    action="store_true",
+    help="export channels with a large backlog through a takeout session",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=4,
+    help="ranges scanned at the same time in --backfill mode",
+)
+parser.add_argument(
+    "--session",
+    dest="sessions",
+    action="append",
+    help="extra logged-in Telethon session to spread --backfill ranges over (repeatable)",
+)
+args = parser.parse_args()
+
+if args.backfill:
+    from app.indexer.range_backfill import run_range_backfill
+
+    channels = args.channels or INDEX_CHANNEL_IDS
+    if len(channels) != 1:
+        parser.error("--backfill takes exactly one channel")
+
+    asyncio.run(run_range_backfill(channels[0], workers=args.workers, extra_sessions=args.sessions))
+elif args.watch:
+    from app.indexer.watcher import run_watcher
+
+    asyncio.run(run_watcher(args.channels or None))
+else:
+    asyncio.run(run_telethon_indexer(args.channels or None, takeout=args.takeout))
@@ -0,0 +1,68 @@
+
+import sys
+import os
+from datetime import datetime
+from pymongo import UpdateOne
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.db.connection import get_db
+from app.db.models import MOVIES_COLLECTION, ensure_indexes
+from app.db.queries import build_search_fields
+from app.indexer.dedupe import cluster_id
+from app.utils.release_parser import parse_release_name
+
+BATCH_SIZE = 1000
+
+
+def backfill_search_fields(rebuild: bool = False):
+    print("🚀 Starting Search Fields Backfill...")
+    db = get_db()
+    movies = db[MOVIES_COLLECTION]
+
+    ensure_indexes()
+
+    query = {} if rebuild else {
+        "$or": [
+            {"search_tokens": {"$exists": False}},
+            {"title": {"$exists": False}},
+            {"cluster_id": {"$exists": False}},
+        ]
+    }
+    total = movies.count_documents(query)
+    print(f"📽️  Movies to update: {total}")
+
+    updated = 0
+    batch = []
+
+    projection = {"_id": 1, "normalized_text": 1, "file_name": 1, "file_size": 1, "duration": 1}
+    cursor = movies.find(query, projection).batch_size(BATCH_SIZE)
+    for doc in cursor:
+        release = parse_release_name(doc.get("file_name") or "")
+        batch.append(
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {
+                    **build_search_fields(doc.get("normalized_text") or ""),
+                    **release,
+                    "cluster_id": cluster_id({**doc, **release}),
+                    # Lets running bots pick the change up in their memory sync
+                    "updated_at": datetime.utcnow(),
+                }},
+            )
+        )
+
+        if len(batch) >= BATCH_SIZE:
+            updated += movies.bulk_write(batch, ordered=False).modified_count
+            batch = []
+            print(f"   ✅ {updated}/{total}")
+
+    if batch:
+        updated += movies.bulk_write(batch, ordered=False).modified_count
+
+    print(f"🏁 Backfill Complete! Updated {updated} movies")
+
+
+if __name__ == "__main__":
+    backfill_search_fields(rebuild="--rebuild" in sys.argv)
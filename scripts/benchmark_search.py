@@ -0,0 +1,248 @@
+"""
+Search Benchmark
+================
+Generates a synthetic catalog of release file names and measures
+normalize_query, search_movies and count_movies against it.
+
+Backends:
+  memory - the in-memory SearchIndex used when IN_MEMORY_SEARCH is on
+  mongo  - a scratch collection in the database from DB_URI
+           (point DB_URI at a local mongod, never production)
+
+Usage:
+  python scripts/benchmark_search.py --sizes 10000 100000 --backend memory
+  python scripts/benchmark_search.py --sizes 10000 --backend mongo --output bench.json
+
+The JSON output is stable between runs so two releases can be diffed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.db import models, queries
+from app.db.search_cache import SearchCache
+from app.db.search_index import SearchIndex, set_search_index
+from app.utils.release_parser import parse_release_name
+
+BENCH_COLLECTION = "bench_movies"
+INSERT_BATCH_SIZE = 5000
+
+TITLE_WORDS = [
+    "dark", "knight", "money", "heist", "kgf", "chapter", "avengers", "endgame",
+    "jailer", "leo", "vikram", "pushpa", "rise", "rule", "salaar", "ceasefire",
+    "animal", "jawan", "pathaan", "dunki", "stranger", "things", "breaking", "bad",
+    "house", "dragon", "lord", "rings", "power", "boys", "family", "man", "hit",
+    "third", "case", "drishyam", "manjummel", "premalu", "aavesham", "kantara",
+    "oppenheimer", "barbie", "dune", "part", "two", "godzilla", "kong", "empire",
+    "planet", "apes", "kingdom", "inside", "out", "deadpool", "wolverine", "joker",
+    "folie", "deux", "gladiator", "wicked", "moana", "venom", "last", "dance",
+]
+YEARS = list(range(1995, 2025))
+RESOLUTIONS = ["480p", "720p", "1080p", "2160p"]
+SOURCES = ["WEB-DL", "WEBRip", "BluRay", "HDRip", "HDTV", "PreDVD"]
+CODECS = ["x264", "x265", "HEVC", "H.264", "AV1", "10bit"]
+AUDIO = ["AAC", "DD5.1", "DDP5.1", "Atmos", "ESub", "MSub"]
+LANGUAGES = ["Tamil", "Telugu", "Hindi", "Malayalam", "Kannada", "English", "Dual Audio", "Multi"]
+TAGS = ["@TamilMV", "@MoviesHub", "[HDHub4u]", "TheMoviesBoss", "Team_CNH"]
+EXTENSIONS = [".mkv", ".mp4", ".avi"]
+
+
+def _title(rng: random.Random) -> str:
+    words = rng.sample(TITLE_WORDS, rng.choice([1, 1, 2, 2, 2, 3, 4]))
+    return " ".join(word.capitalize() for word in words)
+
+
+def generate_release_names(count: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    # Popular titles get many uploads (different qualities, languages, episodes)
+    titles = [_title(rng) for _ in range(max(count // 8, 10))]
+
+    names = []
+    for _ in range(count):
+        title = rng.choice(titles)
+        dotted = title.replace(" ", rng.choice([".", "_", " "]))
+        year = rng.choice(YEARS)
+        res = rng.choice(RESOLUTIONS)
+        ext = rng.choice(EXTENSIONS)
+
+        style = rng.random()
+        if style < 0.35:
+            name = f"{dotted}.{year}.{res}.{rng.choice(SOURCES)}.{rng.choice(CODECS)}.{rng.choice(AUDIO)}{ext}"
+        elif style < 0.55:
+            name = f"{title} ({year}) [{res}] {rng.choice(LANGUAGES)} {rng.choice(CODECS)}{ext}"
+        elif style < 0.80:
+            season, episode = rng.randint(1, 6), rng.randint(1, 12)
+            name = f"{dotted}.S{season:02d}E{episode:02d}.{res}.{rng.choice(SOURCES)}.{rng.choice(CODECS)}{ext}"
+        else:
+            name = f"{rng.choice(TAGS)} - {title} {year} {rng.choice(LANGUAGES)} {res} {rng.choice(SOURCES)}{ext}"
+
+        names.append(name)
+
+    return names
+
+
+def build_documents(names: list[str]) -> list[dict]:
+    docs = []
+    for message_id, name in enumerate(names, start=1):
+        normalized_text = queries.normalize_query(name)
+        docs.append({
+            "message_id": message_id,
+            "channel_id": -1000000000001,
+            "file_id": f"bench-{message_id}",
+            "file_unique_id": f"bench-{message_id}",
+            "file_name": name,
+            "file_size": 700 * 1024 * 1024,
+            "caption": "",
+            "mime_type": "video/x-matroska",
+            "normalized_text": normalized_text,
+            **queries.build_search_fields(normalized_text),
+            **parse_release_name(name),
+        })
+    return docs
+
+
+def generate_queries(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    generated = []
+    for _ in range(count):
+        title = _title(rng).lower()
+        style = rng.random()
+        if style < 0.40:
+            generated.append(title)
+        elif style < 0.55:
+            generated.append(f"{title} {rng.choice(YEARS)}")
+        elif style < 0.70:
+            generated.append(f"{title} {rng.choice(LANGUAGES).lower()}")
+        elif style < 0.80:
+            generated.append(f"{title} s{rng.randint(1, 6)}e{rng.randint(1, 12)}")
+        elif style < 0.90:
+            generated.append(rng.choice(TITLE_WORDS)[:3])
+        else:
+            # Misspelled / missing titles
+            generated.append(f"{title}x")
+    return generated
+
+
+def _percentile(sorted_samples: list[float], pct: float) -> float:
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def measure(func, inputs: list) -> dict:
+    samples = []
+    started = time.perf_counter()
+    for value in inputs:
+        t0 = time.perf_counter()
+        func(value)
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "p50_ms": round(_percentile(samples, 50), 4),
+        "p95_ms": round(_percentile(samples, 95), 4),
+        "p99_ms": round(_percentile(samples, 99), 4),
+        "ops_per_sec": round(len(samples) / elapsed, 1) if elapsed else None,
+    }
+
+
+def load_backend(backend: str, docs: list[dict]):
+    if backend == "memory":
+        index = SearchIndex()
+        for doc in docs:
+            index.add(doc)
+        set_search_index(index)
+        return
+
+    from app.db.connection import get_db
+
+    set_search_index(None)
+    db = get_db()
+
+    # Run the real pipeline against a scratch collection with the same indexes
+    queries.MOVIES_COLLECTION = BENCH_COLLECTION
+    models.MOVIES_COLLECTION = BENCH_COLLECTION
+
+    db[BENCH_COLLECTION].drop()
+    # Only the scratch collection's indexes; the rest of the database is left alone
+    models.ensure_movie_indexes(db[BENCH_COLLECTION])
+    for start in range(0, len(docs), INSERT_BATCH_SIZE):
+        db[BENCH_COLLECTION].insert_many(docs[start:start + INSERT_BATCH_SIZE], ordered=False)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark movie search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--output", default="search_benchmark.json")
+    args = parser.parse_args()
+
+    # Measure the search itself, not the result cache
+    queries._search_cache = SearchCache(max_entries=0, ttl_seconds=0)
+
+    bench_queries = generate_queries(args.queries)
+    report = {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "queries": args.queries,
+        "results": {},
+    }
+
+    for size in args.sizes:
+        print(f"🧪 Corpus of {size} release names ({args.backend})...")
+        docs = build_documents(generate_release_names(size))
+
+        started = time.perf_counter()
+        load_backend(args.backend, docs)
+        load_seconds = time.perf_counter() - started
+        del docs
+
+        report["results"][str(size)] = {
+            "load_seconds": round(load_seconds, 2),
+            "normalize_query": measure(queries.normalize_query, bench_queries),
+            "search_movies": measure(lambda q: queries.search_movies(q, limit=5, offset=0), bench_queries),
+            "count_movies": measure(queries.count_movies, bench_queries),
+        }
+
+        for name in ("normalize_query", "search_movies", "count_movies"):
+            stats = report["results"][str(size)][name]
+            print(
+                f"   {name:16} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+                f"p99={stats['p99_ms']}ms ({stats['ops_per_sec']}/s)"
+            )
+
+    if args.backend == "mongo":
+        from app.db.connection import get_db
+        get_db()[BENCH_COLLECTION].drop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"🏁 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from app.db import async_queries
+
+
+def _slow_search(query, limit, offset):
+    # Stands in for a blocking pymongo aggregation
+    time.sleep(0.2)
+    return {"results": [], "total": 0, "capped": False, "ranked": []}
+
+
+class TestAsyncQueries(unittest.TestCase):
+    def test_concurrent_searches_overlap(self):
+        async def run():
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                async_queries.search_movies_page(f"movie {i}", limit=5, offset=0)
+                for i in range(4)
+            ])
+            return time.perf_counter() - started
+
+        with mock.patch("app.db.queries.search_movies_page", _slow_search):
+            elapsed = asyncio.run(run())
+
+        # Serialized on the event loop this would take ~0.8s
+        self.assertLess(elapsed, 0.5)
+
+    def test_event_loop_stays_responsive(self):
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await async_queries.search_movies_page("movie", limit=5, offset=0)
+            task.cancel()
+            return ticks
+
+        with mock.patch("app.db.queries.search_movies_page", _slow_search):
+            self.assertGreater(asyncio.run(run()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import asyncio
+import unittest
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+
+from app.db import queries
+from app.indexer import bulk_writer
+from app.indexer.bulk_writer import BufferedMovieWriter
+
+CHANNEL = -1001
+
+
+def _movie(message_id, file_unique_id=None):
+    return {
+        "channel_id": CHANNEL,
+        "message_id": message_id,
+        "file_unique_id": file_unique_id or f"file-{message_id}",
+        "file_name": f"Leo 2023 {message_id}.mkv",
+        "normalized_text": f"leo 2023 {message_id} mkv",
+    }
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestInsertMovies(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.db[queries.MOVIES_COLLECTION].create_index(
+            [("file_unique_id", ASCENDING), ("channel_id", ASCENDING)],
+            unique=True,
+            name="unique_file_channel",
+        )
+
+        for target, value in [
+            ("get_db", mock.Mock(return_value=self.db)),
+            ("get_search_index", mock.Mock(return_value=None)),
+            ("get_spelling_index", mock.Mock(return_value=None)),
+        ]:
+            patch = mock.patch.object(queries, target, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_duplicates_are_counted_and_the_rest_inserted(self):
+        queries.insert_movies([_movie(1)])
+
+        inserted, duplicates = queries.insert_movies([_movie(2), _movie(3, "file-1"), _movie(4)])
+
+        self.assertEqual((inserted, duplicates), (2, 1))
+        self.assertEqual(
+            sorted(doc["message_id"] for doc in self.db[queries.MOVIES_COLLECTION].find()),
+            [1, 2, 4],
+        )
+
+    def test_other_write_errors_are_raised(self):
+        error = BulkWriteError({
+            "writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}],
+            "writeConcernErrors": [],
+        })
+        collection = self.db[queries.MOVIES_COLLECTION]
+        with mock.patch.object(type(collection), "insert_many", side_effect=error):
+            with self.assertRaises(BulkWriteError):
+                queries.insert_movies([_movie(1)])
+
+
+class TestBufferedMovieWriter(unittest.TestCase):
+    def setUp(self):
+        self.checkpoints = []
+        self.batches = []
+
+    def insert(self, batch):
+        # The checkpoint must not have moved past this batch yet
+        self.batches.append(([doc["message_id"] for doc in batch], list(self.checkpoints)))
+        return len(batch), 0
+
+    def writer(self, **kwargs):
+        return BufferedMovieWriter(CHANNEL, checkpoint=self.checkpoints.append, **kwargs)
+
+    def test_checkpoint_advances_after_the_batch_is_written(self):
+        async def run():
+            writer = self.writer(batch_size=2, flush_interval=60)
+            await writer.add(_movie(1))
+            await writer.scanned(2)
+            self.assertEqual(self.checkpoints, [])
+
+            await writer.add(_movie(3))
+            await writer.flush()
+            return writer
+
+        with mock.patch.object(bulk_writer, "insert_movies", side_effect=self.insert):
+            writer = asyncio.run(run())
+
+        self.assertEqual(self.batches, [([1, 3], [])])
+        self.assertEqual(self.checkpoints, [3])
+        self.assertEqual(writer.inserted, 2)
+
+    def test_failed_batch_keeps_the_checkpoint(self):
+        async def run():
+            writer = self.writer(batch_size=10, flush_interval=60)
+            await writer.add(_movie(1))
+            await writer.flush()
+
+        with mock.patch.object(bulk_writer, "insert_movies", side_effect=RuntimeError("down")):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(run())
+
+        self.assertEqual(self.checkpoints, [])
+
+    def test_flushes_after_the_time_limit(self):
+        async def run():
+            writer = self.writer(batch_size=100, flush_interval=2)
+            with mock.patch.object(bulk_writer.time, "monotonic", return_value=writer._last_flush + 1):
+                await writer.add(_movie(1))
+            with mock.patch.object(bulk_writer.time, "monotonic", return_value=writer._last_flush + 2):
+                await writer.add(_movie(2))
+            # Written in the background; flush waits for it
+            await writer.flush()
+
+        with mock.patch.object(bulk_writer, "insert_movies", side_effect=self.insert):
+            asyncio.run(run())
+
+        self.assertEqual(self.batches, [([1, 2], [])])
+        self.assertEqual(self.checkpoints, [2])
+
+    def test_scanning_goes_on_while_a_batch_is_written(self):
+        async def run():
+            writer = self.writer(batch_size=1, flush_interval=60)
+            release = asyncio.Event()
+
+            async def slow_write(batch, checkpoint):
+                await release.wait()
+
+            with mock.patch.object(writer, "_write", side_effect=slow_write):
+                await writer.add(_movie(1))
+                # The first batch is still in flight; the next add is buffered
+                writer.batch_size = 10
+                await writer.add(_movie(2))
+                self.assertEqual([doc["message_id"] for doc in writer._buffer], [2])
+                self.assertFalse(writer._writing.done())
+                release.set()
+                await writer.flush()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from app.indexer.dedupe import cluster_id, fingerprint
+
+
+class TestDedupe(unittest.TestCase):
+    def test_reuploads_share_a_cluster(self):
+        original = {"file_name": "Leo.2023.1080p.WEB-DL.mkv", "file_size": 2_147_483_648, "duration": 9640}
+        reupload = {"file_name": "@Uploads Leo (2023) 1080p.mkv", "file_size": 2_147_483_648, "duration": 9640.4}
+
+        self.assertEqual(cluster_id(original), cluster_id(reupload))
+
+    def test_different_encodes_stay_apart(self):
+        a = {"file_name": "Leo.2023.1080p.mkv", "file_size": 2_147_483_648, "duration": 9640}
+        b = {"file_name": "Leo.2023.720p.mkv", "file_size": 1_073_741_824, "duration": 9640}
+
+        self.assertNotEqual(cluster_id(a), cluster_id(b))
+
+    def test_parsed_title_is_used(self):
+        metadata = {"file_name": "whatever.mkv", "title": "leo", "file_size": 10}
+        self.assertEqual(cluster_id(metadata), fingerprint("leo", 10))
+
+    def test_no_cluster_without_size(self):
+        self.assertIsNone(cluster_id({"file_name": "Leo.2023.mkv", "file_size": None}))
+
+
+if __name__ == "__main__":
+    unittest.main()
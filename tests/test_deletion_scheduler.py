@@ -0,0 +1,184 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+from telegram.error import BadRequest
+
+from app.db import queries
+from app.utils import auto_delete
+from app.utils.auto_delete import DeletionScheduler
+
+
+class _Bot:
+    def __init__(self, bulk_fails=False):
+        self.bulk_fails = bulk_fails
+        self.requests = []
+        self.deleted = []
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.requests.append((chat_id, list(message_ids)))
+        if self.bulk_fails:
+            raise BadRequest("Message can't be deleted")
+        for message_id in message_ids:
+            self.deleted.append((chat_id, message_id, datetime.utcnow()))
+
+    async def delete_message(self, chat_id, message_id):
+        self.requests.append((chat_id, message_id))
+        self.deleted.append((chat_id, message_id, datetime.utcnow()))
+
+
+def _task(task_id, seconds, chat_id=1, user_message_id=None):
+    return {
+        "_id": task_id,
+        "chat_id": chat_id,
+        "bot_message_id": task_id,
+        "user_message_id": user_message_id,
+        "delete_at": datetime.utcnow() + timedelta(seconds=seconds),
+    }
+
+
+class TestDeletionScheduler(unittest.TestCase):
+    def run_scheduler(self, journal, added=(), wait=0.3, bot=None, held_elsewhere=(), claim_failures=0):
+        bot = bot or _Bot()
+        removed = []
+        failures = [claim_failures]
+
+        async def get_tasks():
+            return list(journal)
+
+        async def claim(task_ids, owner, due_before, lease_seconds):
+            if failures[0]:
+                failures[0] -= 1
+                raise ConnectionError("database unavailable")
+            tasks = {task["_id"]: task for task in [*journal, *added]}
+            return [tasks[task_id] for task_id in task_ids if task_id not in held_elsewhere]
+
+        async def remove(task_ids, owner):
+            removed.append(list(task_ids))
+            return len(task_ids)
+
+        async def run():
+            scheduler = DeletionScheduler()
+            await scheduler.start(bot)
+            for task in added:
+                scheduler.add(task)
+            await asyncio.sleep(wait)
+            await scheduler.stop()
+            return scheduler
+
+        with mock.patch.object(auto_delete, "get_deletion_tasks", get_tasks), \
+                mock.patch.object(auto_delete, "claim_deletion_tasks", claim), \
+                mock.patch.object(auto_delete, "remove_deletion_tasks", remove):
+            scheduler = asyncio.run(run())
+        return bot, removed, scheduler
+
+    def test_replays_journal_and_fires_in_order(self):
+        journal = [_task(1, -60), _task(2, 1.3), _task(3, 60)]
+        bot, removed, scheduler = self.run_scheduler(journal, added=[_task(4, 1.2)], wait=1.5)
+
+        self.assertEqual([message_id for _, message_id, _ in bot.deleted], [1, 4, 2])
+        self.assertEqual(sum(removed, []), [1, 4, 2])
+        self.assertEqual(scheduler.pending(), 1)
+
+    def test_groups_due_deletions_per_chat(self):
+        journal = [
+            _task(1, -1, chat_id=10, user_message_id=101),
+            _task(2, 0, chat_id=20),
+            _task(3, 0.5, chat_id=10, user_message_id=103),
+        ]
+        bot, removed, _ = self.run_scheduler(journal)
+
+        self.assertEqual(bot.requests, [(10, [1, 101, 3, 103]), (20, [2])])
+        self.assertEqual(removed, [[1, 2, 3]])
+
+    def test_only_claimed_tasks_are_executed(self):
+        journal = [_task(1, -1), _task(2, -1)]
+        bot, removed, _ = self.run_scheduler(journal, held_elsewhere={1})
+
+        self.assertEqual(bot.requests, [(1, [2])])
+        self.assertEqual(removed, [[2]])
+
+    def test_failed_round_is_retried(self):
+        with mock.patch.object(auto_delete, "RETRY_DELAY", 0.05):
+            bot, removed, scheduler = self.run_scheduler([_task(1, -1)], claim_failures=2)
+
+        self.assertEqual([message_id for _, message_id, _ in bot.deleted], [1])
+        self.assertEqual(removed, [[1]])
+        self.assertEqual(scheduler.pending(), 0)
+
+    def test_falls_back_to_single_deletes(self):
+        journal = [_task(1, -1, user_message_id=101)]
+        bot, removed, _ = self.run_scheduler(journal, bot=_Bot(bulk_fails=True))
+
+        self.assertEqual(bot.requests, [(1, [1, 101]), (1, 1), (1, 101)])
+        self.assertEqual(removed, [[1]])
+
+    def test_fires_close_to_delete_at(self):
+        task = _task(1, 0.1)
+        bot, _, _ = self.run_scheduler([], added=[task])
+
+        lateness = (bot.deleted[0][2] - task["delete_at"]).total_seconds()
+        self.assertGreaterEqual(lateness, 0)
+        self.assertLess(lateness, 0.1)
+
+    def test_reschedule_moves_the_existing_task(self):
+        first = _task(1, 0.1)
+        later = {**first, "delete_at": first["delete_at"] + timedelta(seconds=60)}
+        bot, removed, scheduler = self.run_scheduler([first], added=[later])
+
+        self.assertEqual(bot.deleted, [])
+        self.assertEqual(removed, [])
+        self.assertEqual(scheduler.pending(), 1)
+
+    def test_idle_scheduler_does_no_work(self):
+        bot, removed, _ = self.run_scheduler([], wait=0.1)
+        self.assertEqual(bot.deleted, [])
+        self.assertEqual(removed, [])
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestDeletionLeaseQueries(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        patch = mock.patch.object(queries, "get_db", return_value=self.db)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.now = datetime.utcnow()
+        self.task = queries.schedule_db_deletion(1, 10, 9, self.now - timedelta(seconds=1))
+
+    def claim(self, owner, due_before=None):
+        return queries.claim_deletion_task(self.task["_id"], owner, due_before or self.now, lease_seconds=60)
+
+    def test_live_lease_of_another_replica_is_refused(self):
+        self.assertEqual(self.claim("a")["owner"], "a")
+        self.assertIsNone(self.claim("b"))
+
+    def test_expired_lease_is_taken_over(self):
+        self.claim("a")
+        self.db[queries.DELETIONS_COLLECTION].update_one(
+            {"_id": self.task["_id"]}, {"$set": {"lease_expires": self.now - timedelta(seconds=1)}}
+        )
+        self.assertEqual(self.claim("b")["owner"], "b")
+
+    def test_rescheduled_task_is_refused_until_due(self):
+        queries.schedule_db_deletion(1, 10, None, self.now + timedelta(seconds=60))
+        self.assertIsNone(self.claim("a"))
+        self.assertEqual(self.claim("a", due_before=self.now + timedelta(seconds=61))["user_message_id"], 9)
+
+    def test_reschedule_keeps_a_live_lease(self):
+        self.claim("a")
+        task = queries.schedule_db_deletion(1, 10, None, self.now + timedelta(seconds=60))
+
+        self.assertEqual(task["owner"], "a")
+        self.assertIsNone(self.claim("b", due_before=self.now + timedelta(seconds=61)))
+
+
+if __name__ == "__main__":
+    unittest.main()
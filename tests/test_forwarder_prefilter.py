@@ -0,0 +1,39 @@
+import unittest
+
+from app.forwarder.prefilter import skip_reason
+
+GB = 1024 * 1024 * 1024
+
+
+def movie(**fields):
+    return {"message_id": 1, "file_name": "Movie.2020.1080p.mkv", "file_size": GB, "mime_type": "video/x-matroska", **fields}
+
+
+class TestPrefilter(unittest.TestCase):
+    def test_video_within_limit_is_fetched(self):
+        self.assertIsNone(skip_reason(movie(), max_size=2 * GB))
+        self.assertIsNone(skip_reason(movie(mime_type="application/x-matroska"), max_size=2 * GB))
+
+    def test_size_limit(self):
+        self.assertEqual(skip_reason(movie(file_size=3 * GB), max_size=2 * GB), "size")
+        self.assertEqual(skip_reason(movie(file_size=None), max_size=2 * GB), "size")
+
+    def test_mime_allow_list(self):
+        self.assertEqual(
+            skip_reason(movie(file_name="poster.jpg", mime_type="image/jpeg"), max_size=2 * GB),
+            "mime type image/jpeg",
+        )
+
+    def test_generic_mime_falls_back_to_extension(self):
+        self.assertIsNone(skip_reason(movie(mime_type="application/octet-stream"), max_size=2 * GB))
+        self.assertIsNone(skip_reason(movie(mime_type=None), max_size=2 * GB))
+        self.assertIsNotNone(
+            skip_reason(movie(file_name="subs.zip", mime_type="application/octet-stream"), max_size=2 * GB)
+        )
+
+    def test_missing_file_name(self):
+        self.assertEqual(skip_reason(movie(file_name=None), max_size=2 * GB), "no file")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+from urllib.parse import urlparse
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+from app.forwarder.config import DB_URI
+from app.forwarder.state import ForwarderState
+
+SOURCE_A = -1001
+SOURCE_B = -1002
+TARGET = -2000
+GB = 1024 * 1024 * 1024
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestForwarderState(unittest.TestCase):
+    def make_state(self, setup=None):
+        client = mongomock.MongoClient()
+        if setup:
+            setup(client)
+        with mock.patch("app.forwarder.state.pymongo.MongoClient", return_value=client):
+            state = ForwarderState()
+        self.addCleanup(state.close)
+        return state
+
+    def add_movies(self, state, channel_id, message_ids):
+        state.movies.insert_many([
+            {"channel_id": channel_id, "message_id": message_id, "file_name": f"{message_id}.mkv", "file_size": 1}
+            for message_id in message_ids
+        ])
+
+    @mock.patch("app.forwarder.state.SETTLE_SECONDS", -60)
+    def test_equal_message_ids_in_other_channels_stay_pending(self):
+        state = self.make_state()
+        self.add_movies(state, SOURCE_A, [1, 2, 3])
+        self.add_movies(state, SOURCE_B, [1, 2, 3])
+
+        state.mark_forwarded(2, SOURCE_A, TARGET)
+        state.mark_forwarded(2, SOURCE_B, TARGET, status="failed")
+
+        pending_a = [movie["message_id"] for movie in state.get_pending_movies(GB, SOURCE_A)]
+        pending_b = [movie["message_id"] for movie in state.get_pending_movies(GB, SOURCE_B)]
+        self.assertEqual(pending_a, [1, 3])
+        self.assertEqual(pending_b, [1, 2, 3])
+
+        self.assertTrue(state.is_forwarded(2, SOURCE_A))
+        self.assertFalse(state.is_forwarded(2, SOURCE_B))
+
+    def test_movie_indexed_below_the_watermark_is_still_forwarded(self):
+        state = self.make_state()
+
+        with mock.patch("app.forwarder.state.SETTLE_SECONDS", -60):
+            # Live messages arrive while the backfill is still on older history
+            self.add_movies(state, SOURCE_A, [100, 101])
+            watermark = state.get_watermark(SOURCE_A, TARGET)
+            movies = list(state.get_pending_movies(GB, SOURCE_A, after=watermark.value))
+            watermark.issue(movies)
+            watermark.complete([100, 101])
+            state.save_watermark(watermark)
+
+            self.add_movies(state, SOURCE_A, [5])
+            watermark = state.get_watermark(SOURCE_A, TARGET)
+            pending = [
+                movie["message_id"]
+                for movie in state.get_pending_movies(GB, SOURCE_A, after=watermark.value)
+            ]
+
+        self.assertEqual(pending, [5])
+
+    def test_recent_inserts_wait_for_the_next_run(self):
+        state = self.make_state()
+        self.add_movies(state, SOURCE_A, [1])
+        self.assertEqual(list(state.get_pending_movies(GB, SOURCE_A)), [])
+
+    def test_legacy_records_are_migrated(self):
+        def legacy(client):
+            forwarded = client[urlparse(DB_URI).path.lstrip("/")]["forwarded_files"]
+            forwarded.create_index("source_message_id", unique=True)
+            forwarded.insert_one({"source_message_id": 7, "status": "success"})
+
+        with mock.patch("app.forwarder.state.SOURCE_CHANNEL_ID", SOURCE_A):
+            state = self.make_state(legacy)
+
+        indexes = state.collection.index_information()
+        self.assertNotIn("source_message_id_1", indexes)
+        self.assertIn("source_channel_message", indexes)
+        self.assertTrue(state.is_forwarded(7, SOURCE_A))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from bson import ObjectId
+
+from app.forwarder.state import Watermark
+
+
+def _movies(*message_ids):
+    # Indexed in the order given
+    return [{"_id": ObjectId(), "message_id": message_id} for message_id in message_ids]
+
+
+class TestWatermark(unittest.TestCase):
+    def test_moves_over_contiguous_completions_only(self):
+        watermark = Watermark(-1, -2)
+        movies = _movies(11, 12, 15, 20)
+        watermark.issue(movies)
+
+        # Skips are recorded before the earlier forwards finish
+        watermark.complete([12, 20])
+        self.assertIsNone(watermark.value)
+
+        watermark.complete([11])
+        self.assertEqual(watermark.value, movies[1]["_id"])
+
+        watermark.complete([15], failed=True)
+        self.assertEqual(watermark.value, movies[3]["_id"])
+        self.assertEqual(watermark.failed, {15})
+
+    def test_follows_indexing_order_not_message_ids(self):
+        watermark = Watermark(-1, -2)
+        # A live message indexed before the backfill reaches older history
+        movies = _movies(500, 20, 21)
+        watermark.issue(movies)
+
+        watermark.complete([500])
+        self.assertEqual(watermark.value, movies[0]["_id"])
+        watermark.complete([21])
+        self.assertEqual(watermark.value, movies[0]["_id"])
+        watermark.complete([20])
+        self.assertEqual(watermark.value, movies[2]["_id"])
+
+    def test_retried_ids_leave_the_failed_set(self):
+        retried = _movies(7, 42)
+        watermark = Watermark(-1, -2, value=ObjectId(), failed=[7, 42])
+        new = _movies(101)
+        watermark.issue(retried + new)
+
+        watermark.complete([7])
+        watermark.complete([42], failed=True)
+        self.assertEqual(watermark.failed, {42})
+
+        watermark.complete([101])
+        self.assertEqual(watermark.value, new[0]["_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+from app.db import queries
+from app.utils import leader as leader_module
+from app.utils.leader import LeaderElection
+
+
+class _Lease:
+    """In-memory stand-in for the lease document."""
+
+    def __init__(self):
+        self.owner = None
+        self.token = 0
+
+    async def acquire(self, name, owner, lease_seconds, token=None):
+        if self.owner not in (None, owner):
+            return None
+        if self.owner != owner or token != self.token:
+            self.token += 1
+        self.owner = owner
+        return self.token
+
+    async def release(self, name, owner, token):
+        if self.owner == owner and self.token == token:
+            self.owner = None
+
+
+class TestLeaderElection(unittest.TestCase):
+    def setUp(self):
+        lease = _Lease()
+        patches = [
+            mock.patch.object(leader_module, "acquire_leadership", lease.acquire),
+            mock.patch.object(leader_module, "release_leadership", lease.release),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_one_leader_and_failover_on_release(self):
+        first = LeaderElection("bot", instance_id="a")
+        second = LeaderElection("bot", instance_id="b")
+
+        async def run():
+            await first.heartbeat()
+            await second.heartbeat()
+            self.assertTrue(first.is_leader)
+            self.assertFalse(second.is_leader)
+
+            # Renewals keep the token
+            await first.heartbeat()
+            self.assertEqual(first.token, 1)
+
+            await first.release()
+            await second.heartbeat()
+            self.assertFalse(first.is_leader)
+            self.assertTrue(second.is_leader)
+            self.assertEqual(second.token, 2)
+
+        asyncio.run(run())
+
+    def test_lease_lapses_locally_without_renewal(self):
+        election = LeaderElection("bot", instance_id="a", lease_seconds=0.05)
+
+        async def run():
+            await election.heartbeat()
+            self.assertTrue(election.is_leader)
+            await asyncio.sleep(0.1)
+            self.assertFalse(election.is_leader)
+
+        asyncio.run(run())
+
+    def test_leader_only_jobs_skip_followers(self):
+        first = LeaderElection("bot", instance_id="a")
+        second = LeaderElection("bot", instance_id="b")
+        runs = []
+
+        async def job(context, fencing_token):
+            runs.append((context, fencing_token))
+
+        async def run():
+            await first.heartbeat()
+            await second.heartbeat()
+            await first.leader_only(job)("a")
+            await second.leader_only(job)("b")
+
+        asyncio.run(run())
+        self.assertEqual(runs, [("a", 1)])
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestLeaderLeaseQueries(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        patch = mock.patch.object(queries, "get_db", return_value=self.db)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_only_one_instance_holds_the_lease(self):
+        token = queries.acquire_leadership("bot", "a", lease_seconds=60)
+        self.assertEqual(token, 1)
+        self.assertIsNone(queries.acquire_leadership("bot", "b", lease_seconds=60))
+
+        # Renewal keeps the token
+        self.assertEqual(queries.acquire_leadership("bot", "a", lease_seconds=60, token=token), 1)
+
+    def test_expired_lease_is_taken_over_with_a_new_token(self):
+        token = queries.acquire_leadership("bot", "a", lease_seconds=0.05)
+        time.sleep(0.1)
+
+        self.assertEqual(queries.acquire_leadership("bot", "b", lease_seconds=60), token + 1)
+        # The old leader cannot renew with its stale token
+        self.assertIsNone(queries.acquire_leadership("bot", "a", lease_seconds=60, token=token))
+
+    def test_release_hands_the_lease_over(self):
+        token = queries.acquire_leadership("bot", "a", lease_seconds=60)
+        self.assertFalse(queries.release_leadership("bot", "b", token))
+        self.assertTrue(queries.release_leadership("bot", "a", token))
+
+        self.assertEqual(queries.acquire_leadership("bot", "b", lease_seconds=60), token + 1)
+
+    def test_reclaim_is_fenced_by_the_leader_token(self):
+        overdue = datetime.utcnow() - timedelta(minutes=5)
+        self.db.deletions.insert_one({"chat_id": 1, "bot_message_id": 2, "delete_at": overdue, "owner": None})
+
+        claimed = queries.reclaim_deletion_tasks("b", datetime.utcnow(), lease_seconds=60, fencing_token=2)
+        self.assertEqual(len(claimed), 1)
+
+        # The lease runs out again, but a deposed leader's token is refused
+        self.db.deletions.update_many({}, {"$set": {"lease_expires": overdue}})
+        self.assertEqual(
+            queries.reclaim_deletion_tasks("a", datetime.utcnow(), lease_seconds=60, fencing_token=1), []
+        )
+        self.assertEqual(
+            len(queries.reclaim_deletion_tasks("c", datetime.utcnow(), lease_seconds=60, fencing_token=3)), 1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
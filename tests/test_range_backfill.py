@@ -0,0 +1,104 @@
+import asyncio
+import types
+import unittest
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+from app.db import queries
+from app.indexer import range_backfill
+from app.indexer.range_backfill import plan_ranges
+
+CHANNEL = -1001
+
+
+class TestPlanRanges(unittest.TestCase):
+    def test_ranges_cover_the_id_space_without_gaps(self):
+        ranges = plan_ranges(1000, 500_000, 16)
+
+        self.assertEqual(len(ranges), 16)
+        self.assertEqual(ranges[0][0], 1000)
+        self.assertEqual(ranges[-1][1], 500_000)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+
+        sizes = {end - start for start, end in ranges}
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_small_spans_get_fewer_ranges(self):
+        self.assertEqual(plan_ranges(10, 13, 8), [(10, 11), (11, 12), (12, 13)])
+
+    def test_nothing_to_backfill(self):
+        self.assertEqual(plan_ranges(500, 500, 8), [])
+        self.assertEqual(plan_ranges(0, 0, 8), [])
+
+
+class _Client:
+    def __init__(self, last_id=0):
+        self.last_id = last_id
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get_messages(self, channel_id, limit):
+        return [types.SimpleNamespace(id=self.last_id)] if self.last_id else []
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestRunRangeBackfill(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.scans = []
+
+        async def resolve_channels(client, channel_ids):
+            return channel_ids
+
+        for module, name, value in [
+            (queries, "get_db", mock.Mock(return_value=self.db)),
+            (range_backfill, "resolve_channels", resolve_channels),
+            (range_backfill, "scan_messages", self.scan_messages),
+        ]:
+            patch = mock.patch.object(module, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def scan_messages(self, client, channel_id, throttle, writer, min_id=0, max_id=0):
+        # Every message of the range is scanned; none has a file
+        self.scans.append((min_id, max_id))
+        for message_id in range(min_id + 1, max_id):
+            await writer.scanned(message_id)
+        await writer.flush()
+        return max_id - min_id - 1
+
+    def run_backfill(self, last_id=0, workers=1):
+        with mock.patch.object(range_backfill, "create_client", return_value=_Client(last_id)):
+            asyncio.run(range_backfill.run_range_backfill(CHANNEL, workers=workers))
+
+    def test_resumed_plan_restarts_ranges_from_their_checkpoints(self):
+        queries.create_backfill_ranges(CHANNEL, [(0, 10), (10, 20), (20, 30)])
+        queries.update_backfill_range(CHANNEL, 0, checkpoint=7)
+        queries.update_backfill_range(CHANNEL, 2, checkpoint=30, done=True)
+
+        self.run_backfill()
+
+        # iter_messages bounds are exclusive, hence end + 1
+        self.assertEqual(sorted(self.scans), [(7, 11), (10, 21)])
+
+    def test_finished_plan_moves_the_checkpoint_and_clears_the_ranges(self):
+        queries.update_last_indexed_message(CHANNEL, 100)
+
+        self.run_backfill(last_id=116, workers=1)
+
+        self.assertEqual(sorted(self.scans), [(100, 105), (104, 109), (108, 113), (112, 117)])
+        self.assertEqual(queries.get_index_progress(CHANNEL)["last_message_id"], 116)
+        self.assertEqual(queries.get_backfill_ranges(CHANNEL), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import time
+import unittest
+
+from app.indexer.rate_control import AdaptiveThrottle
+
+
+class TestAdaptiveThrottle(unittest.TestCase):
+    def test_rate_grows_after_each_clean_window(self):
+        throttle = AdaptiveThrottle(initial_rate=1000, increase=100, window=10)
+
+        async def run():
+            for _ in range(25):
+                await throttle.wait()
+
+        asyncio.run(run())
+        self.assertEqual(throttle.rate, 1200)
+        self.assertEqual(throttle.messages, 25)
+
+    def test_longer_flood_waits_cut_deeper(self):
+        short = AdaptiveThrottle(initial_rate=100)
+        long = AdaptiveThrottle(initial_rate=100)
+        short.on_flood(0)
+        long.on_flood(60)
+
+        self.assertEqual(short.rate, 50)
+        self.assertLess(long.rate, short.rate)
+        self.assertEqual(long.stats()["floods"], 1)
+        self.assertEqual(long.stats()["flood_seconds"], 60)
+
+    def test_concurrent_floods_cut_once(self):
+        # Channels sharing the throttle all see the same FloodWait
+        throttle = AdaptiveThrottle(initial_rate=100)
+        throttle.on_flood(5)
+        rate = throttle.rate
+        throttle.on_flood(5)
+        throttle.on_flood(5)
+
+        self.assertEqual(throttle.rate, rate)
+        self.assertEqual(throttle.floods, 3)
+
+    def test_rate_never_drops_below_minimum(self):
+        throttle = AdaptiveThrottle(initial_rate=10, min_rate=2)
+        for _ in range(10):
+            throttle.on_flood(0)
+        self.assertEqual(throttle.rate, 2)
+
+    def test_flood_blocks_until_wait_is_over(self):
+        throttle = AdaptiveThrottle(initial_rate=1000)
+        throttle.on_flood(0.2)
+
+        started = time.perf_counter()
+        asyncio.run(throttle.wait())
+        self.assertGreaterEqual(time.perf_counter() - started, 0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+
+import unittest
+from app.utils.release_parser import parse_release_name, parse_query_qualifiers
+
+
+class TestReleaseParser(unittest.TestCase):
+    def test_movie_release(self):
+        self.assertEqual(
+            parse_release_name("KGF.Chapter.2.2022.1080p.WEB-DL.x264.Tamil.mkv"),
+            {
+                "title": "kgf chapter 2",
+                "year": 2022,
+                "resolution": "1080p",
+                "codec": "x264",
+                "languages": ["tamil"],
+            },
+        )
+
+    def test_series_release(self):
+        parsed = parse_release_name("Money Heist S01E01 720p HEVC [Dual Audio Hindi English].mkv")
+        self.assertEqual(parsed["title"], "money heist")
+        self.assertEqual((parsed["season"], parsed["episode"]), (1, 1))
+        self.assertEqual(parsed["codec"], "x265")
+        self.assertEqual(parsed["languages"], ["hindi", "english"])
+
+    def test_year_titles(self):
+        self.assertEqual(parse_release_name("1917.2019.2160p.x265.mkv")["title"], "1917")
+        parsed = parse_release_name("Blade.Runner.2049.2017.1080p.mkv")
+        self.assertEqual((parsed["title"], parsed["year"]), ("blade runner 2049", 2017))
+
+    def test_uploader_tag_dropped(self):
+        self.assertEqual(parse_release_name("@TamilMV - Leo (2023) Tamil HDRip.mkv")["title"], "leo")
+
+    def test_query_qualifiers(self):
+        self.assertEqual(parse_query_qualifiers("kgf 2022"), ("kgf", {"year": 2022}))
+        self.assertEqual(
+            parse_query_qualifiers("money heist s1e1"),
+            ("money heist", {"season": 1, "episode": 1}),
+        )
+        self.assertEqual(parse_query_qualifiers("kgf tamil"), ("kgf", {"languages": "tamil"}))
+
+    def test_query_without_title_is_plain(self):
+        self.assertEqual(parse_query_qualifiers("2012"), ("2012", {}))
+        self.assertEqual(parse_query_qualifiers("tamil"), ("tamil", {}))
+        self.assertEqual(parse_query_qualifiers("money heist"), ("money heist", {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+
+import time
+import unittest
+from unittest import mock
+from app.db import queries
+from app.db.search_cache import SearchCache
+from app.db.search_index import SearchIndex
+from app.indexer.telethon_scanner import normalize_text
+from app.utils.release_parser import parse_release_name
+
+
+def _search(total):
+    return {"ranked": [{"message_id": i} for i in range(total)], "total": total, "capped": False}
+
+
+class TestSearchCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        self.assertIsNone(cache.get("kgf"))
+        cache.put("kgf", _search(3))
+        self.assertEqual(cache.get("kgf")["total"], 3)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = SearchCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", _search(1))
+        cache.put("b", _search(1))
+        cache.get("a")
+        cache.put("c", _search(1))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        cache = SearchCache(max_entries=10, ttl_seconds=0.01)
+        cache.put("kgf", _search(1))
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("kgf"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_invalidate_matching(self):
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        cache.put("kgf", _search(1))
+        cache.put("kgf 2", _search(1))
+        cache.put("money heist", _search(1))
+
+        self.assertEqual(cache.invalidate_matching("kgf chapter 2 2022 1080p"), 1)
+        self.assertIsNone(cache.get("kgf"))
+        self.assertIsNotNone(cache.get("kgf 2"))
+        self.assertIsNotNone(cache.get("money heist"))
+
+    def test_invalidate_qualifier_query(self):
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        cache.put("kgf 2022", _search(1), "kgf", {"year": 2022})
+        cache.put("kgf tamil", _search(1), "kgf", {"languages": "tamil"})
+
+        # Neither query is a substring of the text; title and fields decide
+        fields = {"year": 2022, "resolution": "480p", "languages": ["hindi"]}
+        self.assertEqual(cache.invalidate_matching("kgf 2 2022 hindi 480p mkv", fields), 1)
+        self.assertIsNone(cache.get("kgf 2022"))
+        self.assertIsNotNone(cache.get("kgf tamil"))
+
+        cache.put("kgf 2022", _search(1), "kgf", {"year": 2022})
+        self.assertEqual(cache.invalidate_matching("kgf 2018 hindi mkv", {"year": 2018}), 0)
+        # Unknown fields (a removed movie) count as a match
+        self.assertEqual(cache.invalidate_matching("kgf 2018 hindi mkv"), 2)
+
+    def test_disabled(self):
+        cache = SearchCache(max_entries=0, ttl_seconds=60)
+        cache.put("kgf", _search(1))
+        self.assertIsNone(cache.get("kgf"))
+
+
+class TestSearchCacheInvalidation(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        for message_id, file_name in enumerate(["KGF 2022 Tamil 1080p.mkv", "KGF 2018 Hindi 720p.mkv"], 1):
+            self.index.add(self.movie(message_id, file_name))
+
+        for target, value in [
+            ("_search_cache", SearchCache(max_entries=10, ttl_seconds=60)),
+            ("get_search_index", mock.Mock(return_value=self.index)),
+            ("get_spelling_index", mock.Mock(return_value=None)),
+            ("get_db", mock.MagicMock()),
+        ]:
+            patch = mock.patch.object(queries, target, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def movie(self, message_id, file_name):
+        return {
+            "channel_id": -100,
+            "message_id": message_id,
+            "file_name": file_name,
+            "file_size": 1,
+            "normalized_text": normalize_text(file_name),
+            **parse_release_name(file_name),
+        }
+
+    def message_ids(self, query):
+        search = queries.search_movies_page(query, limit=10, offset=0)
+        return {movie["message_id"] for movie in search["results"]}
+
+    def test_inserted_movie_shows_up_in_cached_qualifier_search(self):
+        self.assertEqual(self.message_ids("kgf 2022"), {1})
+
+        self.assertTrue(queries.insert_movie(self.movie(3, "KGF 2 2022 Hindi 480p.mkv")))
+
+        self.assertEqual(self.message_ids("kgf 2022"), {1, 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
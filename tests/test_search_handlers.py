@@ -0,0 +1,66 @@
+import asyncio
+import types
+import unittest
+from unittest import mock
+
+from app.bot.handlers import search
+
+CHAT = -100500
+USER_MESSAGE = 41
+SUGGESTION_MESSAGE = 42
+
+
+class _Bot:
+    def __init__(self):
+        self.sent = []
+
+    async def get_me(self):
+        return types.SimpleNamespace(username="moviebot")
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append({"chat_id": chat_id, "text": text, **kwargs})
+        return types.SimpleNamespace(chat_id=chat_id, message_id=100 + len(self.sent))
+
+
+class TestSuggestionCallback(unittest.TestCase):
+    def test_picked_suggestion_answers_the_users_query(self):
+        bot = _Bot()
+        context = types.SimpleNamespace(bot=bot, args=None)
+        user = types.SimpleNamespace(id=7, username="viewer", first_name="Viewer")
+
+        async def answer():
+            pass
+
+        callback = types.SimpleNamespace(
+            data=f"spell|{USER_MESSAGE}|money heist",
+            answer=answer,
+            message=types.SimpleNamespace(chat_id=CHAT, message_id=SUGGESTION_MESSAGE),
+        )
+        update = types.SimpleNamespace(callback_query=callback, effective_user=user)
+
+        found = {
+            "results": [{"channel_id": -1, "message_id": 5, "file_name": "Money Heist S01E01.mkv", "file_size": 1}],
+            "total": 1,
+            "capped": False,
+            "ranked": [],
+        }
+
+        async def search_page(**kwargs):
+            return found
+
+        async def no_ad():
+            return None
+
+        with mock.patch.object(search, "search_movies_page", search_page), \
+                mock.patch.object(search, "get_ad_text", no_ad), \
+                mock.patch.object(search, "schedule_auto_delete") as schedule:
+            asyncio.run(search.suggestion_callback(update, context))
+
+        self.assertEqual(len(bot.sent), 1)
+        self.assertEqual(bot.sent[0]["chat_id"], CHAT)
+        self.assertEqual(bot.sent[0]["reply_to_message_id"], USER_MESSAGE)
+        self.assertEqual(schedule.call_args.kwargs["user_message_id"], USER_MESSAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
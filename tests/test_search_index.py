@@ -0,0 +1,124 @@
+
+import random
+import unittest
+from app.db.search_index import SearchIndex, rank_key, score_match
+
+
+def _movie(message_id, text, file_name):
+    return {
+        "channel_id": 1,
+        "message_id": message_id,
+        "normalized_text": text,
+        "file_name": file_name,
+        "file_size": 100,
+    }
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        for movie in [
+            _movie(1, "shit", "Shit.mkv"),
+            _movie(2, "hit", "HIT.mkv"),
+            _movie(3, "exhibit a", "Exhibit A.mkv"),
+            _movie(4, "the hit list", "The Hit List.mkv"),
+            _movie(5, "hit 2", "Hit 2.mkv"),
+            _movie(6, "hitman", "Hitman.mkv"),
+            _movie(7, "white house", "White House.mkv"),
+        ]:
+            self.index.add(movie)
+
+    def test_score_tiers(self):
+        self.assertEqual(score_match("hit", "hit"), 40)
+        self.assertEqual(score_match("hit 2", "hit"), 30)
+        self.assertEqual(score_match("the hit list", "hit"), 20)
+        self.assertEqual(score_match("hitman", "hit"), 10)
+
+    def test_ranking_matches_pipeline(self):
+        results = self.index.search("hit", limit=10, offset=0)
+        self.assertEqual(
+            [r["file_name"] for r in results],
+            ["HIT.mkv", "Hit 2.mkv", "The Hit List.mkv", "Shit.mkv", "Hitman.mkv", "White House.mkv"],
+        )
+
+    def test_pagination_and_count(self):
+        page = self.index.search("hit", limit=2, offset=2)
+        self.assertEqual([r["message_id"] for r in page], [4, 1])
+        self.assertEqual(self.index.count("hit"), 6)
+        self.assertEqual(self.index.count("hit list"), 1)
+        self.assertEqual(self.index.count("the list"), 0)
+
+    def test_search_page_returns_ranked_and_total(self):
+        ranked, total = self.index.search_page("hit", ranked_limit=3)
+        self.assertEqual(total, 6)
+        self.assertEqual([r["message_id"] for r in ranked], [2, 5, 4])
+
+    def test_release_field_filters(self):
+        self.index.add({**_movie(9, "hit 2020 720p tamil", "Hit.2020.720p.Tamil.mkv"), "year": 2020, "languages": ["tamil"]})
+        self.index.add({**_movie(10, "hit 2022 1080p", "Hit.2022.1080p.mkv"), "year": 2022})
+
+        ranked, total = self.index.search_page("hit", ranked_limit=5, filters={"year": 2022})
+        self.assertEqual((total, ranked[0]["message_id"]), (1, 10))
+        self.assertEqual(self.index.count("hit", filters={"languages": "tamil"}), 1)
+
+    def test_phrase_must_be_contiguous(self):
+        self.assertEqual(self.index.search("list hit", limit=5, offset=0), [])
+        self.assertEqual(len(self.index.search("hit li", limit=5, offset=0)), 1)
+
+    def test_add_and_remove(self):
+        self.index.add(_movie(8, "hit and run", "Hit and Run.mkv"))
+        self.assertEqual(self.index.count("hit"), 7)
+
+        self.index.remove(1, 8)
+        self.index.remove(1, 2)
+        self.assertEqual(self.index.count("hit"), 5)
+        self.assertEqual(self.index.search("hit", limit=1, offset=0)[0]["file_name"], "Hit 2.mkv")
+
+    def test_substring_terms_follow_the_vocabulary(self):
+        self.assertEqual(self.index.count("itma"), 1)
+
+        self.index.remove(1, 6)
+        self.assertEqual(self.index.count("itma"), 0)
+        self.assertNotIn("itm", self.index._grams)
+
+        self.index.add(_movie(8, "pitman", "Pitman.mkv"))
+        self.assertEqual([r["message_id"] for r in self.index.search("itma", limit=5, offset=0)], [8])
+
+    def test_duplicate_copies_show_once(self):
+        self.index.add({**_movie(11, "hit 2020", "Hit.2020.mkv"), "channel_id": 2, "cluster_id": "c1"})
+        self.index.add({**_movie(12, "hit 2020 1080p", "Hit 2020 1080p.mkv"), "channel_id": 3, "cluster_id": "c1"})
+
+        ranked, total = self.index.search_page("hit 2020", ranked_limit=5)
+        self.assertEqual(total, 1)
+        self.assertEqual(ranked[0]["message_id"], 11)
+        self.assertEqual(self.index.count("hit"), 7)
+
+
+class TestSearchIndexRanking(unittest.TestCase):
+    def test_matches_a_full_sort(self):
+        rng = random.Random(3)
+        words = ["hit", "hitman", "the", "list", "white", "2", "2020", "shit", "a"]
+        index = SearchIndex()
+        docs = []
+        for message_id in range(1, 400):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+            doc = _movie(message_id, text, f"{message_id}.mkv")
+            docs.append(doc)
+            index.add(doc)
+
+        for query in ["hit", "hit 2", "the hit", "it", "2020", "hitman list", "a"]:
+            expected = sorted(
+                (doc for doc in docs if query in doc["normalized_text"]),
+                key=lambda doc: rank_key(doc, score_match(doc["normalized_text"], query)),
+            )
+            ranked, total = index.search_page(query, ranked_limit=25)
+            self.assertEqual(total, len(expected))
+            self.assertEqual(
+                [r["message_id"] for r in ranked],
+                [doc["message_id"] for doc in expected[:25]],
+                query,
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
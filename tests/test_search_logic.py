@@ -1,6 +1,6 @@
 
 import unittest
-from app.db.queries import normalize_query
+from app.db.queries import normalize_query, build_search_fields
 
 class TestSearchLogic(unittest.TestCase):
     def test_normalize_query(self):
@@ -13,6 +13,14 @@ class TestSearchLogic(unittest.TestCase):
         
         # Test already clean
         self.assertEqual(normalize_query("fast and furious"), "fast and furious")
+    def test_build_search_fields(self):
+        fields = build_search_fields("hit 2 2022 1080p hit")
+        self.assertEqual(fields["search_tokens"], ["hit", "2", "2022", "1080p"])
+        self.assertEqual(fields["first_token"], "hit")
+        self.assertEqual(fields["text_len"], 20)
+
+        # No prefix key when the text does not start with a word
+        self.assertEqual(build_search_fields("@hit")["first_token"], "")
 
 if __name__ == '__main__':
     unittest.main()
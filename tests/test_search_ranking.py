@@ -2,7 +2,6 @@
 import sys
 import os
 import asyncio
-from pymongo import MongoClient
 import logging
 
 # Add app to path
@@ -10,7 +9,6 @@ sys.path.append(os.getcwd())
 
 from app.db.queries import search_movies
 from app.db.connection import get_db
-from app.utils.config import MONGO_URI, DB_NAME
 
 # Mock the collection name for testing
 import app.db.queries
@@ -23,8 +21,7 @@ sys.stdout = open("test_output.txt", "w", encoding="utf-8")
 async def test_ranking():
     print("🚀 Starting Search Ranking Verification...")
     
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
+    db = get_db()
     collection = db["test_movies_ranking"]
     
     # 1. Clean up previous tests
@@ -0,0 +1,48 @@
+
+import time
+import unittest
+from app.utils.search_sessions import SearchSessionStore
+
+
+def _search(total):
+    return {"ranked": [{"message_id": i} for i in range(total)], "total": total, "capped": False}
+
+
+class TestSearchSessions(unittest.TestCase):
+    def test_create_and_get(self):
+        store = SearchSessionStore(ttl_seconds=60)
+        session_id = store.create("KGF", _search(12))
+
+        # Must fit Telegram's 64-byte callback_data with room for the page
+        self.assertLessEqual(len(f"search|{session_id}|999".encode()), 64)
+
+        session = store.get(session_id)
+        self.assertEqual(session["query"], "KGF")
+        self.assertEqual([m["message_id"] for m in session["ranked"][5:10]], [5, 6, 7, 8, 9])
+
+    def test_expiry(self):
+        store = SearchSessionStore(ttl_seconds=0.01)
+        session_id = store.create("KGF", _search(1))
+        time.sleep(0.02)
+        self.assertIsNone(store.get(session_id))
+        self.assertIsNone(store.get("unknown"))
+
+    def test_get_extends_expiry(self):
+        store = SearchSessionStore(ttl_seconds=0.05)
+        session_id = store.create("KGF", _search(1))
+        time.sleep(0.03)
+        self.assertIsNotNone(store.get(session_id))
+        time.sleep(0.03)
+        self.assertIsNotNone(store.get(session_id))
+
+    def test_bounded(self):
+        store = SearchSessionStore(ttl_seconds=60, max_sessions=2)
+        first = store.create("a", _search(1))
+        store.create("b", _search(1))
+        store.create("c", _search(1))
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get(first))
+
+
+if __name__ == '__main__':
+    unittest.main()
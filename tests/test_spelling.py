@@ -0,0 +1,44 @@
+
+import unittest
+from app.db.spelling import SpellingIndex, edit_distance
+
+
+class TestSpelling(unittest.TestCase):
+    def setUp(self):
+        self.index = SpellingIndex(max_distance=2)
+        for text in [
+            "money heist s01e01 1080p",
+            "money heist s01e02 720p",
+            "oppenheimer 2023 1080p",
+            "interstellar 2014 720p",
+            "kgf chapter 2 2022 tamil",
+        ]:
+            self.index.add_text(text)
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("heist", "heist", 2), 0)
+        self.assertEqual(edit_distance("hiest", "heist", 2), 1)  # transposition
+        self.assertEqual(edit_distance("opnheimer", "oppenheimer", 2), 2)
+        self.assertEqual(edit_distance("abc", "xyzzy", 2), 3)
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup("hiest"), ["heist"])
+        self.assertEqual(self.index.lookup("intersteller"), ["interstellar"])
+        self.assertEqual(self.index.lookup("zzzzzz"), [])
+
+    def test_suggest_phrase(self):
+        self.assertEqual(self.index.suggest("mony hiest"), ["money heist"])
+        self.assertEqual(self.index.suggest("kgf chaptr 2"), ["kgf chapter 2"])
+
+    def test_no_suggestion_for_known_or_unfixable(self):
+        self.assertEqual(self.index.suggest("money heist"), [])
+        self.assertEqual(self.index.suggest("money qqqqqq"), [])
+
+    def test_incremental_add(self):
+        self.assertEqual(self.index.suggest("jawn"), [])
+        self.index.add_text("jawan 2023 hindi")
+        self.assertEqual(self.index.suggest("jawn"), ["jawan"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import types
+import unittest
+from unittest import mock
+
+from telethon.errors import TakeoutInitDelayError
+
+from app.indexer import telethon_scanner
+from app.indexer.telethon_scanner import TAKEOUT_MIN_BACKLOG
+
+BACKLOGGED = -1001
+CAUGHT_UP = -1002
+
+
+class _Takeout:
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        if self.client.takeout_delay:
+            raise TakeoutInitDelayError(request=None, capture=self.client.takeout_delay)
+        return self.client.takeout_session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Client:
+    def __init__(self, latest, takeout_delay=0):
+        self.latest = latest
+        self.takeout_delay = takeout_delay
+        self.takeout_session = types.SimpleNamespace(name="takeout")
+        self.takeout_calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get_messages(self, channel_id, limit):
+        return [types.SimpleNamespace(id=self.latest[channel_id])]
+
+    def takeout(self, **kwargs):
+        self.takeout_calls.append(kwargs)
+        return _Takeout(self)
+
+
+class TestTakeoutIndexing(unittest.TestCase):
+    def setUp(self):
+        self.runs = []
+
+        async def resolve_channels(client, channel_ids):
+            return channel_ids
+
+        async def index_channel(client, channel_id, throttle, last_indexed=0):
+            self.runs.append((channel_id, client, throttle, last_indexed))
+
+        progress = {BACKLOGGED: {"last_message_id": 10}, CAUGHT_UP: {"last_message_id": 500}}
+        for name, value in [
+            ("resolve_channels", resolve_channels),
+            ("index_channel", index_channel),
+            ("get_index_progress", progress.get),
+            ("record_index_rate", mock.Mock()),
+        ]:
+            patch = mock.patch.object(telethon_scanner, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_indexer(self, client):
+        with mock.patch.object(telethon_scanner, "create_client", return_value=client):
+            asyncio.run(telethon_scanner.run_telethon_indexer([BACKLOGGED, CAUGHT_UP], takeout=True))
+        return {channel_id: (run_client, throttle) for channel_id, run_client, throttle, _ in self.runs}
+
+    def test_backlog_goes_to_the_takeout_session(self):
+        client = _Client({BACKLOGGED: 10 + TAKEOUT_MIN_BACKLOG, CAUGHT_UP: 520})
+        runs = self.run_indexer(client)
+
+        self.assertEqual(len(client.takeout_calls), 1)
+        self.assertIs(runs[BACKLOGGED][0], client.takeout_session)
+        self.assertIs(runs[CAUGHT_UP][0], client)
+        # Each session paces itself
+        self.assertIsNot(runs[BACKLOGGED][1], runs[CAUGHT_UP][1])
+        self.assertEqual(sorted(last for *_, last in self.runs), [10, 500])
+
+    def test_takeout_delay_falls_back_to_the_normal_session(self):
+        client = _Client({BACKLOGGED: 10 + TAKEOUT_MIN_BACKLOG, CAUGHT_UP: 520}, takeout_delay=3600)
+        runs = self.run_indexer(client)
+
+        self.assertEqual(len(client.takeout_calls), 1)
+        self.assertIs(runs[BACKLOGGED][0], client)
+        # Sharing the normal session means sharing its throttle
+        self.assertIs(runs[BACKLOGGED][1], runs[CAUGHT_UP][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
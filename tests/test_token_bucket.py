@@ -0,0 +1,35 @@
+import asyncio
+import time
+import unittest
+
+from app.forwarder.rate_limit import TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    def _timed(self, coro_factory):
+        started = time.perf_counter()
+        asyncio.run(coro_factory())
+        return time.perf_counter() - started
+
+    def test_burst_then_steady_rate(self):
+        bucket = TokenBucket(rate=20, capacity=3)
+
+        async def take(count):
+            for _ in range(count):
+                await bucket.acquire()
+
+        # Three tokens are there from the start; four more take ~0.2s at 20/s
+        elapsed = self._timed(lambda: take(7))
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertLess(elapsed, 0.5)
+
+    def test_pause_holds_callers(self):
+        bucket = TokenBucket(rate=1000, capacity=10)
+        bucket.pause(0.2)
+
+        elapsed = self._timed(bucket.acquire)
+        self.assertGreaterEqual(elapsed, 0.18)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import types
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+from app.db import queries
+from app.db.search_cache import SearchCache
+from app.db.search_index import SearchIndex
+from app.indexer import watcher
+from app.indexer.watcher import LiveIndexer
+
+CHANNEL = -1001
+
+
+def _event(message_id, file_name="Leo 2023 1080p.mkv", text=""):
+    file = None
+    if file_name:
+        file = types.SimpleNamespace(name=file_name, id=message_id, size=1, mime_type="video/x-matroska", duration=None)
+    message = types.SimpleNamespace(id=message_id, file=file, text=text)
+    return types.SimpleNamespace(chat_id=CHANNEL, message=message)
+
+
+class TestLiveIndexer(unittest.TestCase):
+    def setUp(self):
+        self.live = LiveIndexer(client=None, channel_ids=[CHANNEL])
+
+    def test_checkpoint_waits_for_catch_up(self):
+        with mock.patch.object(watcher, "insert_movie", return_value=True) as insert, \
+                mock.patch.object(watcher, "update_last_indexed_message") as checkpoint:
+            asyncio.run(self.live.on_new_message(_event(10)))
+            self.live._caught_up.add(CHANNEL)
+            asyncio.run(self.live.on_new_message(_event(11)))
+
+        self.assertEqual(insert.call_count, 2)
+        checkpoint.assert_called_once_with(CHANNEL, 11)
+
+    def test_edit_reindexes_or_inserts(self):
+        with mock.patch.object(watcher, "update_movie", return_value=False) as update, \
+                mock.patch.object(watcher, "insert_movie", return_value=True) as insert:
+            asyncio.run(self.live.on_message_edited(_event(12, "Leo 2023 Tamil 720p.mkv")))
+
+        update.assert_called_once()
+        self.assertEqual(update.call_args.args[2]["languages"], ["tamil"])
+        insert.assert_called_once()
+
+    def test_edit_without_file_removes_movie(self):
+        with mock.patch.object(watcher, "delete_movies", return_value=1) as delete:
+            asyncio.run(self.live.on_message_edited(_event(13, file_name=None)))
+
+        delete.assert_called_once_with(CHANNEL, [13])
+
+    def test_deletions(self):
+        event = types.SimpleNamespace(chat_id=CHANNEL, deleted_ids=[1, 2, 3])
+        with mock.patch.object(watcher, "delete_movies", return_value=2) as delete:
+            asyncio.run(self.live.on_message_deleted(event))
+            asyncio.run(self.live.on_message_deleted(types.SimpleNamespace(chat_id=None, deleted_ids=[4])))
+
+        delete.assert_called_once_with(CHANNEL, [1, 2, 3])
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestMemoryIndexSync(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.index = SearchIndex()
+        self.synced_at = datetime.utcnow() - timedelta(seconds=5)
+
+        for target, value in [
+            ("get_db", mock.Mock(return_value=self.db)),
+            ("get_search_index", mock.Mock(return_value=self.index)),
+            ("get_spelling_index", mock.Mock(return_value=None)),
+            ("_search_cache", SearchCache(max_entries=10, ttl_seconds=60)),
+            ("_memory_synced_at", self.synced_at),
+        ]:
+            patch = mock.patch.object(queries, target, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def movie(self, message_id, file_name, indexed_at):
+        return {
+            "channel_id": CHANNEL,
+            "message_id": message_id,
+            "file_name": file_name,
+            "file_size": 1,
+            "normalized_text": file_name.lower(),
+            "created_at": indexed_at,
+            "updated_at": indexed_at,
+        }
+
+    def test_reinsert_after_delete_survives_the_tombstone(self):
+        # Another process deletes message 10 and indexes it again, both after the last sync
+        self.index.add(self.movie(10, "Leo 2023 720p.mkv", self.synced_at))
+        deleted_at = self.synced_at + timedelta(seconds=1)
+        self.db[queries.TOMBSTONES_COLLECTION].insert_one({
+            "channel_id": CHANNEL, "message_id": 10,
+            "normalized_text": "leo 2023 720p.mkv", "deleted_at": deleted_at,
+        })
+        self.db[queries.MOVIES_COLLECTION].insert_one(
+            self.movie(10, "Leo 2023 1080p.mkv", deleted_at + timedelta(seconds=1))
+        )
+
+        self.assertEqual(queries.sync_memory_indexes(), 2)
+        self.assertEqual(self.index.get(CHANNEL, 10)["normalized_text"], "leo 2023 1080p.mkv")
+        self.assertEqual(self.index.count("leo"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()